@@ -38,41 +38,42 @@ class LiveMarketScanner:
 
         opportunities = []
 
-        for event in events[:10]:  # Analizează primele 10
-            event_data = event.get('event', {})
-            event_id = event_data.get('id')
-            event_name = event_data.get('name')
-
-            logger.info(f"\n📊 Analyzing: {event_name}")
+        # Analizează primele 10 - piețele și prețurile se cer grupat, nu per eveniment/piață
+        event_names = {
+            e.get('event', {}).get('id'): e.get('event', {}).get('name')
+            for e in events[:10]
+        }
 
-            # Get markets for this event
-            markets = await self.client.list_market_catalogue(
-                event_ids=[event_id],
-                market_type_codes=["MATCH_ODDS", "OVER_UNDER_25", "BOTH_TEAMS_TO_SCORE"]
-            )
+        markets = await self.client.list_market_catalogue(
+            event_ids=[event_id for event_id in event_names if event_id],
+            market_type_codes=["MATCH_ODDS", "OVER_UNDER_25", "BOTH_TEAMS_TO_SCORE"]
+        )
 
-            for market in markets:
-                market_id = market.get('marketId')
-                market_name = market.get('marketName')
+        market_ids = [m.get('marketId') for m in markets if m.get('marketId')]
+        market_books = await self.client.list_market_book(market_ids) if market_ids else []
+        books_by_market = {mb.get('marketId'): mb for mb in market_books}
 
-                # Get live prices
-                market_books = await self.client.list_market_book([market_id])
+        for market in markets:
+            market_id = market.get('marketId')
+            market_name = market.get('marketName')
+            event_name = event_names.get(market.get('event', {}).get('id'))
 
-                if not market_books:
-                    continue
+            logger.info(f"\n📊 Analyzing: {event_name} - {market_name}")
 
-                market_book = market_books[0]
+            market_book = books_by_market.get(market_id)
+            if not market_book:
+                continue
 
-                # Analizează runners și prețuri
-                analysis = self._analyze_market(market, market_book)
+            # Analizează runners și prețuri
+            analysis = self._analyze_market(market, market_book)
 
-                if analysis:
-                    opportunities.append({
-                        'event_name': event_name,
-                        'market_name': market_name,
-                        'analysis': analysis,
-                        'timestamp': datetime.now().isoformat()
-                    })
+            if analysis:
+                opportunities.append({
+                    'event_name': event_name,
+                    'market_name': market_name,
+                    'analysis': analysis,
+                    'timestamp': datetime.now().isoformat()
+                })
 
         return opportunities
 
@@ -8,7 +8,7 @@ from app.database import get_db
 from app.schemas.auth import RegisterRequest, LoginRequest, LoginResponse
 from app.schemas.user import UserResponse
 from app.services.auth_service import auth_service
-from app.services.google_sheets_multi import google_sheets_multi_service
+from app.services.google_sheets_async import google_sheets_async_service
 from app.dependencies import get_current_user
 from app.models.user import User
 import logging
@@ -43,7 +43,7 @@ async def register(
 
         # Create Google Sheets spreadsheet for user
         try:
-            spreadsheet_id = google_sheets_multi_service.create_user_spreadsheet(
+            spreadsheet_id = await google_sheets_async_service.create_user_spreadsheet(
                 user_email=user.email,
                 user_id=user.id
             )
@@ -16,6 +16,7 @@ from app.models.betfair_credentials import BetfairCredentials
 from app.dependencies import get_current_user
 from app.services.encryption import encryption_service
 from app.services.betfair_client import BetfairClient
+from app.services.betfair_session_store import betfair_session_store
 
 router = APIRouter(prefix="/betfair", tags=["betfair"])
 logger = logging.getLogger(__name__)
@@ -239,6 +240,7 @@ async def save_user_credentials(
         db.add(credentials)
 
     db.commit()
+    await betfair_session_store.invalidate(user.id)
 
 
 @router.post("/verify-credentials")
@@ -346,6 +348,9 @@ async def save_betfair_credentials(
 
         db.commit()
 
+        # Sesiunea cache-uită folosește credențialele vechi
+        await betfair_session_store.invalidate(current_user.id)
+
         return {
             "success": True,
             "message": "Credențiale Betfair salvate cu succes! 🎉"
@@ -430,6 +435,7 @@ async def delete_betfair_credentials(
         if credentials:
             db.delete(credentials)
             db.commit()
+            await betfair_session_store.invalidate(current_user.id)
             logger.info(f"Deleted Betfair credentials for user {current_user.email}")
 
             return {
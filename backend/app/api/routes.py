@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+import asyncio
+from fastapi import APIRouter, HTTPException, Response, status, Depends
 from typing import List, Optional
 from uuid import uuid4
 from datetime import datetime
@@ -14,10 +15,10 @@ from app.models.settings import AppSettings, SettingsUpdate
 from app.services.staking import staking_service
 from app.services.settings_manager import settings_manager
 from app.services.google_sheets import google_sheets_client
-from app.services.google_sheets_multi import google_sheets_multi_service
+from app.services.google_sheets_async import google_sheets_async_service
 from app.services.betfair_client import betfair_client
 from app.services.auth import authenticate, get_current_user
-from app.dependencies import get_current_user as get_current_user_jwt
+from app.dependencies import get_current_user as get_current_user_jwt, require_metrics_token
 from app.models.user import User
 from app.config import get_settings
 from app.database import get_db
@@ -60,24 +61,54 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
 
 
+@router.get("/metrics", dependencies=[Depends(require_metrics_token)])
+async def get_metrics():
+    """
+    Metrici interne de performanță (Betfair: transport, sesiuni, catalog, date de piață, stream-uri;
+    Sheets; scheduler; joburi; pool-uri DB). Doar agregate, fără date per user; accesibil doar
+    cu header-ul X-Metrics-Token (metrics_token din config).
+    """
+    from app.services.betfair_transport import betfair_transport
+    from app.services.betfair_session_store import betfair_session_store
+    from app.services.event_catalogue import event_catalogue
+    from app.services.market_data import market_data_service
+    from app.services.betfair_stream import order_stream_manager
+    from app.services.multi_user_scheduler import multi_user_scheduler
+    from app.services.sheets_write_queue import sheets_write_queue
+    from app.services.sheets_rate_limiter import sheets_rate_limiter
+    from app.database import get_pool_stats
+    from app.services.fixture_resolutions import fixture_resolutions
+    from app.services.job_queue import job_queue
+
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "betfair_transport": betfair_transport.get_stats(),
+        "betfair_sessions": betfair_session_store.get_stats(),
+        "event_catalogue": event_catalogue.get_stats(),
+        "fixture_resolutions": fixture_resolutions.get_stats(),
+        "market_data": market_data_service.get_stats(),
+        "order_streams": order_stream_manager.get_stats(),
+        "sheets": google_sheets_async_service.get_stats(),
+        "sheets_cache": google_sheets_async_service.sync_service.cache.get_stats(),
+        "sheets_write_queue": sheets_write_queue.get_stats(),
+        "sheets_quota": sheets_rate_limiter.get_stats(),
+        "scheduler": multi_user_scheduler.get_stats(),
+        "jobs": job_queue.get_stats(),
+        "database_pools": get_pool_stats()
+    }
+
+
 @router.get("/stats", response_model=DashboardStats)
 async def get_dashboard_stats(current_user: User = Depends(get_current_user_jwt)):
     """Returnează statisticile pentru dashboard (per user)."""
     from app.services.teams_repository import teams_repository
+    from app.services.user_stats_repository import user_stats_repository
 
     # Get user's teams
-    teams = teams_repository.get_user_teams(current_user.id, active_only=False)
-
-    # Get betting stats from Google Sheets
-    betting_stats = {'total_bets': 0, 'won_bets': 0, 'lost_bets': 0, 'pending_bets': 0, 'total_profit': 0.0, 'total_staked': 0.0}
+    teams = await teams_repository.get_user_teams_async(current_user.id, active_only=False)
 
-    if current_user.google_sheets_id:
-        try:
-            betting_stats = google_sheets_multi_service.get_betting_stats(current_user.google_sheets_id)
-        except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"Could not get betting stats for {current_user.email}: {e}")
+    # Get betting stats (materializate în database, un singur rând)
+    betting_stats = await user_stats_repository.get_user_stats_async(current_user.id)
 
     # Calculate win rate
     total_settled = betting_stats['won_bets'] + betting_stats['lost_bets']
@@ -131,90 +162,95 @@ async def stop_bot():
 
 @router.post("/bot/run-now", response_model=ApiResponse)
 async def run_bot_now(current_user: User = Depends(get_current_user_jwt)):
-    """Execută bot-ul manual pentru user-ul curent."""
+    """
+    Execută bot-ul manual pentru user-ul curent, ca job în fundal.
+    Returnează imediat job_id; progresul vine pe WebSocket (job_update) și la GET /jobs/{job_id}.
+    """
     from app.services.user_bot_service import UserBotService
+    from app.services.job_queue import job_queue, Job, JobError
 
-    try:
+    async def run_now(job: Job) -> dict:
         # Create bot service pentru acest user
         bot_service = UserBotService(current_user)
 
-        # Initialize
-        initialized = await bot_service.initialize()
+        # Initialize (login-ul poate fi întrerupt la timeout)
+        await job.report(10, "Conectare la Betfair")
+        try:
+            initialized = await asyncio.wait_for(bot_service.initialize(), timeout=job.remaining())
+        except asyncio.TimeoutError:
+            raise JobError("Timeout la conectarea la Betfair")
         if not initialized:
-            return ApiResponse(
-                success=False,
-                message="Nu s-a putut inițializa bot-ul. Verifică credențialele Betfair."
-            )
+            raise JobError("Nu s-a putut inițializa bot-ul. Verifică credențialele Betfair.")
 
-        # Run bot
-        result = await bot_service.run_bot()
+        # Run bot (după deadline-ul jobului nu mai e pornită nicio echipă)
+        try:
+            await job.report(30, "Procesare echipe")
+            result = await bot_service.run_bot(deadline=job.deadline)
+        finally:
+            await bot_service.cleanup()
 
-        # Cleanup
-        await bot_service.cleanup()
+        await job.report(
+            100,
+            f"Bot executat: {result['teams_processed']} echipe procesate, {result['bets_placed']} pariuri plasate"
+        )
+        return result
 
+    try:
+        job = await job_queue.submit(current_user, "run_now", run_now)
         return ApiResponse(
             success=True,
-            message=f"Bot executat: {result['teams_processed']} echipe procesate, {result['bets_placed']} pariuri plasate",
-            data=result
+            message="Rularea bot-ului a pornit",
+            data={"job_id": job.id, "status": job.status}
         )
 
     except Exception as e:
         return ApiResponse(
             success=False,
-            message=f"Eroare la execuția bot-ului: {str(e)}"
+            message=f"Eroare la pornirea bot-ului: {str(e)}"
         )
 
 
+@router.get("/jobs/{job_id}")
+async def get_job_status(
+    job_id: str,
+    current_user: User = Depends(get_current_user_jwt)
+):
+    """Starea unui job pornit de user (status, progres, rezultat) - pentru clienții fără WebSocket."""
+    from app.services.job_queue import job_queue
+
+    job = await job_queue.get_job(job_id, current_user.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Jobul {job_id} nu a fost găsit"
+        )
+    return job
+
+
 @router.get("/teams/search-betfair")
 async def search_teams_betfair(
     q: str = "",
     current_user: User = Depends(get_current_user_jwt)
 ):
     """
-    Caută echipe pe Betfair API folosind credențialele master (cu certificat SSL).
+    Caută echipe în catalogul global de evenimente Betfair (reîmprospătat prin
+    planul de date master când expiră).
     Returnează lista de echipe găsite pentru autocomplete.
     """
     if len(q) < 3:
         return []
 
-    from app.services.betfair_client import BetfairClient
-    import os
+    from app.services.event_catalogue import event_catalogue
+    from app.services.market_data import market_data_service
     import logging
     logger = logging.getLogger(__name__)
 
     try:
-        # Use master credentials with SSL certificate for search
-        master_app_key = os.environ.get("BETFAIR_MASTER_APP_KEY")
-        master_username = os.environ.get("BETFAIR_MASTER_USERNAME")
-        master_password = os.environ.get("BETFAIR_MASTER_PASSWORD")
-
-        if not all([master_app_key, master_username, master_password]):
-            logger.error("Master Betfair credentials not configured")
-            return []
-
-        # Create and configure Betfair client with master credentials
-        user_betfair_client = BetfairClient()
-        user_betfair_client.configure(
-            app_key=master_app_key,
-            username=master_username,
-            password=master_password
-        )
-
-        # Connect
-        await user_betfair_client.connect()
-        if not user_betfair_client.is_connected():
-            logger.warning(f"Nu s-a putut conecta la Betfair cu credențialele master")
+        # Catalogul global se reîmprospătează prin planul de date master doar când a expirat
+        if not await market_data_service.ensure_catalogue():
+            logger.warning("Catalog evenimente indisponibil (credențiale master lipsă sau conexiune eșuată)")
             return []
 
-        # Search events
-        events = await user_betfair_client.list_events(
-            event_type_id="1",
-            text_query=q
-        )
-
-        # Disconnect after search
-        await user_betfair_client.disconnect()
-
         # Skip keywords pentru echipe rezerve/tineret/feminine (COMPLETE ca în Clabot)
         skip_keywords = [
             "(Res)", "U19", "U20", "U21", "U23",
@@ -223,47 +259,8 @@ async def search_teams_betfair(
             "Castilla", "Juvenil"
         ]
 
-        # Extragem echipe cu selectionId (ca în Clabot)
-        teams_dict = {}
-
-        for event in events[:20]:
-            event_data = event.get("event", {})
-            event_id = event_data.get("id", "")
-            event_name = event_data.get("name", "")
-
-            # Skip meciuri cu echipe rezerve/tineret
-            if any(kw in event_name for kw in skip_keywords):
-                continue
-
-            if not event_id:
-                continue
-
-            try:
-                # Get market pentru a extrage runners cu selectionId
-                markets = await user_betfair_client.list_market_catalogue(
-                    event_ids=[event_id],
-                    market_type_codes=["MATCH_ODDS"]
-                )
-
-                if markets:
-                    market = markets[0]
-                    runners = market.get("runners", [])
-
-                    for runner in runners:
-                        runner_name = runner.get("runnerName", "")
-                        selection_id = str(runner.get("selectionId", ""))
-
-                        # Skip runners cu keywords
-                        if any(kw in runner_name for kw in skip_keywords):
-                            continue
-
-                        # Doar echipele care conțin query-ul
-                        if q.lower() in runner_name.lower() and runner_name not in teams_dict:
-                            teams_dict[runner_name] = selection_id
-
-            except Exception as e:
-                logger.warning(f"Eroare la preluarea runners pentru {event_name}: {e}")
-                continue
+        # Echipe (runners) cu selectionId, căutate în catalog
+        teams_dict = event_catalogue.search_runners(q, skip_keywords)
 
         # Returnează obiecte cu name și selectionId (ca în Clabot)
         results = sorted(
@@ -286,7 +283,21 @@ async def get_teams(
 ):
     """Returnează lista de echipe pentru user-ul curent."""
     from app.services.teams_repository import teams_repository
-    return teams_repository.get_user_teams(current_user.id, active_only)
+    from app.services.user_stats_repository import user_stats_repository
+
+    teams = teams_repository.get_user_teams(current_user.id, active_only)
+
+    # Contoarele per echipă (materializate odată cu pariurile)
+    team_stats = user_stats_repository.get_team_stats(current_user.id)
+    for team in teams:
+        stats = team_stats.get(team.name)
+        if stats:
+            team.total_matches = stats['won_bets'] + stats['lost_bets']
+            team.matches_won = stats['won_bets']
+            team.matches_lost = stats['lost_bets']
+            team.total_profit = stats['total_profit']
+
+    return teams
 
 
 @router.get("/teams/{team_id}", response_model=Team)
@@ -309,13 +320,18 @@ async def get_team(
 @router.post("/teams", response_model=Team, status_code=status.HTTP_201_CREATED)
 async def create_team(
     team_create: TeamCreate,
+    response: Response,
     current_user: User = Depends(get_current_user_jwt)
 ):
-    """Creează o echipă nouă și preia următoarele 20 de meciuri."""
+    """
+    Creează o echipă nouă. Sheets, următoarele 20 de meciuri și pariul pe primul meci
+    sunt făcute de un job în fundal (header X-Job-Id; progres pe WebSocket).
+    """
     from app.services.betfair_client import BetfairClient
     from app.services.teams_repository import teams_repository
+    from app.services.job_queue import job_queue, Job
     from app.services.encryption import encryption_service
-    from sqlalchemy import create_engine, text
+    from sqlalchemy import text
     from app.config import get_settings
     import logging
     logger = logging.getLogger(__name__)
@@ -361,202 +377,225 @@ async def create_team(
     # Save to database (SINGURA SURSĂ)
     teams_repository.create_team(team)
 
-    # Save to Google Sheets (user's spreadsheet) and fetch matches
+    # Save to Google Sheets (user's spreadsheet) and fetch matches - în fundal
     if current_user.google_sheets_id:
-        # Save team to Index sheet
-        team_data = {
-            'id': team.id,
-            'name': team.name,
-            'betfair_id': team.betfair_id,
-            'sport': team.sport.value,
-            'league': team.league,
-            'country': team.country,
-            'cumulative_loss': 0.0,
-            'last_stake': settings.bot_initial_stake,
-            'progression_step': 0,
-            'status': 'active',
-            'created_at': team.created_at.isoformat(),
-            'updated_at': team.updated_at.isoformat(),
-            'initial_stake': settings.bot_initial_stake
-        }
-
-        google_sheets_multi_service.update_team_in_index(
-            current_user.google_sheets_id,
-            team.id,
-            team_data
-        )
+        async def setup_team(job: Job) -> dict:
+            setup = {'matches_saved': 0, 'bet_placed': False}
+
+            # Save team to Index sheet
+            await job.report(5, "Salvare echipă în Google Sheets")
+            team_data = {
+                'id': team.id,
+                'name': team.name,
+                'betfair_id': team.betfair_id,
+                'sport': team.sport.value,
+                'league': team.league,
+                'country': team.country,
+                'cumulative_loss': 0.0,
+                'last_stake': settings.bot_initial_stake,
+                'progression_step': 0,
+                'status': 'active',
+                'created_at': team.created_at.isoformat(),
+                'updated_at': team.updated_at.isoformat(),
+                'initial_stake': settings.bot_initial_stake
+            }
+
+            await google_sheets_async_service.update_team_in_index(
+                current_user.google_sheets_id,
+                team.id,
+                team_data
+            )
 
-        # Create team sheet
-        google_sheets_multi_service.add_team_sheet(
-            current_user.google_sheets_id,
-            team.name
-        )
+            # Create team sheet
+            await google_sheets_async_service.add_team_sheet(
+                current_user.google_sheets_id,
+                team.name
+            )
 
-        # Fetch next 20 matches from Betfair with odds (using master credentials with SSL)
-        import os
-        user_betfair_client = None
-        try:
-            # Use master credentials with SSL certificate
-            master_app_key = os.environ.get("BETFAIR_MASTER_APP_KEY")
-            master_username = os.environ.get("BETFAIR_MASTER_USERNAME")
-            master_password = os.environ.get("BETFAIR_MASTER_PASSWORD")
-
-            if not all([master_app_key, master_username, master_password]):
-                logger.warning("Master Betfair credentials not configured - skip fetch matches")
-            else:
-                # Create Betfair client with master credentials
-                user_betfair_client = BetfairClient()
-                user_betfair_client.configure(
-                    app_key=master_app_key,
-                    username=master_username,
-                    password=master_password
-                )
-
-                await user_betfair_client.connect()
-
-            if user_betfair_client and user_betfair_client.is_connected():
-                # Search for team matches
-                event_type_id = "1" if team.sport == "football" else "7522"
-                events = await user_betfair_client.list_events(
-                    event_type_id=event_type_id,
-                    text_query=team.name
-                )
-
-                matches = []
-                for event in events[:20]:
-                    event_data = event.get("event", {})
-                    event_id = event_data.get("id", "")
-                    event_name = event_data.get("name", "")
-                    competition = event.get("competitionName", "")
-
-                    # Skip reserve/youth teams
+            # Fetch next 20 matches from Betfair with odds (planul de date master, cu cache)
+            from app.services.market_data import market_data_service
+            await job.report(20, "Căutare meciuri pe Betfair")
+            try:
+                data_client = await market_data_service.get_client()
+                if not data_client:
+                    logger.warning("Master Betfair credentials not configured - skip fetch matches")
+                else:
+                    # Search for team matches
+                    event_type_id = "1" if team.sport == "football" else "7522"
+                    events = await market_data_service.list_events(
+                        event_type_id=event_type_id,
+                        text_query=team.name
+                    )
+
+                    # Filtrare evenimente, apoi piețe și prețuri cerute o singură dată pentru toate
                     skip_keywords = ["(Res)", "U19", "U21", "U23", "Women", "Feminin", "II", "B)", "(W)"]
-                    if any(kw in event_name for kw in skip_keywords):
-                        logger.info(f"Skip echipă rezerve/tineret: {event_name}")
-                        continue
-
-                    # Verificare EXTRA: numele echipei trebuie să apară în numele meciului
-                    # Previne bug-ul unde "Real Madrid" găsește și "Real Sociedad"
-                    if team.name.lower() not in event_name.lower():
-                        logger.info(f"Skip {event_name} - {team.name} nu apare în numele meciului")
-                        continue
-
-                    # Get odds and start time from market catalogue
-                    odds = ""
-                    market_start_time = ""
-                    if event_id:
-                        try:
-                            markets = await user_betfair_client.list_market_catalogue(
-                                event_ids=[event_id],
-                                market_type_codes=["MATCH_ODDS"]
-                            )
-                            if markets:
-                                market = markets[0]
-                                market_id = market.get("marketId", "")
-                                market_start_time_utc = market.get("marketStartTime", "")
-
-                                # Convert UTC to Europe/Bucharest
-                                if market_start_time_utc:
-                                    try:
-                                        from datetime import datetime as dt
-                                        import pytz
-                                        utc_time = dt.fromisoformat(market_start_time_utc.replace("Z", "+00:00"))
-                                        bucharest_tz = pytz.timezone("Europe/Bucharest")
-                                        local_time = utc_time.astimezone(bucharest_tz)
-                                        market_start_time = local_time.strftime("%Y-%m-%dT%H:%M")
-                                    except:
-                                        market_start_time = market_start_time_utc
-                                else:
-                                    market_start_time = ""
-
-                                if market_id:
-                                    # Get runner prices
-                                    prices = await user_betfair_client.list_market_book([market_id])
-                                    if prices and prices[0].get("runners"):
-                                        price_runners = prices[0].get("runners", [])
-                                        market_runners = market.get("runners", [])
-
-                                        # Găsim runner-ul echipei noastre (match EXACT)
-                                        team_selection_id = None
-                                        for mr in market_runners:
-                                            runner_name = mr.get("runnerName", "")
-                                            if team.name.lower() == runner_name.lower():
-                                                team_selection_id = mr.get("selectionId")
-                                                break
-
-                                        # Luăm cota pentru echipa noastră
-                                        if team_selection_id:
-                                            for pr in price_runners:
-                                                if pr.get("selectionId") == team_selection_id:
-                                                    back_prices = pr.get("ex", {}).get("availableToBack", [])
-                                                    if back_prices:
-                                                        odds = back_prices[0].get("price", "")
-                                                    break
-                                        else:
-                                            # Fallback: dacă nu găsim, luăm primul runner
-                                            if price_runners:
-                                                back_prices = price_runners[0].get("ex", {}).get("availableToBack", [])
-                                                if back_prices:
-                                                    odds = back_prices[0].get("price", "")
-                        except Exception as e:
-                            logger.warning(f"Could not get odds for {event_name}: {e}")
-
-                    matches.append({
-                        "start_time": market_start_time,
-                        "event_name": event_name,
-                        "competition": competition,
-                        "odds": str(odds) if odds else ""
-                    })
-
-                if matches:
-                    # Sortare meciuri cronologic după start_time
-                    matches_sorted = sorted(matches, key=lambda x: x.get("start_time", ""))
-
-                    # Save matches to user's spreadsheet
-                    for match in matches_sorted:
-                        google_sheets_multi_service.save_match_for_team(
-                            current_user.google_sheets_id,
-                            team.name,
-                            match
-                        )
+                    candidate_events = []
+                    for event in events[:20]:
+                        event_name = event.get("event", {}).get("name", "")
+
+                        # Skip reserve/youth teams
+                        if any(kw in event_name for kw in skip_keywords):
+                            logger.info(f"Skip echipă rezerve/tineret: {event_name}")
+                            continue
+
+                        # Verificare EXTRA: numele echipei trebuie să apară în numele meciului
+                        # Previne bug-ul unde "Real Madrid" găsește și "Real Sociedad"
+                        if team.name.lower() not in event_name.lower():
+                            logger.info(f"Skip {event_name} - {team.name} nu apare în numele meciului")
+                            continue
 
-                    logger.info(f"Saved {len(matches_sorted)} matches for {team.name} (sorted by date)")
+                        candidate_events.append(event)
 
-                    # Plasează pariu imediat pe primul meci (indiferent când e meciul)
-                    if matches_sorted and user_betfair_client and user_betfair_client.is_connected():
-                        first_match = matches_sorted[0]
-                        first_match_time = first_match.get("start_time", "")
-                        if first_match_time:
+                    markets_by_event = {}
+                    books_by_market = {}
+                    event_ids = [e.get("event", {}).get("id", "") for e in candidate_events]
+                    try:
+                        all_markets = await market_data_service.list_market_catalogue(
+                            event_ids=[eid for eid in event_ids if eid],
+                            market_type_codes=["MATCH_ODDS"]
+                        )
+                        for m in all_markets:
+                            markets_by_event.setdefault(m.get("event", {}).get("id", ""), []).append(m)
+
+                        market_ids = [m.get("marketId") for m in all_markets if m.get("marketId")]
+                        if market_ids:
+                            for book in await market_data_service.list_market_book(market_ids):
+                                books_by_market[book.get("marketId")] = book
+                    except Exception as e:
+                        logger.warning(f"Could not get markets for {team.name}: {e}")
+
+                    matches = []
+                    for event in candidate_events:
+                        event_data = event.get("event", {})
+                        event_id = event_data.get("id", "")
+                        event_name = event_data.get("name", "")
+                        competition = event.get("competitionName", "")
+
+                        # Get odds and start time from market catalogue
+                        odds = ""
+                        market_start_time = ""
+                        if event_id:
                             try:
-                                import pytz
-                                from datetime import datetime as dt
-                                bucharest_tz = pytz.timezone("Europe/Bucharest")
-                                now = dt.now(bucharest_tz)
-                                match_dt = dt.fromisoformat(first_match_time)
-                                if match_dt.tzinfo is None:
-                                    match_dt = bucharest_tz.localize(match_dt)
-
-                                # Plasează pariu dacă meciul nu a început încă (indiferent de dată)
-                                if match_dt > now:
-                                    logger.info(f"Echipă nouă {team.name} - plasare pariu imediat pe primul meci")
-                                    from app.services.user_bot_service import UserBotService
-                                    user_bot = UserBotService(current_user)
-                                    bet_result = await user_bot.place_bet_for_team(team.name, team.initial_stake)
-                                    if bet_result:
-                                        logger.info(f"Pariu plasat cu succes pentru {team.name}")
+                                markets = markets_by_event.get(event_id, [])
+                                if markets:
+                                    market = markets[0]
+                                    market_id = market.get("marketId", "")
+                                    market_start_time_utc = market.get("marketStartTime", "")
+
+                                    # Convert UTC to Europe/Bucharest
+                                    if market_start_time_utc:
+                                        try:
+                                            from datetime import datetime as dt
+                                            import pytz
+                                            utc_time = dt.fromisoformat(market_start_time_utc.replace("Z", "+00:00"))
+                                            bucharest_tz = pytz.timezone("Europe/Bucharest")
+                                            local_time = utc_time.astimezone(bucharest_tz)
+                                            market_start_time = local_time.strftime("%Y-%m-%dT%H:%M")
+                                        except:
+                                            market_start_time = market_start_time_utc
                                     else:
-                                        logger.warning(f"Nu s-a putut plasa pariul pentru {team.name}")
+                                        market_start_time = ""
+
+                                    if market_id:
+                                        # Get runner prices
+                                        prices = [books_by_market[market_id]] if market_id in books_by_market else []
+                                        if prices and prices[0].get("runners"):
+                                            price_runners = prices[0].get("runners", [])
+                                            market_runners = market.get("runners", [])
+
+                                            # Găsim runner-ul echipei noastre (match EXACT)
+                                            team_selection_id = None
+                                            for mr in market_runners:
+                                                runner_name = mr.get("runnerName", "")
+                                                if team.name.lower() == runner_name.lower():
+                                                    team_selection_id = mr.get("selectionId")
+                                                    break
+
+                                            # Luăm cota pentru echipa noastră
+                                            if team_selection_id:
+                                                for pr in price_runners:
+                                                    if pr.get("selectionId") == team_selection_id:
+                                                        back_prices = pr.get("ex", {}).get("availableToBack", [])
+                                                        if back_prices:
+                                                            odds = back_prices[0].get("price", "")
+                                                        break
+                                            else:
+                                                # Fallback: dacă nu găsim, luăm primul runner
+                                                if price_runners:
+                                                    back_prices = price_runners[0].get("ex", {}).get("availableToBack", [])
+                                                    if back_prices:
+                                                        odds = back_prices[0].get("price", "")
                             except Exception as e:
-                                logger.warning(f"Eroare la verificarea/plasarea pariului imediat: {e}")
-                else:
-                    logger.warning(f"No matches found for {team.name}")
+                                logger.warning(f"Could not get odds for {event_name}: {e}")
+
+                        matches.append({
+                            "start_time": market_start_time,
+                            "event_name": event_name,
+                            "competition": competition,
+                            "odds": str(odds) if odds else ""
+                        })
+
+                    if matches:
+                        # Sortare meciuri cronologic după start_time
+                        matches_sorted = sorted(matches, key=lambda x: x.get("start_time", ""))
+
+                        # Save matches to DATABASE (source of truth pentru bot)
+                        await job.report(50, f"Salvare {len(matches_sorted)} meciuri")
+                        from app.services.bets_repository import bets_repository
+                        await bets_repository.save_scheduled_matches_async(current_user.id, team, matches_sorted)
+                        setup['matches_saved'] = len(matches_sorted)
+
+                        # Mirror în spreadsheet-ul userului (vizualizare)
+                        for match in matches_sorted:
+                            await google_sheets_async_service.save_match_for_team(
+                                current_user.google_sheets_id,
+                                team.name,
+                                match
+                            )
 
-        except Exception as e:
-            logger.error(f"Error fetching matches for {team.name}: {e}")
-        finally:
-            # Cleanup user's Betfair client
-            if user_betfair_client and user_betfair_client.is_connected():
-                await user_betfair_client.disconnect()
+                        logger.info(f"Saved {len(matches_sorted)} matches for {team.name} (sorted by date)")
+
+                        # Plasează pariu imediat pe primul meci (indiferent când e meciul)
+                        if matches_sorted:
+                            first_match = matches_sorted[0]
+                            first_match_time = first_match.get("start_time", "")
+                            if first_match_time:
+                                try:
+                                    import pytz
+                                    from datetime import datetime as dt
+                                    bucharest_tz = pytz.timezone("Europe/Bucharest")
+                                    now = dt.now(bucharest_tz)
+                                    match_dt = dt.fromisoformat(first_match_time)
+                                    if match_dt.tzinfo is None:
+                                        match_dt = bucharest_tz.localize(match_dt)
+
+                                    # Plasează pariu dacă meciul nu a început încă (indiferent de dată)
+                                    if match_dt > now and job.expired():
+                                        logger.warning(f"Echipă nouă {team.name} - timeout job, pariul rămâne pentru rularea programată")
+                                    elif match_dt > now:
+                                        logger.info(f"Echipă nouă {team.name} - plasare pariu imediat pe primul meci")
+                                        await job.report(80, "Plasare pariu pe primul meci")
+                                        from app.services.user_bot_service import UserBotService
+                                        user_bot = UserBotService(current_user)
+                                        bet_result = await user_bot.place_bet_for_team(team.name, team.initial_stake)
+                                        setup['bet_placed'] = bool(bet_result)
+                                        if bet_result:
+                                            logger.info(f"Pariu plasat cu succes pentru {team.name}")
+                                        else:
+                                            logger.warning(f"Nu s-a putut plasa pariul pentru {team.name}")
+                                except Exception as e:
+                                    logger.warning(f"Eroare la verificarea/plasarea pariului imediat: {e}")
+                    else:
+                        logger.warning(f"No matches found for {team.name}")
+
+            except Exception as e:
+                logger.error(f"Error fetching matches for {team.name}: {e}")
+                raise
+
+            return setup
+
+        job = await job_queue.submit(current_user, "team_setup", setup_team, dedupe_key=team.id)
+        response.headers["X-Job-Id"] = job.id
 
     return team
 
@@ -605,7 +644,7 @@ async def delete_team(
 
     # Delete from Google Sheets
     if current_user.google_sheets_id:
-        google_sheets_multi_service.delete_team_from_index(
+        await google_sheets_async_service.delete_team_from_index(
             current_user.google_sheets_id,
             team_id,
             team.name
@@ -675,7 +714,7 @@ async def reset_team_progression(
 
     # Update în Google Sheets
     if current_user.google_sheets_id:
-        google_sheets_multi_service.update_team_progression(
+        await google_sheets_async_service.update_team_progression(
             current_user.google_sheets_id,
             team.name,
             cumulative_loss=0.0,
@@ -746,7 +785,7 @@ async def update_team_initial_stake(
             'name': team.name,
             'initial_stake': initial_stake
         }
-        google_sheets_multi_service.update_team_in_index(
+        await google_sheets_async_service.update_team_in_index(
             current_user.google_sheets_id,
             team.id,
             team_data
@@ -895,13 +934,10 @@ async def get_betfair_status(
     current_user: User = Depends(get_current_user_jwt)
 ):
     """Returnează statusul conexiunii Betfair pentru user-ul curent."""
-    from sqlalchemy import text, create_engine
-    from app.config import get_settings
-
-    settings = get_settings()
-    engine = create_engine(settings.database_url)
+    from sqlalchemy import text
+    from app.database import get_engine
 
-    with engine.connect() as conn:
+    with get_engine().connect() as conn:
         result = conn.execute(text("""
             SELECT is_configured FROM betfair_credentials WHERE user_id = :user_id
         """), {"user_id": current_user.id})
@@ -962,7 +998,7 @@ async def test_google_sheets_connection(
         )
 
     try:
-        spreadsheet = google_sheets_multi_service.get_spreadsheet(current_user.google_sheets_id)
+        spreadsheet = await google_sheets_async_service.get_spreadsheet(current_user.google_sheets_id)
         if spreadsheet:
             return ApiResponse(success=True, message="Conectat la Google Sheets")
         else:
@@ -3,11 +3,12 @@ import json
 import logging
 from typing import Set, Dict, Optional
 from fastapi import WebSocket, WebSocketDisconnect
+from sqlalchemy import select
 from datetime import datetime
 
 from app.services.bot_engine import bot_engine
 from app.services.auth_service import auth_service
-from app.database import SessionLocal
+from app.database import get_async_session
 from app.models.user import User
 from app.models.schemas import BotState, BotStatus, DashboardStats
 
@@ -62,6 +63,20 @@ class ConnectionManager:
         for conn in disconnected:
             self.active_connections.discard(conn)
 
+    async def send_to_user(self, user_id: str, message: dict):
+        """Trimite un mesaj către toate conexiunile unui user."""
+        connections = self.user_connections.get(user_id)
+        if not connections:
+            return
+
+        message_json = json.dumps(message, default=str)
+        for connection in list(connections):
+            try:
+                await connection.send_text(message_json)
+            except Exception as e:
+                logger.warning(f"Eroare trimitere mesaj către user {user_id}: {e}")
+                self.disconnect(connection, user_id)
+
     async def send_personal(self, websocket: WebSocket, message: dict):
         """Trimite un mesaj către un client specific."""
         try:
@@ -73,7 +88,7 @@ class ConnectionManager:
 manager = ConnectionManager()
 
 
-def get_user_from_token(token: str) -> Optional[User]:
+async def get_user_from_token(token: str) -> Optional[User]:
     """Validează token-ul și returnează user-ul."""
     try:
         payload = auth_service.decode_access_token(token)
@@ -84,33 +99,25 @@ def get_user_from_token(token: str) -> Optional[User]:
         if not user_id:
             return None
 
-        db = SessionLocal()
-        try:
-            user = db.query(User).filter(User.id == user_id).first()
-            return user
-        finally:
-            db.close()
+        async with get_async_session() as db:
+            result = await db.execute(select(User).where(User.id == user_id))
+            return result.scalars().first()
     except Exception as e:
         logger.error(f"Error validating token: {e}")
         return None
 
 
-def get_user_stats(user: User) -> dict:
+async def get_user_stats(user: User) -> dict:
     """Obține statisticile pentru un user specific."""
-    from app.services.google_sheets_multi import google_sheets_multi_service
     from app.services.teams_repository import teams_repository
+    from app.services.user_stats_repository import user_stats_repository
 
     # Get teams count
-    teams = teams_repository.get_user_teams(user.id, active_only=False)
+    teams = await teams_repository.get_user_teams_async(user.id, active_only=False)
     active_teams = [t for t in teams if t.status.value == 'active']
 
-    # Get betting stats from Google Sheets
-    betting_stats = {'total_bets': 0, 'won_bets': 0, 'lost_bets': 0, 'pending_bets': 0, 'total_profit': 0.0, 'total_staked': 0.0}
-    if user.google_sheets_id:
-        try:
-            betting_stats = google_sheets_multi_service.get_betting_stats(user.google_sheets_id)
-        except Exception as e:
-            logger.warning(f"Could not get betting stats for {user.email}: {e}")
+    # Get betting stats (materializate în database, un singur rând)
+    betting_stats = await user_stats_repository.get_user_stats_async(user.id)
 
     # Calculate win rate
     total_settled = betting_stats['won_bets'] + betting_stats['lost_bets']
@@ -137,7 +144,7 @@ async def websocket_endpoint(websocket: WebSocket):
     user_id = None
 
     if token:
-        user = get_user_from_token(token)
+        user = await get_user_from_token(token)
         if user:
             user_id = user.id
 
@@ -155,7 +162,7 @@ async def websocket_endpoint(websocket: WebSocket):
         )
 
         if user:
-            stats = get_user_stats(user)
+            stats = await get_user_stats(user)
         else:
             # Fallback for unauthenticated connections
             stats = bot_engine.get_dashboard_stats().model_dump()
@@ -218,7 +225,7 @@ async def handle_websocket_message(websocket: WebSocket, message: dict, user: Op
 
     elif msg_type == "get_stats":
         if user:
-            stats = get_user_stats(user)
+            stats = await get_user_stats(user)
         else:
             stats = bot_engine.get_dashboard_stats().model_dump()
         await manager.send_personal(websocket, {
@@ -229,7 +236,7 @@ async def handle_websocket_message(websocket: WebSocket, message: dict, user: Op
 
     elif msg_type == "get_teams":
         if user:
-            teams = teams_repository.get_user_teams(user.id, active_only=False)
+            teams = await teams_repository.get_user_teams_async(user.id, active_only=False)
             await manager.send_personal(websocket, {
                 "type": "teams",
                 "data": [t.model_dump() for t in teams],
@@ -311,3 +318,12 @@ async def broadcast_notification(message: str, level: str = "info"):
         },
         "timestamp": datetime.utcnow().isoformat()
     })
+
+
+async def send_job_update(user_id: str, job: dict):
+    """Trimite starea unui job (progres / rezultat) către userul care l-a pornit."""
+    await manager.send_to_user(user_id, {
+        "type": "job_update",
+        "data": job,
+        "timestamp": datetime.utcnow().isoformat()
+    })
@@ -11,6 +11,15 @@ class Settings(BaseSettings):
         description="PostgreSQL Database URL"
     )
 
+    # Database connection pools (one shared engine per role)
+    db_api_pool_size: int = Field(default=10, ge=1, description="Persistent connections for the API engine (HTTP / WebSocket)")
+    db_api_max_overflow: int = Field(default=20, ge=0, description="Extra connections the API engine may open under load")
+    db_scheduler_pool_size: int = Field(default=5, ge=1, description="Persistent connections for the scheduler engine (bot runs, results checks, Sheets queue)")
+    db_scheduler_max_overflow: int = Field(default=5, ge=0, description="Extra connections the scheduler engine may open under load")
+    db_pool_timeout_seconds: float = Field(default=30.0, gt=0, description="Max wait for a free pooled connection (seconds)")
+    db_pool_recycle_seconds: int = Field(default=1800, ge=-1, description="Reconnect pooled connections older than this (seconds, -1 = never)")
+    db_echo: bool = Field(default=False, description="Log every SQL statement (all engines)")
+
     # Redis
     redis_url: str = Field(
         default="redis://localhost:6379/0",
@@ -43,12 +52,53 @@ class Settings(BaseSettings):
     betfair_cert_path: str = Field(default="./certs/betfair.crt", description="Path to Betfair SSL Certificate")
     betfair_key_path: str = Field(default="./certs/betfair.key", description="Path to Betfair SSL Key")
 
+    # Betfair HTTP transport (shared connection pool)
+    betfair_http2: bool = Field(default=True, description="Use HTTP/2 for Betfair API requests")
+    betfair_http_max_connections: int = Field(default=50, ge=1, description="Max open connections per Betfair HTTP client")
+    betfair_http_max_keepalive: int = Field(default=20, ge=0, description="Max idle keep-alive connections per Betfair HTTP client")
+    betfair_http_keepalive_expiry: float = Field(default=60.0, gt=0, description="Idle keep-alive connection expiry (seconds)")
+    betfair_batch_window_ms: int = Field(default=10, ge=0, description="Window for coalescing listMarketCatalogue/listMarketBook IDs (milliseconds)")
+
+    # Betfair session store (per-user cached logins)
+    betfair_session_keepalive_minutes: int = Field(default=60, ge=1, description="Send keepAlive for sessions older than this (minutes)")
+    betfair_session_idle_hours: int = Field(default=24, ge=1, description="Drop sessions unused for this many hours")
+
+    # Betfair Exchange Stream API (order stream per active session)
+    betfair_stream_enabled: bool = Field(default=True, description="Subscribe to the order stream for real-time settlement")
+    betfair_stream_host: str = Field(default="stream-api.betfair.com", description="Exchange Stream API host")
+    betfair_stream_port: int = Field(default=443, description="Exchange Stream API port")
+    betfair_stream_ssl: bool = Field(default=True, description="Use TLS for the stream connection (disable only for a local fake server)")
+    betfair_stream_heartbeat_ms: int = Field(default=5000, ge=500, le=5000, description="Stream heartbeat interval (milliseconds)")
+    betfair_market_stream_enabled: bool = Field(default=True, description="Stream MATCH_ODDS prices for tracked teams into a local cache")
+    betfair_market_stream_max_markets: int = Field(default=200, ge=1, description="Max markets per market stream subscription (account limit)")
+    betfair_market_stream_ladder_levels: int = Field(default=3, ge=1, le=10, description="Best-offer ladder depth kept in the price cache")
+
+    # Event catalogue (global football snapshot)
+    event_catalogue_refresh_minutes: int = Field(default=15, ge=1, description="Refresh interval for the football event catalogue (minutes)")
+
+    # Market data plane (shared master-key client)
+    market_data_price_ttl_seconds: float = Field(default=5.0, ge=0, description="How long listMarketBook prices are served from cache (seconds)")
+
+    # Settlement checks (listClearedOrders watermark)
+    settlement_lookback_days: int = Field(default=3, ge=1, description="Max window for listClearedOrders when there is no checkpoint (days)")
+    settlement_overlap_minutes: int = Field(default=10, ge=0, description="Re-read this many minutes before the checkpoint to catch late settlements")
+    results_settle_delay_minutes: int = Field(default=120, ge=0, description="Results check wakes a user only once a PENDING bet is this long past kickoff (minutes)")
+
     # Google Sheets
     google_sheets_credentials_path: str = Field(
         default="./credentials/google_service_account.json",
         description="Path to Google Service Account JSON"
     )
     google_sheets_spreadsheet_id: str = Field(default="", description="Google Sheets Spreadsheet ID (legacy)")
+    sheets_max_workers: int = Field(default=8, ge=1, description="Threads running gspread calls for the async paths")
+    sheets_call_timeout_seconds: float = Field(default=30.0, ge=0, description="Max wait for one Google Sheets call (seconds, 0 = no limit)")
+    sheets_write_flush_seconds: float = Field(default=2.0, gt=0, description="Interval between write-behind flushes to Google Sheets (seconds)")
+    sheets_write_max_attempts: int = Field(default=10, ge=1, description="Flush attempts for 429/5xx errors before the queued writes are marked failed")
+    sheets_read_quota_per_minute: int = Field(default=60, ge=1, description="Google Sheets read requests per minute for the shared service account")
+    sheets_write_quota_per_minute: int = Field(default=60, ge=1, description="Google Sheets write requests per minute for the shared service account")
+    sheets_quota_burst: int = Field(default=10, ge=1, description="Requests that may be sent back-to-back before the per-minute rate applies")
+    sheets_max_retries: int = Field(default=5, ge=0, description="Retries for Google Sheets 429/5xx responses (exponential backoff with jitter)")
+    sheets_cache_max_entries: int = Field(default=500, ge=1, description="Max entries in the Google Sheets read cache (LRU; snapshots, sheet titles)")
 
     # Bot Configuration
     bot_timezone: str = Field(default="Europe/Bucharest", description="Timezone for bot execution")
@@ -56,10 +106,23 @@ class Settings(BaseSettings):
     bot_run_minute: int = Field(default=0, ge=0, le=59, description="Minute to run bot (0-59)")
     bot_initial_stake: float = Field(default=10.0, gt=0, description="Initial stake in RON")
     bot_max_progression_steps: int = Field(default=7, ge=1, le=20, description="Maximum progression steps before stop loss")
+    bot_team_concurrency: int = Field(default=5, ge=1, description="Teams of one user processed concurrently in a bot run")
+
+    # Multi-user scheduler (work queue)
+    scheduler_max_concurrent_users: int = Field(default=5, ge=1, description="Users processed concurrently by the scheduler")
+    scheduler_user_timeout_seconds: float = Field(default=300.0, gt=0, description="Time budget of one user's bot run; no new team is started after it (seconds)")
+    scheduler_results_timeout_seconds: float = Field(default=120.0, gt=0, description="Max duration of one user's results check (seconds)")
+    scheduler_work_plan_max_age_seconds: float = Field(default=300.0, ge=0, description="Preloaded credentials / teams older than this are re-read from the database (seconds)")
+
+    # Background jobs (manual bot run, new team setup)
+    job_queue_workers: int = Field(default=4, ge=1, description="Background jobs run concurrently")
+    job_timeout_seconds: float = Field(default=600.0, gt=0, description="Time budget of one background job; no new step (team, bet) is started after it (seconds)")
+    job_shutdown_grace_seconds: float = Field(default=30.0, ge=0, description="On shutdown, how long running jobs may finish before they are cancelled (seconds)")
 
     # Server
     api_host: str = Field(default="127.0.0.1", description="API Host")
     api_port: int = Field(default=8000, description="API Port")
+    metrics_token: str = Field(default="", description="Token required in the X-Metrics-Token header for /api/metrics (empty = endpoint disabled)")
     cors_origins: str = Field(
         default="http://localhost:5173,http://127.0.0.1:5173",
         description="Comma-separated list of allowed CORS origins"
@@ -1,9 +1,23 @@
 """
 Database configuration and session management
+Un singur engine (pool de conexiuni) per rol, partajat de tot procesul:
+- "api": request-urile HTTP / WebSocket și repository-urile folosite de ele
+- "scheduler": job-urile APScheduler (bot run, results check, coada Sheets)
+Dimensiunea pool-ului e configurabilă per rol (db_<rol>_pool_size / max_overflow).
+Codul care rulează pe event loop folosește varianta async (asyncpg) a aceluiași rol:
+get_async_engine / get_async_session.
 """
+import threading
+import time
+from typing import Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.config import get_settings
 
 # Get settings instance
@@ -12,14 +26,162 @@ settings = get_settings()
 # Database URL from settings
 DATABASE_URL = settings.database_url
 
+# Roluri de engine
+ROLE_API = "api"
+ROLE_SCHEDULER = "scheduler"
+
+
+class _PoolMetrics:
+    """Mixin pentru pool: măsoară cât așteaptă fiecare checkout (și câte expiră în pool_timeout)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0
+        }
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            with self._metrics_lock:
+                self._metrics['timeouts'] += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._metrics_lock:
+                self._metrics['checkouts'] += 1
+                self._metrics['wait_total'] += waited
+                self._metrics['wait_max'] = max(self._metrics['wait_max'], waited)
+
+    def get_stats(self) -> dict:
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+        checkouts = metrics['checkouts']
+        return {
+            'pool_size': self.size(),
+            'checked_out': self.checkedout(),
+            'checked_in': self.checkedin(),
+            'overflow': max(self.overflow(), 0),
+            'max_overflow': self._max_overflow,
+            'checkouts': checkouts,
+            'timeouts': metrics['timeouts'],
+            'wait_avg_ms': round(metrics['wait_total'] / checkouts * 1000, 2) if checkouts else 0.0,
+            'wait_max_ms': round(metrics['wait_max'] * 1000, 2)
+        }
+
+
+class MeteredQueuePool(_PoolMetrics, QueuePool):
+    """QueuePool (engine-urile sync) cu metrici de checkout."""
+
+
+class MeteredAsyncQueuePool(_PoolMetrics, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool (engine-urile asyncpg) cu metrici de checkout."""
+
+
+_engines: Dict[str, Engine] = {}
+_async_engines: Dict[str, AsyncEngine] = {}
+_async_sessions: Dict[str, async_sessionmaker] = {}
+_engines_lock = threading.Lock()
+
+
+def _pool_settings(role: str) -> dict:
+    if role == ROLE_API:
+        return {"pool_size": settings.db_api_pool_size, "max_overflow": settings.db_api_max_overflow}
+    if role == ROLE_SCHEDULER:
+        return {"pool_size": settings.db_scheduler_pool_size, "max_overflow": settings.db_scheduler_max_overflow}
+    raise ValueError(f"Rol de engine necunoscut: {role}")
+
+
+def get_engine(role: str = ROLE_API) -> Engine:
+    """Engine-ul partajat pentru rol (creat la primul apel)."""
+    engine = _engines.get(role)
+    if engine is not None:
+        return engine
+
+    with _engines_lock:
+        engine = _engines.get(role)
+        if engine is None:
+            engine = create_engine(
+                DATABASE_URL,
+                poolclass=MeteredQueuePool,
+                pool_pre_ping=True,
+                pool_timeout=settings.db_pool_timeout_seconds,
+                pool_recycle=settings.db_pool_recycle_seconds,
+                echo=settings.db_echo,
+                **_pool_settings(role)
+            )
+            _engines[role] = engine
+        return engine
+
+
+def _async_url(url: str):
+    """postgresql:// sau postgresql+psycopg2:// -> postgresql+asyncpg://"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql":
+        return parsed.set(drivername="postgresql+asyncpg")
+    return parsed
+
+
+def get_async_engine(role: str = ROLE_API) -> AsyncEngine:
+    """
+    Engine-ul async (asyncpg) partajat pentru rol, creat la primul apel.
+    Conexiunile asyncpg aparțin event loop-ului aplicației - se folosește doar din acesta.
+    """
+    engine = _async_engines.get(role)
+    if engine is not None:
+        return engine
+
+    with _engines_lock:
+        engine = _async_engines.get(role)
+        if engine is None:
+            engine = create_async_engine(
+                _async_url(DATABASE_URL),
+                poolclass=MeteredAsyncQueuePool,
+                pool_pre_ping=True,
+                pool_timeout=settings.db_pool_timeout_seconds,
+                pool_recycle=settings.db_pool_recycle_seconds,
+                echo=settings.db_echo,
+                **_pool_settings(role)
+            )
+            _async_engines[role] = engine
+            _async_sessions[role] = async_sessionmaker(engine, expire_on_commit=False)
+        return engine
+
+
+def get_async_session(role: str = ROLE_API) -> AsyncSession:
+    """Sesiune ORM async pe engine-ul rolului (se folosește cu async with)."""
+    get_async_engine(role)
+    return _async_sessions[role]()
+
+
+def get_pool_stats() -> dict:
+    """Metricile pool-urilor create: rol (sufixul _async pentru asyncpg) -> checked_out, overflow, timp de așteptare..."""
+    pools = list(_engines.items()) + [(f"{role}_async", engine.sync_engine) for role, engine in list(_async_engines.items())]
+    return {
+        role: engine.pool.get_stats() if isinstance(engine.pool, _PoolMetrics) else {}
+        for role, engine in pools
+    }
+
+
+async def dispose_engines() -> None:
+    """Închide conexiunile tuturor pool-urilor, sync și async (la shutdown)."""
+    with _engines_lock:
+        engines = list(_engines.values())
+        async_engines = list(_async_engines.values())
+    for engine in engines:
+        engine.dispose()
+    for async_engine in async_engines:
+        await async_engine.dispose()
+
+
 # Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
-    echo=settings.debug if hasattr(settings, 'debug') else False
-)
+engine = get_engine(ROLE_API)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -1,11 +1,13 @@
 """
 FastAPI dependencies for authentication and database
 """
+import hmac
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
+from app.config import get_settings
 from app.database import get_db
 from app.models.user import User
 from app.services.auth_service import auth_service
@@ -117,6 +119,30 @@ async def get_current_active_user(
     return current_user
 
 
+async def require_metrics_token(
+    x_metrics_token: Optional[str] = Header(default=None)
+) -> None:
+    """
+    Dependency for the internal metrics endpoint (operators only, not app users)
+
+    Args:
+        x_metrics_token: Value of the X-Metrics-Token header
+
+    Raises:
+        HTTPException: 404 if no metrics_token is configured (endpoint disabled),
+            403 if the header is missing or does not match
+    """
+    expected = get_settings().metrics_token
+    if not expected:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    if not x_metrics_token or not hmac.compare_digest(x_metrics_token, expected):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid metrics token"
+        )
+
+
 async def get_optional_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
     db: Session = Depends(get_db)
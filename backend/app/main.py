@@ -15,10 +15,10 @@ from fastapi.responses import FileResponse
 from app.api.routes import router as api_router
 from app.api.auth import router as auth_router
 from app.api.betfair_setup import router as betfair_router
-from app.api.websocket import websocket_endpoint, broadcast_bot_state, broadcast_notification
+from app.api.websocket import websocket_endpoint, broadcast_bot_state, broadcast_notification, send_job_update
 from app.config import get_settings
 from app.services.trial_service import trial_service
-from app.database import SessionLocal
+from app.database import SessionLocal, dispose_engines
 
 logging.basicConfig(
     level=logging.INFO,
@@ -91,6 +91,28 @@ async def scheduled_results_check():
     logger.info(f"Rezultat verificare: {result}")
 
 
+async def scheduled_market_stream_sync():
+    """Actualizează subscripția market stream cu piețele echipelor active."""
+    from app.services.market_data import market_data_service
+
+    try:
+        await market_data_service.sync_market_stream()
+    except Exception as e:
+        logger.error(f"Eroare la sincronizarea market stream: {e}")
+
+
+async def scheduled_betfair_keepalive():
+    """Menține active sesiunile Betfair cache-uite și le elimină pe cele nefolosite."""
+    from app.services.betfair_session_store import betfair_session_store
+    from app.services.market_data import market_data_service
+
+    try:
+        await betfair_session_store.refresh_sessions()
+        await market_data_service.keep_alive()
+    except Exception as e:
+        logger.error(f"Eroare keep-alive sesiuni Betfair: {e}")
+
+
 async def scheduled_trial_check():
     """Verifică și suspendă subscription-urile expirate (TOATE planurile)."""
     logger.info("Verificare subscription-uri expirate")
@@ -109,6 +131,26 @@ async def scheduled_trial_check():
         db.close()
 
 
+async def scheduled_user_stats_rebuild():
+    """Recalculează statisticile materializate din tabela bets (corectează orice diferență)."""
+    from app.services.user_stats_repository import user_stats_repository
+
+    try:
+        await user_stats_repository.rebuild_async()
+    except Exception as e:
+        logger.error(f"Eroare la recalcularea statisticilor: {e}")
+
+
+async def scheduled_fixture_resolutions_purge():
+    """Șterge rezolvările meciurilor trecute (fixture_resolutions)."""
+    from app.services.fixture_resolutions import fixture_resolutions
+
+    try:
+        await fixture_resolutions.purge()
+    except Exception as e:
+        logger.error(f"Eroare la curățarea fixture_resolutions: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle manager pentru aplicație."""
@@ -141,6 +183,25 @@ async def lifespan(app: FastAPI):
         replace_existing=True
     )
 
+    # Job pentru keep-alive sesiuni Betfair - rulează la fiecare 15 minute
+    scheduler.add_job(
+        scheduled_betfair_keepalive,
+        trigger=IntervalTrigger(minutes=15),
+        id="betfair_keepalive_job",
+        name="Keep-alive sesiuni Betfair",
+        replace_existing=True
+    )
+
+    # Job pentru subscripția market stream (prețuri live pentru echipele urmărite)
+    scheduler.add_job(
+        scheduled_market_stream_sync,
+        trigger=IntervalTrigger(minutes=settings.event_catalogue_refresh_minutes),
+        id="market_stream_sync_job",
+        name="Sincronizare market stream",
+        next_run_time=datetime.now(timezone),
+        replace_existing=True
+    )
+
     # Job pentru verificare subscription-uri expirate - rulează zilnic la 00:00
     scheduler.add_job(
         scheduled_trial_check,
@@ -150,6 +211,39 @@ async def lifespan(app: FastAPI):
         replace_existing=True
     )
 
+    # Job pentru recalcularea statisticilor dashboard-ului - rulează zilnic la 03:00
+    scheduler.add_job(
+        scheduled_user_stats_rebuild,
+        trigger=CronTrigger(hour=3, minute=0, timezone=timezone),
+        id="user_stats_rebuild_job",
+        name="Recalculare statistici useri",
+        replace_existing=True
+    )
+
+    # Job pentru curățarea rezolvărilor de meciuri trecute - rulează zilnic la 03:30
+    scheduler.add_job(
+        scheduled_fixture_resolutions_purge,
+        trigger=CronTrigger(hour=3, minute=30, timezone=timezone),
+        id="fixture_resolutions_purge_job",
+        name="Curățare rezolvări meciuri",
+        replace_existing=True
+    )
+
+    # Order stream: rezultatele pariurilor se procesează imediat ce piața se închide
+    # (verificarea la 30 de minute rămâne pentru ce ratează stream-ul)
+    from app.services.betfair_stream import order_stream_manager
+    from app.services.user_bot_service import handle_stream_settlement
+    order_stream_manager.set_settlement_handler(handle_stream_settlement)
+
+    # Scrierile Google Sheets ale bot-ului (write-behind, inclusiv cele rămase din rularea anterioară)
+    from app.services.sheets_write_queue import sheets_write_queue
+    sheets_write_queue.start()
+
+    # Joburile pornite din API (run-now, echipă nouă), cu progres pe WebSocket
+    from app.services.job_queue import job_queue
+    job_queue.set_notifier(send_job_update)
+    job_queue.start()
+
     scheduler.start()
     logger.info(
         f"Scheduler pornit - Bot programat la {settings.bot_run_hour:02d}:{settings.bot_run_minute:02d} "
@@ -164,6 +258,19 @@ async def lifespan(app: FastAPI):
     scheduler.shutdown()
     logger.info("Scheduler oprit")
 
+    from app.services.betfair_session_store import betfair_session_store
+    from app.services.betfair_transport import betfair_transport
+    from app.services.market_data import market_data_service
+    from app.services.google_sheets_async import google_sheets_async_service
+    await job_queue.stop()
+    await order_stream_manager.stop_all()
+    await betfair_session_store.close_all()
+    await market_data_service.close()
+    await betfair_transport.aclose()
+    await sheets_write_queue.stop()
+    google_sheets_async_service.shutdown()
+    await dispose_engines()
+
 
 app = FastAPI(
     title="Betix SaaS API",
@@ -0,0 +1,169 @@
+"""
+Betfair Batcher - Gruparea request-urilor listMarketCatalogue / listMarketBook
+ID-urile cerute de apelanți concurenți într-o fereastră scurtă sunt adunate,
+deduplicate și împărțite în request-uri care respectă limita de "data weight"
+Betfair (200 puncte per request), apoi rezultatele sunt distribuite înapoi
+fiecărui apelant.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Limita Betfair: suma (weight * număr piețe) per request
+MAX_REQUEST_WEIGHT = 200
+
+# Weight per piață pentru marketProjection (listMarketCatalogue)
+MARKET_PROJECTION_WEIGHTS: Dict[str, int] = {
+    "COMPETITION": 0,
+    "EVENT": 0,
+    "EVENT_TYPE": 0,
+    "MARKET_START_TIME": 0,
+    "RUNNER_DESCRIPTION": 0,
+    "MARKET_DESCRIPTION": 1,
+    "RUNNER_METADATA": 1,
+}
+
+# Weight per piață pentru priceData (listMarketBook); fără priceData weight-ul e 2
+PRICE_PROJECTION_WEIGHTS: Dict[str, int] = {
+    "SP_AVAILABLE": 3,
+    "SP_TRADED": 7,
+    "EX_BEST_OFFERS": 5,
+    "EX_ALL_OFFERS": 17,
+    "EX_TRADED": 17,
+}
+NO_PRICE_DATA_WEIGHT = 2
+
+# listMarketCatalogue acceptă maxim 1000 rezultate per request
+CATALOGUE_MAX_RESULTS = 1000
+
+
+def catalogue_markets_per_request(market_projection: List[str]) -> int:
+    """Numărul maxim de piețe per request listMarketCatalogue pentru proiecția dată."""
+    weight = sum(MARKET_PROJECTION_WEIGHTS.get(p, 1) for p in market_projection)
+    if weight == 0:
+        return CATALOGUE_MAX_RESULTS
+    return max(min(MAX_REQUEST_WEIGHT // weight, CATALOGUE_MAX_RESULTS), 1)
+
+
+def book_markets_per_request(price_data: List[str]) -> int:
+    """
+    Numărul maxim de piețe per request listMarketBook pentru priceData dat.
+
+    Combinațiile sunt tratate ca sumă (Betfair documentează valori egale sau mai mici),
+    deci împărțirea rămâne sub limită.
+    """
+    weight = sum(PRICE_PROJECTION_WEIGHTS.get(p, 17) for p in price_data) or NO_PRICE_DATA_WEIGHT
+    return max(MAX_REQUEST_WEIGHT // weight, 1)
+
+
+class RequestBatcher:
+    """
+    Colectează ID-uri de la apelanți concurenți și le trimite în request-uri grupate.
+
+    - group: cheia parametrilor comuni (ex: tipurile de piețe) - ID-urile din
+      grupuri diferite nu se amestecă
+    - fetch(group, ids): execută un request pentru un chunk de ID-uri
+    - result_id(item): ID-ul căruia îi aparține un rezultat (eventId / marketId)
+    - chunk_size(group): câte ID-uri încap într-un request
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[Hashable, List[str]], Awaitable[List[Dict[str, Any]]]],
+        result_id: Callable[[Dict[str, Any]], str],
+        chunk_size: Callable[[Hashable], int],
+        window_seconds: float
+    ):
+        self.name = name
+        self._fetch = fetch
+        self._result_id = result_id
+        self._chunk_size = chunk_size
+        self._window = window_seconds
+        # group -> (ID-uri în ordinea cererii, apelanți în așteptare)
+        self._pending: Dict[Hashable, Tuple[Dict[str, None], List[asyncio.Future]]] = {}
+        self._flush_tasks: Dict[Hashable, asyncio.Task] = {}
+        self._stats = {
+            'calls': 0,
+            'ids_requested': 0,
+            'ids_sent': 0,
+            'requests_sent': 0,
+            'failed_requests': 0
+        }
+
+    async def request(self, group: Hashable, ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Cere rezultatele pentru ID-uri; request-ul real se face la finalul ferestrei.
+
+        Returns:
+            Rezultatele care aparțin ID-urilor cerute, în ordinea ID-urilor
+        """
+        ids = [i for i in ids if i]
+        if not ids:
+            return []
+
+        self._stats['calls'] += 1
+        self._stats['ids_requested'] += len(ids)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending_ids, waiters = self._pending.setdefault(group, ({}, []))
+        for i in ids:
+            pending_ids.setdefault(i, None)
+        waiters.append(future)
+
+        if group not in self._flush_tasks:
+            self._flush_tasks[group] = asyncio.create_task(self._flush_later(group))
+
+        by_id: Dict[str, List[Dict[str, Any]]] = await future
+        results: List[Dict[str, Any]] = []
+        for i in dict.fromkeys(ids):
+            results.extend(by_id.get(i, []))
+        return results
+
+    async def _flush_later(self, group: Hashable) -> None:
+        """Așteaptă fereastra de colectare, apoi trimite request-urile grupului."""
+        await asyncio.sleep(self._window)
+        self._flush_tasks.pop(group, None)
+        pending_ids, waiters = self._pending.pop(group, ({}, []))
+
+        by_id: Dict[str, List[Dict[str, Any]]] = {}
+        try:
+            ids = list(pending_ids)
+            size = self._chunk_size(group)
+            chunks = [ids[i:i + size] for i in range(0, len(ids), size)]
+            responses = await asyncio.gather(
+                *(self._fetch(group, chunk) for chunk in chunks),
+                return_exceptions=True
+            )
+
+            self._stats['ids_sent'] += len(ids)
+            self._stats['requests_sent'] += len(chunks)
+            for response in responses:
+                if isinstance(response, Exception):
+                    self._stats['failed_requests'] += 1
+                    logger.error(f"Eroare batch {self.name}: {response}")
+                    continue
+                for item in response:
+                    by_id.setdefault(self._result_id(item), []).append(item)
+
+            if len(waiters) > 1 or len(chunks) > 1:
+                logger.debug(
+                    f"Batch {self.name}: {len(waiters)} apelanți, {len(ids)} ID-uri -> {len(chunks)} request-uri"
+                )
+        finally:
+            for future in waiters:
+                if not future.done():
+                    future.set_result(by_id)
+
+    def get_stats(self) -> dict:
+        """Returnează metricile batcher-ului."""
+        return {
+            **self._stats,
+            'pending_groups': len(self._pending),
+            'ids_deduplicated': self._stats['ids_requested'] - self._stats['ids_sent'] - sum(
+                len(pending_ids) for pending_ids, _ in self._pending.values()
+            )
+        }
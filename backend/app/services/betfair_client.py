@@ -1,5 +1,4 @@
 import logging
-import httpx
 import os
 import base64
 import tempfile
@@ -7,8 +6,17 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 
 from app.models.schemas import Match, PlaceOrderResponse
+from app.services.betfair_transport import betfair_transport
+from app.services.betfair_stream import market_price_cache
+from app.services.betfair_batcher import (
+    RequestBatcher,
+    book_markets_per_request,
+    catalogue_markets_per_request
+)
+from app.config import get_settings
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 class BetfairClient:
@@ -31,6 +39,16 @@ class BetfairClient:
     FOOTBALL_EVENT_TYPE_ID = "1"
     BASKETBALL_EVENT_TYPE_ID = "7522"
 
+    # Proiecțiile folosite de list_market_catalogue / list_market_book (determină weight-ul)
+    CATALOGUE_PROJECTION = [
+        "COMPETITION",
+        "EVENT",
+        "EVENT_TYPE",
+        "RUNNER_DESCRIPTION",
+        "MARKET_START_TIME"
+    ]
+    BOOK_PRICE_DATA = ["EX_BEST_OFFERS"]
+
     def __init__(self):
         self._app_key: Optional[str] = None
         self._session_token: Optional[str] = None
@@ -41,7 +59,23 @@ class BetfairClient:
         self._temp_cert_file: Optional[str] = None
         self._temp_key_file: Optional[str] = None
         self._connected = False
-        self._http_client: Optional[httpx.AsyncClient] = None
+
+        # ID-urile cerute concurent sunt grupate în request-uri sub limita de weight
+        window = settings.betfair_batch_window_ms / 1000
+        self._catalogue_batcher = RequestBatcher(
+            "listMarketCatalogue",
+            fetch=self._fetch_market_catalogue,
+            result_id=lambda market: market.get("event", {}).get("id", ""),
+            chunk_size=self._catalogue_events_per_request,
+            window_seconds=window
+        )
+        self._book_batcher = RequestBatcher(
+            "listMarketBook",
+            fetch=lambda _group, market_ids: self._fetch_market_book(market_ids),
+            result_id=lambda book: book.get("marketId", ""),
+            chunk_size=lambda _group: book_markets_per_request(self.BOOK_PRICE_DATA),
+            window_seconds=window
+        )
 
     def configure(
         self,
@@ -139,49 +173,50 @@ class BetfairClient:
                 cert = None
                 logger.info(f"Using standard authentication (no certificate) for {self._username}")
 
-            async with httpx.AsyncClient(cert=cert, timeout=30.0) as client:
-                # Prepare headers
-                headers = {
-                    "X-Application": self._app_key,
-                    "Accept": "application/json"
+            # Prepare headers
+            headers = {
+                "X-Application": self._app_key,
+                "Accept": "application/json"
+            }
+
+            if not has_certificate:
+                # Standard login requires Content-Type header
+                headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+            response = await betfair_transport.post(
+                identity_url,
+                "certlogin" if has_certificate else "login",
+                cert=cert,
+                headers=headers,
+                data={
+                    "username": self._username,
+                    "password": self._password
                 }
+            )
 
-                if not has_certificate:
-                    # Standard login requires Content-Type header
-                    headers["Content-Type"] = "application/x-www-form-urlencoded"
-
-                response = await client.post(
-                    identity_url,
-                    headers=headers,
-                    data={
-                        "username": self._username,
-                        "password": self._password
-                    }
-                )
-
-                result = response.json()
-
-                # Handle response based on authentication method
-                if has_certificate:
-                    # Certificate login response format
-                    if result.get("loginStatus") == "SUCCESS":
-                        self._session_token = result.get("sessionToken")
-                        self._connected = True
-                        logger.info(f"✅ Authenticated with certificate for {self._username}")
-                        return True
-                    else:
-                        logger.error(f"Certificate auth failed: {result.get('loginStatus')}")
-                        return False
+            result = response.json()
+
+            # Handle response based on authentication method
+            if has_certificate:
+                # Certificate login response format
+                if result.get("loginStatus") == "SUCCESS":
+                    self._session_token = result.get("sessionToken")
+                    self._connected = True
+                    logger.info(f"✅ Authenticated with certificate for {self._username}")
+                    return True
+                else:
+                    logger.error(f"Certificate auth failed: {result.get('loginStatus')}")
+                    return False
+            else:
+                # Standard login response format
+                if result.get("status") == "SUCCESS":
+                    self._session_token = result.get("token")
+                    self._connected = True
+                    logger.info(f"✅ Authenticated without certificate for {self._username}")
+                    return True
                 else:
-                    # Standard login response format
-                    if result.get("status") == "SUCCESS":
-                        self._session_token = result.get("token")
-                        self._connected = True
-                        logger.info(f"✅ Authenticated without certificate for {self._username}")
-                        return True
-                    else:
-                        logger.error(f"Standard auth failed: {result.get('status')} - {result.get('error')}")
-                        return False
+                    logger.error(f"Standard auth failed: {result.get('status')} - {result.get('error')}")
+                    return False
 
         except Exception as e:
             logger.error(f"Eroare la autentificarea Betfair: {e}")
@@ -194,8 +229,9 @@ class BetfairClient:
 
     async def disconnect(self) -> None:
         """Deconectează clientul."""
-        if self._http_client:
-            await self._http_client.aclose()
+        # Clientul HTTP pentru certlogin e legat de fișierele certificatului
+        if self._cert_path and self._key_path:
+            await betfair_transport.release((self._cert_path, self._key_path))
         self._session_token = None
         self._connected = False
 
@@ -220,15 +256,15 @@ class BetfairClient:
 
         try:
             url = "https://identitysso.betfair.com/api/keepAlive"
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    url,
-                    headers={
-                        "X-Application": self._app_key or "",
-                        "X-Authentication": self._session_token or "",
-                        "Accept": "application/json"
-                    }
-                )
+            response = await betfair_transport.post(
+                url,
+                "keepAlive",
+                headers={
+                    "X-Application": self._app_key or "",
+                    "X-Authentication": self._session_token or "",
+                    "Accept": "application/json"
+                }
+            )
 
             if response.status_code == 200:
                 data = response.json()
@@ -246,6 +282,12 @@ class BetfairClient:
             logger.error(f"Keep-alive error: {e}")
             return False
 
+    def get_stream_auth(self) -> Optional[Dict[str, str]]:
+        """appKey + session token pentru autentificarea pe Exchange Stream API."""
+        if not self.is_connected():
+            return None
+        return {"appKey": self._app_key or "", "session": self._session_token}
+
     def _get_headers(self, use_live_key: bool = False) -> Dict[str, str]:
         """Returnează headerele pentru request-uri API."""
         app_key = self._app_key or ""
@@ -260,7 +302,16 @@ class BetfairClient:
             "Accept": "application/json"
         }
 
-    async def _api_request(self, endpoint: str, params: Dict[str, Any], use_live_key: bool = False) -> Dict[str, Any]:
+    # Erori API care înseamnă că token-ul de sesiune a expirat
+    SESSION_ERRORS = ("INVALID_SESSION_INFORMATION", "NO_SESSION")
+
+    async def _api_request(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        use_live_key: bool = False,
+        retry_on_expired_session: bool = True
+    ) -> Dict[str, Any]:
         """
         Execută un request către Betfair API.
 
@@ -268,6 +319,7 @@ class BetfairClient:
             endpoint: Endpoint-ul API (ex: listMarketCatalogue)
             params: Parametrii request-ului
             use_live_key: Folosește Live Key pentru plasare pariuri
+            retry_on_expired_session: Re-login și reîncearcă o dată dacă sesiunea a expirat
 
         Returns:
             Răspunsul API ca dicționar
@@ -282,18 +334,24 @@ class BetfairClient:
         url = f"{self.API_URL}/{endpoint}/"
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    url,
-                    headers=self._get_headers(use_live_key=use_live_key),
-                    json=params
-                )
+            response = await betfair_transport.post(
+                url,
+                endpoint,
+                headers=self._get_headers(use_live_key=use_live_key),
+                json=params
+            )
 
             if response.status_code == 200:
                 return response.json()
-            else:
-                logger.error(f"Eroare API: {response.status_code} - {response.text}")
-                return {"error": response.text}
+
+            if retry_on_expired_session and any(err in response.text for err in self.SESSION_ERRORS):
+                # Sesiune refolosită care a expirat între timp - login din nou
+                logger.info(f"Sesiune Betfair expirată pentru {self._username}, reconectare...")
+                self._connected = False
+                return await self._api_request(endpoint, params, use_live_key, retry_on_expired_session=False)
+
+            logger.error(f"Eroare API: {response.status_code} - {response.text}")
+            return {"error": response.text}
 
         except Exception as e:
             logger.error(f"Eroare request API: {e}")
@@ -345,6 +403,9 @@ class BetfairClient:
         """
         Listează piețele pentru evenimente.
 
+        Cererile concurente sunt grupate (vezi betfair_batcher), deci oricâte
+        evenimente se cer, se fac doar request-urile necesare sub limita de weight.
+
         Args:
             event_ids: Lista de ID-uri evenimente
             market_type_codes: Tipuri de piețe (default: MATCH_ODDS)
@@ -355,19 +416,29 @@ class BetfairClient:
         if market_type_codes is None:
             market_type_codes = ["MATCH_ODDS"]
 
+        return await self._catalogue_batcher.request(tuple(market_type_codes), event_ids)
+
+    def _catalogue_markets_per_request(self) -> int:
+        return catalogue_markets_per_request(self.CATALOGUE_PROJECTION)
+
+    def _catalogue_events_per_request(self, market_type_codes: tuple) -> int:
+        """Câte evenimente încap într-un request (presupunem o piață per tip per eveniment)."""
+        return max(self._catalogue_markets_per_request() // max(len(market_type_codes), 1), 1)
+
+    async def _fetch_market_catalogue(
+        self,
+        market_type_codes: tuple,
+        event_ids: List[str]
+    ) -> List[Dict[str, Any]]:
+        """Un singur request listMarketCatalogue (apelat de batcher)."""
+        max_results = self._catalogue_markets_per_request()
         params = {
             "filter": {
                 "eventIds": event_ids,
-                "marketTypeCodes": market_type_codes
+                "marketTypeCodes": list(market_type_codes)
             },
-            "maxResults": "100",
-            "marketProjection": [
-                "COMPETITION",
-                "EVENT",
-                "EVENT_TYPE",
-                "RUNNER_DESCRIPTION",
-                "MARKET_START_TIME"
-            ]
+            "maxResults": str(max_results),
+            "marketProjection": self.CATALOGUE_PROJECTION
         }
 
         result = await self._api_request("listMarketCatalogue", params)
@@ -375,22 +446,35 @@ class BetfairClient:
         if "error" in result:
             return []
 
-        return result if isinstance(result, list) else []
+        markets = result if isinstance(result, list) else []
+        if len(markets) >= max_results:
+            logger.warning(f"listMarketCatalogue a atins maxResults={max_results} - rezultate posibil trunchiate")
+        return markets
 
     async def list_market_book(self, market_ids: List[str]) -> List[Dict[str, Any]]:
         """
         Obține prețurile pentru piețe.
 
+        Piețele urmărite prin market stream se citesc din cache-ul local; restul se
+        cer prin REST, grupat și împărțit după weight-ul EX_BEST_OFFERS.
+
         Args:
             market_ids: Lista de ID-uri piețe
 
         Returns:
             Lista de market books cu prețuri
         """
+        books, missing = market_price_cache.get_books(market_ids)
+        if missing:
+            books.extend(await self._book_batcher.request(None, missing))
+        return books
+
+    async def _fetch_market_book(self, market_ids: List[str]) -> List[Dict[str, Any]]:
+        """Un singur request listMarketBook (apelat de batcher)."""
         params = {
             "marketIds": market_ids,
             "priceProjection": {
-                "priceData": ["EX_BEST_OFFERS"],
+                "priceData": self.BOOK_PRICE_DATA,
                 "virtualise": True
             }
         }
@@ -402,6 +486,13 @@ class BetfairClient:
 
         return result if isinstance(result, list) else []
 
+    def get_batch_stats(self) -> dict:
+        """Metricile grupării request-urilor de piețe."""
+        return {
+            'listMarketCatalogue': self._catalogue_batcher.get_stats(),
+            'listMarketBook': self._book_batcher.get_stats()
+        }
+
     async def find_matches_for_team(self, team) -> List[Match]:
         """
         Caută meciuri pentru o echipă.
@@ -608,27 +699,86 @@ class BetfairClient:
         Returns:
             Lista de pariuri finalizate
         """
-        from_date = (datetime.utcnow() - timedelta(days=days)).isoformat() + "Z"
-        to_date = datetime.utcnow().isoformat() + "Z"
+        orders = await self.get_cleared_orders_since(datetime.utcnow() - timedelta(days=days))
+        if orders is None:
+            return []
 
-        params = {
-            "betStatus": "SETTLED",
-            "settledDateRange": {
-                "from": from_date,
-                "to": to_date
+        logger.info(f"Found {len(orders)} settled orders in last {days} days")
+        return orders
+
+    # listClearedOrders returnează maxim 1000 de înregistrări per pagină
+    CLEARED_ORDERS_PAGE_SIZE = 1000
+
+    async def get_cleared_orders_since(
+        self,
+        from_date: datetime,
+        to_date: Optional[datetime] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Obține toate ordinele finalizate într-un interval, paginând prin moreAvailable.
+
+        Args:
+            from_date: Începutul intervalului settledDate (UTC)
+            to_date: Sfârșitul intervalului (default: acum)
+
+        Returns:
+            Lista completă de ordine sau None dacă o pagină a eșuat
+            (rezultatul parțial nu e returnat ca să nu avanseze checkpoint-ul)
+        """
+        to_date = to_date or datetime.utcnow()
+        orders: List[Dict[str, Any]] = []
+        from_record = 0
+
+        while True:
+            params = {
+                "betStatus": "SETTLED",
+                "settledDateRange": {
+                    "from": from_date.isoformat() + "Z",
+                    "to": to_date.isoformat() + "Z"
+                },
+                "fromRecord": from_record,
+                "recordCount": self.CLEARED_ORDERS_PAGE_SIZE
             }
-        }
 
-        result = await self._api_request("listClearedOrders", params)
+            result = await self._api_request("listClearedOrders", params)
 
-        if "error" in result:
-            logger.error(f"Error getting settled orders: {result.get('error')}")
-            return []
+            if "error" in result:
+                logger.error(f"Error getting settled orders: {result.get('error')}")
+                return None
+
+            page = result.get("clearedOrders", [])
+            orders.extend(page)
+
+            if not result.get("moreAvailable") or not page:
+                break
+            from_record += len(page)
 
-        orders = result.get("clearedOrders", [])
-        logger.info(f"Found {len(orders)} settled orders in last {days} days")
         return orders
 
+    async def get_cleared_orders_for_bets(self, bet_ids: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Obține ordinele finalizate pentru anumite pariuri (filtru betIds).
+
+        Args:
+            bet_ids: ID-urile pariurilor
+
+        Returns:
+            Lista de ordine finalizate sau None dacă request-ul a eșuat
+        """
+        if not bet_ids:
+            return []
+
+        result = await self._api_request("listClearedOrders", {
+            "betStatus": "SETTLED",
+            "betIds": bet_ids
+        })
+
+        if "error" in result:
+            logger.error(f"Error getting settled orders for bets: {result.get('error')}")
+            return None
+
+        return result.get("clearedOrders", [])
+
     async def get_all_bets_summary(self) -> Dict[str, Any]:
         """
         Obține un rezumat al tuturor pariurilor (active + finalizate).
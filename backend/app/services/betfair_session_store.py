@@ -0,0 +1,234 @@
+"""
+Betfair Session Store - Sesiuni Betfair autentificate, păstrate per user
+Evită login-ul (certlogin / interactive) la fiecare rulare a bot-ului:
+token-ul e refolosit și menținut activ cu keep_alive până expiră.
+"""
+import asyncio
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.services.betfair_client import BetfairClient
+from app.services.betfair_stream import order_stream_manager
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class BetfairSession:
+    """O sesiune Betfair autentificată pentru un user."""
+
+    def __init__(self, client: BetfairClient, temp_files: List[str]):
+        now = datetime.utcnow()
+        self.client = client
+        self.temp_files = temp_files
+        self.logged_in_at = now
+        self.last_keepalive_at = now
+        self.last_used_at = now
+
+
+class BetfairSessionStore:
+    """
+    Cache de sesiuni Betfair per user.
+
+    - get_client() returnează un client deja autentificat (login doar dacă nu există sesiune)
+    - refresh_sessions() rulează periodic keep_alive pentru sesiunile vechi
+      și închide sesiunile nefolosite
+    - invalidate() se apelează când userul își schimbă credențialele
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, BetfairSession] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._stats = {
+            'logins': 0,
+            'login_failures': 0,
+            'reuses': 0,
+            'keepalives': 0,
+            'keepalive_failures': 0,
+            'evictions': 0
+        }
+
+    def _get_lock(self, user_id: str) -> asyncio.Lock:
+        """Lock per user - două rulări simultane nu fac login de două ori."""
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[user_id] = lock
+        return lock
+
+    def _write_temp_cert(self, credentials: dict) -> List[str]:
+        """Scrie certificatul userului în fișiere temporare (pentru certlogin)."""
+        if not (credentials.get('cert_content') and credentials.get('key_content')):
+            return []
+
+        cert_file = tempfile.NamedTemporaryFile(mode='w', suffix='.crt', delete=False)
+        cert_file.write(credentials['cert_content'])
+        cert_file.close()
+
+        key_file = tempfile.NamedTemporaryFile(mode='w', suffix='.key', delete=False)
+        key_file.write(credentials['key_content'])
+        key_file.close()
+
+        return [cert_file.name, key_file.name]
+
+    @staticmethod
+    def _remove_files(paths: List[str]) -> None:
+        for path in paths:
+            try:
+                if os.path.exists(path):
+                    os.unlink(path)
+            except OSError as e:
+                logger.warning(f"Nu s-a putut șterge fișierul temporar {path}: {e}")
+
+    async def _login(self, user_id: str, credentials: dict) -> Optional[BetfairSession]:
+        """Creează un client nou și face login."""
+        temp_files = []
+        try:
+            temp_files = self._write_temp_cert(credentials)
+        except Exception as e:
+            logger.error(f"Failed to create temp certificate files for user {user_id}: {e}")
+
+        client = BetfairClient()
+        # IMPORTANT: use_env_fallback=False to prevent master certificate from being used
+        client.configure(
+            app_key=credentials['app_key'],
+            username=credentials['username'],
+            password=credentials['password'],
+            cert_path=temp_files[0] if temp_files else None,
+            key_path=temp_files[1] if temp_files else None,
+            use_env_fallback=False
+        )
+
+        self._stats['logins'] += 1
+        await client.connect()
+        if not client.is_connected():
+            self._stats['login_failures'] += 1
+            await client.disconnect()
+            self._remove_files(temp_files)
+            return None
+
+        return BetfairSession(client, temp_files)
+
+    async def get_client(
+        self,
+        user_id: str,
+        load_credentials: Callable[[], Awaitable[Optional[dict]]]
+    ) -> Optional[BetfairClient]:
+        """
+        Returnează un client Betfair autentificat pentru user.
+
+        Args:
+            user_id: ID-ul userului
+            load_credentials: Funcție async care încarcă credențialele decriptate
+                (apelată doar când trebuie făcut login)
+
+        Returns:
+            BetfairClient conectat sau None dacă login-ul a eșuat
+        """
+        async with self._get_lock(user_id):
+            session = self._sessions.get(user_id)
+            if session and session.client.is_connected():
+                session.last_used_at = datetime.utcnow()
+                self._stats['reuses'] += 1
+                return session.client
+
+            if session:
+                await self._close_session(user_id)
+
+            credentials = await load_credentials()
+            if not credentials:
+                return None
+
+            session = await self._login(user_id, credentials)
+            if not session:
+                return None
+
+            self._sessions[user_id] = session
+            logger.info(f"Sesiune Betfair nouă pentru user {user_id} ({len(self._sessions)} active)")
+
+            # Order stream pentru settlement în timp real, cât timp sesiunea e activă
+            order_stream_manager.start(user_id, session.client)
+            return session.client
+
+    async def _close_session(self, user_id: str) -> None:
+        """Închide sesiunea unui user și șterge fișierele temporare."""
+        session = self._sessions.pop(user_id, None)
+        if not session:
+            return
+        await order_stream_manager.stop(user_id)
+        try:
+            await session.client.disconnect()
+        except Exception as e:
+            logger.warning(f"Eroare la deconectarea sesiunii pentru {user_id}: {e}")
+        self._remove_files(session.temp_files)
+
+    async def invalidate(self, user_id: str) -> None:
+        """Elimină sesiunea unui user (ex: credențiale modificate sau șterse)."""
+        async with self._get_lock(user_id):
+            if user_id in self._sessions:
+                await self._close_session(user_id)
+                self._stats['evictions'] += 1
+                logger.info(f"Sesiune Betfair invalidată pentru user {user_id}")
+
+    async def refresh_sessions(self) -> dict:
+        """
+        Menține sesiunile active cu keep_alive înainte să expire
+        și închide sesiunile nefolosite de mult timp.
+
+        Returns:
+            dict cu numărul de sesiuni menținute / eliminate
+        """
+        now = datetime.utcnow()
+        keepalive_after = timedelta(minutes=settings.betfair_session_keepalive_minutes)
+        idle_limit = timedelta(hours=settings.betfair_session_idle_hours)
+        result = {'kept_alive': 0, 'evicted': 0}
+
+        for user_id in list(self._sessions.keys()):
+            async with self._get_lock(user_id):
+                session = self._sessions.get(user_id)
+                if not session:
+                    continue
+
+                if now - session.last_used_at > idle_limit or not session.client.is_connected():
+                    await self._close_session(user_id)
+                    self._stats['evictions'] += 1
+                    result['evicted'] += 1
+                    continue
+
+                if now - session.last_keepalive_at < keepalive_after:
+                    continue
+
+                if await session.client.keep_alive():
+                    session.last_keepalive_at = now
+                    self._stats['keepalives'] += 1
+                    result['kept_alive'] += 1
+                else:
+                    # Sesiune expirată - următorul get_client() face login din nou
+                    self._stats['keepalive_failures'] += 1
+                    await self._close_session(user_id)
+                    self._stats['evictions'] += 1
+                    result['evicted'] += 1
+
+        if result['kept_alive'] or result['evicted']:
+            logger.info(f"Sesiuni Betfair: {result['kept_alive']} menținute, {result['evicted']} eliminate")
+        return result
+
+    async def close_all(self) -> None:
+        """Închide toate sesiunile - apelat la oprirea aplicației."""
+        for user_id in list(self._sessions.keys()):
+            await self._close_session(user_id)
+
+    def get_stats(self) -> dict:
+        """Returnează metricile store-ului."""
+        return {
+            **self._stats,
+            'active_sessions': len(self._sessions)
+        }
+
+
+# Singleton instance
+betfair_session_store = BetfairSessionStore()
@@ -0,0 +1,608 @@
+"""
+Betfair Exchange Stream API - Consumeri pentru order stream și market stream
+- Order stream (per user): cache local al ordinelor; anunță imediat când piața unui
+  pariu se închide, în loc să aștepte următorul poll listClearedOrders
+- Market stream (cont master): ladder local de prețuri (EX_BEST_OFFERS) pentru piețele
+  MATCH_ODDS ale echipelor urmărite, citit în loc de listMarketBook
+
+Protocol: JSON delimitat de CRLF peste TLS (stream-api.betfair.com:443)
+connection -> authentication -> orderSubscription / marketSubscription -> ocm / mcm / heartbeat
+"""
+import asyncio
+import json
+import logging
+import ssl
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# handler(user_id, market_id, bet_ids) - apelat când piața unor pariuri potrivite s-a închis
+SettlementHandler = Callable[[str, str, List[str]], Awaitable[None]]
+
+# Erori de autentificare după care nu are sens să reîncercăm cu aceeași sesiune
+FATAL_STATUS_ERRORS = ("NOT_AUTHORIZED", "INVALID_APP_KEY", "NO_APP_KEY", "SUBSCRIPTION_LIMIT_EXCEEDED")
+
+
+class StreamError(Exception):
+    """Eroare raportată de Betfair Stream API (status FAILURE)."""
+
+    def __init__(self, error_code: str, message: str = ""):
+        super().__init__(f"{error_code}: {message}")
+        self.error_code = error_code
+
+
+class OrderCache:
+    """
+    Cache local al ordinelor din order stream: market_id -> bet_id -> ordin.
+
+    Aplică mesajele ocm (imagini complete și delta-uri) și returnează piețele
+    închise împreună cu ordinele lor.
+    """
+
+    def __init__(self):
+        self._markets: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def clear(self) -> None:
+        self._markets.clear()
+
+    def order_count(self) -> int:
+        return sum(len(orders) for orders in self._markets.values())
+
+    def get_market_orders(self, market_id: str) -> List[Dict[str, Any]]:
+        return list(self._markets.get(market_id, {}).values())
+
+    def apply(self, market_changes: List[Dict[str, Any]]) -> List[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Aplică lista `oc` dintr-un mesaj ocm.
+
+        Returns:
+            Lista (market_id, ordine) pentru piețele închise în acest mesaj
+        """
+        closed = []
+
+        for change in market_changes:
+            market_id = change.get("id")
+            if not market_id:
+                continue
+
+            if change.get("fullImage"):
+                self._markets[market_id] = {}
+            orders = self._markets.setdefault(market_id, {})
+
+            for runner_change in change.get("orc", []) or []:
+                selection_id = runner_change.get("id")
+                if runner_change.get("fullImage"):
+                    for bet_id in [b for b, o in orders.items() if o.get("selectionId") == selection_id]:
+                        del orders[bet_id]
+
+                for order in runner_change.get("uo", []) or []:
+                    bet_id = str(order.get("id", ""))
+                    if bet_id:
+                        orders[bet_id] = {**orders.get(bet_id, {}), **order, "selectionId": selection_id}
+
+            if change.get("closed"):
+                closed.append((market_id, list(self._markets.pop(market_id, {}).values())))
+
+        return closed
+
+
+class StreamConnection:
+    """
+    Conexiune Exchange Stream cu reconectare automată (backoff exponențial).
+
+    Subclasele definesc subscripția (_subscription) și procesarea mesajelor de
+    schimbare (_on_change); clk-urile sunt păstrate pentru resubscribe după reconectare.
+    """
+
+    RECONNECT_MIN_SECONDS = 1.0
+    RECONNECT_MAX_SECONDS = 60.0
+    CHANGE_OP = ""
+
+    def __init__(
+        self,
+        name: str,
+        client,
+        host: str,
+        port: int,
+        use_ssl: bool = True,
+        heartbeat_ms: int = 5000
+    ):
+        self.name = name
+        self.client = client
+        self._host = host
+        self._port = port
+        self._use_ssl = use_ssl
+        self._heartbeat_ms = heartbeat_ms
+
+        self._task: Optional[asyncio.Task] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._message_id = 0
+        self._initial_clk: Optional[str] = None
+        self._clk: Optional[str] = None
+        self._connected = False
+        self._stopped = False
+        self._stats = {
+            'connects': 0,
+            'disconnects': 0,
+            'messages': 0,
+            'heartbeats': 0,
+            'last_message_at': None,
+            'last_error': None
+        }
+
+    def start(self) -> None:
+        """Pornește bucla de citire în background."""
+        if self._task is None or self._task.done():
+            self._stopped = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Oprește conexiunea și bucla de reconectare."""
+        self._stopped = True
+        if self._writer:
+            self._writer.close()
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def _subscription(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def _on_change(self, message: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _on_disconnect(self) -> None:
+        """Apelat când conexiunea se pierde (subclasele pot invalida cache-ul)."""
+
+    async def _run(self) -> None:
+        """Conectează și consumă mesaje; la deconectare reîncearcă cu backoff exponențial."""
+        delay = self.RECONNECT_MIN_SECONDS
+        while not self._stopped:
+            try:
+                await self._connect_and_consume()
+                delay = self.RECONNECT_MIN_SECONDS
+            except asyncio.CancelledError:
+                raise
+            except StreamError as e:
+                self._stats['last_error'] = str(e)
+                if e.error_code in FATAL_STATUS_ERRORS:
+                    logger.error(f"Stream {self.name} oprit: {e}")
+                    return
+                logger.warning(f"Stream {self.name}: {e}")
+            except Exception as e:
+                self._stats['last_error'] = str(e)
+                logger.warning(f"Stream {self.name} deconectat: {e}")
+            finally:
+                if self._connected:
+                    self._stats['disconnects'] += 1
+                self._connected = False
+                self._on_disconnect()
+                if self._writer:
+                    self._writer.close()
+                    self._writer = None
+
+            if self._stopped:
+                return
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.RECONNECT_MAX_SECONDS)
+
+    async def _connect_and_consume(self) -> None:
+        ssl_context = ssl.create_default_context() if self._use_ssl else None
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self._host, self._port, ssl=ssl_context, limit=16 * 1024 * 1024),
+            timeout=15
+        )
+        self._writer = writer
+
+        # 1. Mesajul de conexiune
+        connection = await self._read(reader)
+        if connection.get("op") != "connection":
+            raise StreamError("UNEXPECTED_MESSAGE", f"așteptam 'connection', am primit {connection.get('op')}")
+
+        # 2. Autentificare cu token-ul curent al sesiunii
+        auth = self.client.get_stream_auth()
+        if not auth:
+            raise StreamError("NO_SESSION", "clientul Betfair nu este conectat")
+        await self._request(reader, {"op": "authentication", **auth})
+
+        # 3. Subscripție (cu clk-urile anterioare pentru resubscribe după reconectare)
+        subscription = {
+            **self._subscription(),
+            "segmentationEnabled": True,
+            "heartbeatMs": self._heartbeat_ms
+        }
+        if self._initial_clk and self._clk:
+            subscription["initialClk"] = self._initial_clk
+            subscription["clk"] = self._clk
+        await self._request(reader, subscription)
+
+        self._connected = True
+        self._stats['connects'] += 1
+        logger.info(f"Stream {self.name} conectat")
+
+        while not self._stopped:
+            message = await self._read(reader)
+            self._handle_message(message)
+
+    async def _send(self, payload: Dict[str, Any]) -> int:
+        self._message_id += 1
+        payload = {**payload, "id": self._message_id}
+        self._writer.write((json.dumps(payload) + "\r\n").encode("utf-8"))
+        await self._writer.drain()
+        return self._message_id
+
+    async def resubscribe(self) -> None:
+        """Trimite din nou subscripția (ex: s-a schimbat lista de piețe) - primim o imagine nouă."""
+        if not self._connected or not self._writer:
+            return
+        self._initial_clk = None
+        self._clk = None
+        await self._send({
+            **self._subscription(),
+            "segmentationEnabled": True,
+            "heartbeatMs": self._heartbeat_ms
+        })
+
+    async def _request(self, reader: asyncio.StreamReader, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Trimite o operație și așteaptă statusul ei (mesajele primite între timp sunt procesate)."""
+        message_id = await self._send(payload)
+        while True:
+            message = await self._read(reader)
+            if message.get("op") == "status" and message.get("id") == message_id:
+                if message.get("statusCode") != "SUCCESS":
+                    raise StreamError(message.get("errorCode", "FAILURE"), message.get("errorMessage", ""))
+                return message
+            self._handle_message(message)
+
+    async def _read(self, reader: asyncio.StreamReader) -> Dict[str, Any]:
+        """Citește un mesaj; lipsa mesajelor peste 3 heartbeat-uri înseamnă conexiune moartă."""
+        timeout = max(self._heartbeat_ms / 1000 * 3, 15)
+        line = await asyncio.wait_for(reader.readline(), timeout=timeout)
+        if not line:
+            raise ConnectionError("conexiune închisă de server")
+        self._stats['messages'] += 1
+        self._stats['last_message_at'] = time.time()
+        return json.loads(line)
+
+    def _handle_message(self, message: Dict[str, Any]) -> None:
+        op = message.get("op")
+
+        if op == "status":
+            if message.get("statusCode") != "SUCCESS" or message.get("connectionClosed"):
+                raise StreamError(message.get("errorCode", "CONNECTION_CLOSED"), message.get("errorMessage", ""))
+            return
+
+        if op != self.CHANGE_OP:
+            return
+
+        if message.get("initialClk"):
+            self._initial_clk = message["initialClk"]
+        if message.get("clk"):
+            self._clk = message["clk"]
+
+        if message.get("ct") == "HEARTBEAT":
+            self._stats['heartbeats'] += 1
+            return
+
+        self._on_change(message)
+
+    def get_stats(self) -> dict:
+        return {
+            **self._stats,
+            'connected': self._connected
+        }
+
+
+class OrderStream(StreamConnection):
+    """Order stream pentru un singur user."""
+
+    CHANGE_OP = "ocm"
+
+    def __init__(
+        self,
+        user_id: str,
+        client,
+        on_settlement: Optional[SettlementHandler],
+        host: str,
+        port: int,
+        use_ssl: bool = True,
+        heartbeat_ms: int = 5000
+    ):
+        super().__init__(f"ordine user {user_id}", client, host, port, use_ssl, heartbeat_ms)
+        self.user_id = user_id
+        self._on_settlement = on_settlement
+        self.cache = OrderCache()
+        self._dispatch_tasks: Set[asyncio.Task] = set()
+        self._stats.update({
+            'markets_closed': 0,
+            'settlements_dispatched': 0
+        })
+
+    def _subscription(self) -> Dict[str, Any]:
+        return {
+            "op": "orderSubscription",
+            "orderFilter": {"includeOverallPosition": False}
+        }
+
+    def _on_change(self, message: Dict[str, Any]) -> None:
+        # Imagine completă (subscripție nouă) - înlocuiește cache-ul
+        if message.get("ct") == "SUB_IMAGE" and message.get("segmentType") in (None, "SEG_START"):
+            self.cache.clear()
+
+        for market_id, orders in self.cache.apply(message.get("oc", []) or []):
+            self._stats['markets_closed'] += 1
+            bet_ids = [str(o.get("id")) for o in orders if float(o.get("sm", 0) or 0) > 0]
+            if bet_ids:
+                self._dispatch(market_id, bet_ids)
+
+    def _dispatch(self, market_id: str, bet_ids: List[str]) -> None:
+        """Trimite evenimentul de settlement fără să blocheze citirea stream-ului."""
+        if not self._on_settlement:
+            return
+        self._stats['settlements_dispatched'] += 1
+        logger.info(f"Order stream: piața {market_id} închisă pentru user {self.user_id} ({len(bet_ids)} pariuri)")
+
+        task = asyncio.create_task(self._run_handler(market_id, bet_ids))
+        self._dispatch_tasks.add(task)
+        task.add_done_callback(self._dispatch_tasks.discard)
+
+    async def _run_handler(self, market_id: str, bet_ids: List[str]) -> None:
+        try:
+            await self._on_settlement(self.user_id, market_id, bet_ids)
+        except Exception as e:
+            logger.error(f"Eroare la procesarea settlement-ului din stream pentru user {self.user_id}: {e}")
+
+    def get_stats(self) -> dict:
+        return {
+            **super().get_stats(),
+            'cached_orders': self.cache.order_count()
+        }
+
+
+class MarketPriceCache:
+    """
+    Ladder local de prețuri din market stream: market_id -> runners (batb / batl pe niveluri).
+
+    get_books() returnează structura listMarketBook (runners[].ex.availableToBack /
+    availableToLay), deci consumatorii nu știu dacă prețul vine din stream sau din REST.
+    """
+
+    def __init__(self):
+        self._markets: Dict[str, Dict[str, Any]] = {}
+        self._live = False
+        self._stats = {
+            'hits': 0,
+            'misses': 0
+        }
+
+    def set_live(self, live: bool) -> None:
+        """Cache-ul e folosit doar cât timp stream-ul e conectat (altfel prețurile pot fi vechi)."""
+        self._live = live
+
+    def clear(self) -> None:
+        self._markets.clear()
+
+    def apply(self, market_changes: List[Dict[str, Any]]) -> None:
+        """Aplică lista `mc` dintr-un mesaj mcm (imagini complete și delta-uri de ladder)."""
+        for change in market_changes:
+            market_id = change.get("id")
+            if not market_id:
+                continue
+
+            if change.get("img") or market_id not in self._markets:
+                self._markets[market_id] = {'status': 'OPEN', 'total_matched': 0.0, 'runners': {}}
+            market = self._markets[market_id]
+
+            definition = change.get("marketDefinition")
+            if definition:
+                market['status'] = definition.get("status", market['status'])
+                market['inplay'] = definition.get("inPlay", False)
+                if market['status'] == "CLOSED":
+                    del self._markets[market_id]
+                    continue
+
+            if "tv" in change:
+                market['total_matched'] = change["tv"]
+
+            for runner_change in change.get("rc", []) or []:
+                runner = market['runners'].setdefault(runner_change.get("id"), {'batb': {}, 'batl': {}})
+                for field in ("batb", "batl"):
+                    for level, price, size in runner_change.get(field, []) or []:
+                        if size == 0:
+                            runner[field].pop(level, None)
+                        else:
+                            runner[field][level] = (price, size)
+
+            market['updated_at'] = time.time()
+
+    @staticmethod
+    def _to_book(market_id: str, market: Dict[str, Any]) -> Dict[str, Any]:
+        runners = []
+        for selection_id, ladder in market['runners'].items():
+            runners.append({
+                "selectionId": selection_id,
+                "status": "ACTIVE",
+                "ex": {
+                    "availableToBack": [
+                        {"price": p, "size": s} for _, (p, s) in sorted(ladder['batb'].items())
+                    ],
+                    "availableToLay": [
+                        {"price": p, "size": s} for _, (p, s) in sorted(ladder['batl'].items())
+                    ]
+                }
+            })
+        return {
+            "marketId": market_id,
+            "status": market['status'],
+            "inplay": market.get('inplay', False),
+            "totalMatched": market['total_matched'],
+            "runners": runners
+        }
+
+    def get_books(self, market_ids: List[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Prețurile din cache pentru piețele cerute.
+
+        Returns:
+            (market books găsite, ID-urile care trebuie cerute prin REST)
+        """
+        if not self._live:
+            self._stats['misses'] += len(market_ids)
+            return [], list(market_ids)
+
+        books, missing = [], []
+        for market_id in market_ids:
+            market = self._markets.get(market_id)
+            if market and market['runners']:
+                books.append(self._to_book(market_id, market))
+            else:
+                missing.append(market_id)
+
+        self._stats['hits'] += len(books)
+        self._stats['misses'] += len(missing)
+        return books, missing
+
+    def get_stats(self) -> dict:
+        return {
+            **self._stats,
+            'live': self._live,
+            'markets': len(self._markets)
+        }
+
+
+class MarketStream(StreamConnection):
+    """Market stream (cont master) pentru piețele MATCH_ODDS ale echipelor urmărite."""
+
+    CHANGE_OP = "mcm"
+
+    def __init__(
+        self,
+        client,
+        market_ids: List[str],
+        price_cache: "MarketPriceCache",
+        host: str,
+        port: int,
+        use_ssl: bool = True,
+        heartbeat_ms: int = 5000,
+        ladder_levels: int = 3
+    ):
+        super().__init__("prețuri", client, host, port, use_ssl, heartbeat_ms)
+        self.market_ids = list(market_ids)
+        self.cache = price_cache
+        self._ladder_levels = ladder_levels
+
+    def _subscription(self) -> Dict[str, Any]:
+        return {
+            "op": "marketSubscription",
+            "marketFilter": {"marketIds": self.market_ids},
+            "marketDataFilter": {
+                "fields": ["EX_BEST_OFFERS", "EX_MARKET_DEF", "EX_TRADED_VOL"],
+                "ladderLevels": self._ladder_levels
+            }
+        }
+
+    async def update_markets(self, market_ids: List[str]) -> None:
+        """Schimbă lista de piețe subscrise (resubscribe doar dacă s-a modificat)."""
+        if set(market_ids) == set(self.market_ids):
+            return
+        self.market_ids = list(market_ids)
+        await self.resubscribe()
+
+    def _on_change(self, message: Dict[str, Any]) -> None:
+        if message.get("ct") == "SUB_IMAGE" and message.get("segmentType") in (None, "SEG_START"):
+            self.cache.clear()
+        self.cache.apply(message.get("mc", []) or [])
+        self.cache.set_live(True)
+
+    def _on_disconnect(self) -> None:
+        self.cache.set_live(False)
+
+    def get_stats(self) -> dict:
+        return {
+            **super().get_stats(),
+            'subscribed_markets': len(self.market_ids)
+        }
+
+
+class OrderStreamManager:
+    """
+    Un OrderStream pentru fiecare sesiune Betfair activă.
+
+    Pornit / oprit de betfair_session_store odată cu sesiunea; handler-ul de
+    settlement e înregistrat la pornirea aplicației (vezi main.py).
+    """
+
+    def __init__(self):
+        self._streams: Dict[str, OrderStream] = {}
+        self._settlement_handler: Optional[SettlementHandler] = None
+
+    def set_settlement_handler(self, handler: SettlementHandler) -> None:
+        self._settlement_handler = handler
+
+    def start(self, user_id: str, client) -> None:
+        """Pornește stream-ul unui user (înlocuiește unul existent pentru o sesiune veche)."""
+        if not settings.betfair_stream_enabled or not self._settlement_handler:
+            return
+
+        existing = self._streams.get(user_id)
+        if existing and existing.client is client and existing.is_running():
+            return
+        if existing:
+            asyncio.create_task(existing.stop())
+
+        stream = OrderStream(
+            user_id,
+            client,
+            self._settlement_handler,
+            host=settings.betfair_stream_host,
+            port=settings.betfair_stream_port,
+            use_ssl=settings.betfair_stream_ssl,
+            heartbeat_ms=settings.betfair_stream_heartbeat_ms
+        )
+        self._streams[user_id] = stream
+        stream.start()
+
+    async def stop(self, user_id: str) -> None:
+        stream = self._streams.pop(user_id, None)
+        if stream:
+            await stream.stop()
+
+    async def stop_all(self) -> None:
+        """Oprește toate stream-urile - apelat la oprirea aplicației."""
+        for user_id in list(self._streams.keys()):
+            await self.stop(user_id)
+
+    def get_stats(self) -> dict:
+        """Metrici agregate pe toate stream-urile (fără ID-uri de user)."""
+        streams = [stream.get_stats() for stream in self._streams.values()]
+        return {
+            'enabled': settings.betfair_stream_enabled,
+            'active_streams': len(streams),
+            'connected_streams': sum(1 for s in streams if s['connected']),
+            'connects': sum(s['connects'] for s in streams),
+            'disconnects': sum(s['disconnects'] for s in streams),
+            'messages': sum(s['messages'] for s in streams),
+            'heartbeats': sum(s['heartbeats'] for s in streams),
+            'cached_orders': sum(s['cached_orders'] for s in streams),
+            'markets_closed': sum(s['markets_closed'] for s in streams),
+            'settlements_dispatched': sum(s['settlements_dispatched'] for s in streams)
+        }
+
+
+# Singleton instance
+order_stream_manager = OrderStreamManager()
+market_price_cache = MarketPriceCache()
@@ -0,0 +1,186 @@
+"""
+Betfair Transport - Pool de conexiuni HTTP partajat pentru Betfair API
+Un singur httpx.AsyncClient (HTTP/2, keep-alive) per identitate de certificat,
+refolosit de toți clienții Betfair în loc de un handshake TCP+TLS per request.
+"""
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# (cert_path, key_path) pentru certlogin, None pentru request-uri fără certificat
+CertIdentity = Optional[Tuple[str, str]]
+
+
+class BetfairTransport:
+    """
+    Pool de conexiuni HTTP către Betfair, cheiat după identitatea certificatului.
+
+    Request-urile API-NG nu folosesc certificat, deci toți userii împart același
+    pool de conexiuni către api.betfair.com. Doar certlogin are nevoie de un
+    client separat (certificatul se negociază la handshake-ul TLS).
+    """
+
+    # Timeout-uri per endpoint (secunde)
+    ENDPOINT_TIMEOUTS: Dict[str, float] = {
+        "certlogin": 30.0,
+        "login": 30.0,
+        "keepAlive": 10.0,
+        "listEvents": 15.0,
+        "listMarketCatalogue": 20.0,
+        "listMarketBook": 10.0,
+        "placeOrders": 15.0,
+        "listCurrentOrders": 15.0,
+        "listClearedOrders": 30.0,
+        "getAccountFunds": 10.0,
+    }
+    DEFAULT_TIMEOUT = 30.0
+
+    def __init__(self):
+        self._clients: Dict[CertIdentity, httpx.AsyncClient] = {}
+        self._stats = {
+            'clients_created': 0,
+            'requests': 0,
+            'errors': 0,
+            'connections_opened': 0,
+            'tls_handshakes': 0,
+            'http2_responses': 0
+        }
+        self._endpoint_stats: Dict[str, Dict[str, float]] = {}
+
+    def _build_client(self, cert: CertIdentity) -> httpx.AsyncClient:
+        """Creează un client nou cu limitele de conexiuni din config."""
+        limits = httpx.Limits(
+            max_connections=settings.betfair_http_max_connections,
+            max_keepalive_connections=settings.betfair_http_max_keepalive,
+            keepalive_expiry=settings.betfair_http_keepalive_expiry
+        )
+        return httpx.AsyncClient(
+            cert=cert,
+            http2=settings.betfair_http2,
+            limits=limits,
+            timeout=self.DEFAULT_TIMEOUT
+        )
+
+    def get_client(self, cert: CertIdentity = None) -> httpx.AsyncClient:
+        """Returnează clientul partajat pentru identitatea dată (îl creează la nevoie)."""
+        client = self._clients.get(cert)
+        if client is None or client.is_closed:
+            client = self._build_client(cert)
+            self._clients[cert] = client
+            self._stats['clients_created'] += 1
+            logger.info(f"Betfair transport: client nou ({'cert' if cert else 'fără cert'}), total {len(self._clients)}")
+        return client
+
+    def timeout_for(self, endpoint: str) -> float:
+        """Timeout-ul configurat pentru un endpoint."""
+        return self.ENDPOINT_TIMEOUTS.get(endpoint, self.DEFAULT_TIMEOUT)
+
+    async def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        """Callback httpcore - numără conexiunile noi și handshake-urile TLS."""
+        if event_name == "connection.connect_tcp.complete":
+            self._stats['connections_opened'] += 1
+        elif event_name == "connection.start_tls.complete":
+            self._stats['tls_handshakes'] += 1
+
+    def _record(self, endpoint: str, elapsed_ms: float, failed: bool) -> None:
+        """Actualizează contoarele de latență pentru un endpoint."""
+        entry = self._endpoint_stats.setdefault(endpoint, {
+            'count': 0,
+            'errors': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0
+        })
+        entry['count'] += 1
+        entry['total_ms'] += elapsed_ms
+        entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+        if failed:
+            entry['errors'] += 1
+
+    async def post(
+        self,
+        url: str,
+        endpoint: str,
+        cert: CertIdentity = None,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Execută un POST pe clientul partajat, cu timeout per endpoint și metrici.
+
+        Args:
+            url: URL-ul complet
+            endpoint: Numele endpoint-ului (pentru timeout și metrici)
+            cert: Identitatea certificatului (None pentru request-uri API)
+            **kwargs: Argumente transmise către httpx (headers, json, data)
+
+        Returns:
+            Răspunsul httpx
+        """
+        client = self.get_client(cert)
+        self._stats['requests'] += 1
+        failed = False
+        start = time.perf_counter()
+
+        try:
+            response = await client.post(
+                url,
+                timeout=self.timeout_for(endpoint),
+                extensions={"trace": self._trace},
+                **kwargs
+            )
+            if response.http_version == "HTTP/2":
+                self._stats['http2_responses'] += 1
+            return response
+        except Exception:
+            failed = True
+            self._stats['errors'] += 1
+            raise
+        finally:
+            self._record(endpoint, (time.perf_counter() - start) * 1000, failed)
+
+    async def release(self, cert: CertIdentity) -> None:
+        """Închide clientul unei identități de certificat (ex: la ștergerea fișierelor temp)."""
+        if cert is None:
+            return
+        client = self._clients.pop(cert, None)
+        if client and not client.is_closed:
+            await client.aclose()
+
+    async def aclose(self) -> None:
+        """Închide toți clienții - apelat la oprirea aplicației."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            if not client.is_closed:
+                await client.aclose()
+        logger.info(f"Betfair transport închis ({len(clients)} clienți)")
+
+    def get_stats(self) -> dict:
+        """Returnează metricile transportului (handshake-uri economisite, latențe)."""
+        endpoints = {}
+        for endpoint, entry in self._endpoint_stats.items():
+            endpoints[endpoint] = {
+                'count': int(entry['count']),
+                'errors': int(entry['errors']),
+                'avg_ms': round(entry['total_ms'] / entry['count'], 2) if entry['count'] else 0.0,
+                'max_ms': round(entry['max_ms'], 2)
+            }
+
+        return {
+            **self._stats,
+            'open_clients': len(self._clients),
+            'handshakes_saved': max(
+                self._stats['requests'] - self._stats['errors'] - self._stats['connections_opened'], 0
+            ),
+            'endpoints': endpoints
+        }
+
+
+# Singleton instance
+betfair_transport = BetfairTransport()
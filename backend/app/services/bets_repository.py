@@ -0,0 +1,540 @@
+"""
+Bets Repository - Meciurile programate și pariurile plasate, în database
+Bot-ul citește și scrie aici (query-uri indexate); Google Sheets primește aceleași
+modificări prin coada write-behind, doar pentru vizualizare.
+Query-urile sunt funcții pe conexiune, folosite de metodele sync și de variantele
+*_async (engine-ul asyncpg, prin AsyncConnection.run_sync - aceeași tranzacție).
+"""
+from sqlalchemy import bindparam, text
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+import logging
+import pytz
+
+from app.models.schemas import Team
+from app.services.user_stats_repository import apply_stats_delta, rebuild_stats
+from app.config import get_settings
+from app.database import get_engine, get_async_engine, ROLE_SCHEDULER
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def _to_float(value: Any) -> Optional[float]:
+    """Valoare din Sheets/Betfair -> float (None pentru gol / invalid)."""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def expected_settle_at(match_date: str) -> Optional[datetime]:
+    """
+    Momentul (UTC, fără tz) după care pariul poate fi settled: kickoff + results_settle_delay_minutes.
+    match_date e ora locală (bot_timezone) "YYYY-MM-DDTHH:MM"; None dacă nu poate fi parsat.
+    """
+    if not match_date:
+        return None
+    try:
+        kickoff = datetime.fromisoformat(str(match_date).strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if kickoff.tzinfo is None:
+        kickoff = pytz.timezone(settings.bot_timezone).localize(kickoff)
+    kickoff_utc = kickoff.astimezone(pytz.utc).replace(tzinfo=None)
+    return kickoff_utc + timedelta(minutes=settings.results_settle_delay_minutes)
+
+
+def _display(value: Optional[float]) -> Any:
+    """None -> "" (forma în care readerii din Sheets întorceau celulele goale)."""
+    return "" if value is None else value
+
+
+# ==================== QUERIES (pe conexiune) ====================
+
+def _teams_with_matches(conn, user_id: str) -> Set[str]:
+    result = conn.execute(text("""
+        SELECT DISTINCT team_name FROM scheduled_matches WHERE user_id = :user_id
+    """), {"user_id": user_id})
+    return {row.team_name for row in result}
+
+
+def _scheduled_matches(conn, user_id: str, team_name: str) -> List[dict]:
+    result = conn.execute(text("""
+        SELECT event_name, match_date, odds, competition
+        FROM scheduled_matches
+        WHERE user_id = :user_id AND team_name = :team_name AND status IN ('', 'PROGRAMAT')
+        ORDER BY match_date
+    """), {"user_id": user_id, "team_name": team_name})
+
+    return [{
+        "Meci": row.event_name,
+        "Data": row.match_date,
+        "Cotă": _display(row.odds),
+        "Competiție": row.competition or ""
+    } for row in result]
+
+
+def _pending_bets(conn, user_id: str, team_name: str = None) -> List[dict]:
+    query = """
+        SELECT team_name, event_name, match_date, odds, stake, bet_id
+        FROM bets
+        WHERE user_id = :user_id AND status = 'PENDING'
+    """
+    params: Dict[str, Any] = {"user_id": user_id}
+    if team_name:
+        query += " AND team_name = :team_name"
+        params["team_name"] = team_name
+
+    result = conn.execute(text(query + " ORDER BY placed_at"), params)
+    return [{
+        "team_name": row.team_name,
+        "Meci": row.event_name,
+        "Data": row.match_date,
+        "Cotă": row.odds,
+        "Miză": row.stake,
+        "Bet ID": row.bet_id,
+        "Status": "PENDING"
+    } for row in result]
+
+
+def _users_due_for_results(conn, user_ids: List[str], now: datetime) -> Set[str]:
+    result = conn.execute(text("""
+        SELECT DISTINCT user_id FROM bets
+        WHERE user_id IN :user_ids AND status = 'PENDING'
+          AND (expected_settle_at IS NULL OR expected_settle_at <= :now)
+    """).bindparams(bindparam("user_ids", expanding=True)), {"user_ids": user_ids, "now": now})
+    return {row.user_id for row in result}
+
+
+def _save_scheduled_matches(conn, user_id: str, team: Team, matches: List[dict]) -> int:
+    result = conn.execute(text("""
+        INSERT INTO scheduled_matches (
+            user_id, team_id, team_name, event_name, match_date, competition, odds, status
+        ) VALUES (
+            :user_id, :team_id, :team_name, :event_name, :match_date, :competition, :odds, 'PROGRAMAT'
+        )
+        ON CONFLICT (user_id, team_name, event_name, match_date) DO NOTHING
+    """), [{
+        "user_id": user_id,
+        "team_id": team.id,
+        "team_name": team.name,
+        "event_name": match.get("event_name", ""),
+        "match_date": match.get("start_time", "") or "",
+        "competition": match.get("competition", ""),
+        "odds": _to_float(match.get("odds"))
+    } for match in matches])
+    return result.rowcount
+
+
+def _record_bet(
+    conn,
+    user_id: str,
+    team: Team,
+    event_name: str,
+    match_date: str,
+    bet_id: str,
+    stake: float,
+    odds: float,
+    market_id: str = None,
+    selection_id: int = None
+) -> None:
+    inserted = conn.execute(text("""
+        INSERT INTO bets (
+            user_id, team_id, team_name, event_name, match_date, bet_id,
+            market_id, selection_id, stake, odds, status, expected_settle_at
+        ) VALUES (
+            :user_id, :team_id, :team_name, :event_name, :match_date, :bet_id,
+            :market_id, :selection_id, :stake, :odds, 'PENDING', :expected_settle_at
+        )
+        ON CONFLICT (bet_id) DO NOTHING
+    """), {
+        "user_id": user_id,
+        "team_id": team.id,
+        "team_name": team.name,
+        "event_name": event_name,
+        "match_date": match_date or "",
+        "bet_id": str(bet_id),
+        "market_id": market_id,
+        "selection_id": selection_id,
+        "stake": stake,
+        "odds": odds,
+        "expected_settle_at": expected_settle_at(match_date)
+    }).rowcount
+    if inserted:
+        apply_stats_delta(conn, user_id, team.name, total_bets=1, pending_bets=1, total_staked=stake)
+    conn.execute(text("""
+        UPDATE scheduled_matches
+        SET status = 'PENDING', stake = :stake, bet_id = :bet_id, updated_at = :now
+        WHERE user_id = :user_id AND team_name = :team_name
+          AND event_name = :event_name AND match_date = :match_date
+    """), {
+        "user_id": user_id,
+        "team_name": team.name,
+        "event_name": event_name,
+        "match_date": match_date or "",
+        "stake": stake,
+        "bet_id": str(bet_id),
+        "now": datetime.utcnow()
+    })
+
+
+def _mark_match_status(conn, user_id: str, team_name: str, event_name: str, match_date: str, status: str) -> bool:
+    result = conn.execute(text("""
+        UPDATE scheduled_matches
+        SET status = :status, updated_at = :now
+        WHERE user_id = :user_id AND team_name = :team_name
+          AND event_name = :event_name AND match_date = :match_date
+    """), {
+        "user_id": user_id,
+        "team_name": team_name,
+        "event_name": event_name,
+        "match_date": match_date or "",
+        "status": status,
+        "now": datetime.utcnow()
+    })
+    return result.rowcount > 0
+
+
+def _settle_bet(conn, user_id: str, bet_id: str, status: str, profit: float) -> bool:
+    now = datetime.utcnow()
+    result = conn.execute(text("""
+        UPDATE bets
+        SET status = :status, profit = :profit, settled_at = :now
+        WHERE user_id = :user_id AND bet_id = :bet_id AND status = 'PENDING'
+        RETURNING team_name, event_name, match_date
+    """), {"user_id": user_id, "bet_id": str(bet_id), "status": status, "profit": profit, "now": now})
+    row = result.fetchone()
+    if not row:
+        return False
+
+    apply_stats_delta(
+        conn, user_id, row.team_name,
+        pending_bets=-1,
+        won_bets=1 if status == "WON" else 0,
+        lost_bets=1 if status == "LOST" else 0,
+        total_profit=profit
+    )
+
+    conn.execute(text("""
+        UPDATE scheduled_matches
+        SET status = :status, profit = :profit, updated_at = :now
+        WHERE user_id = :user_id AND team_name = :team_name
+          AND event_name = :event_name AND match_date = :match_date
+    """), {
+        "user_id": user_id,
+        "team_name": row.team_name,
+        "event_name": row.event_name,
+        "match_date": row.match_date,
+        "status": status,
+        "profit": profit,
+        "now": now
+    })
+    return True
+
+
+def _settle_bet_and_progress(
+    conn,
+    user_id: str,
+    bet_id: str,
+    status: str,
+    profit: float,
+    team_id: Optional[str],
+    cumulative_loss: float,
+    progression_step: int
+) -> bool:
+    if not _settle_bet(conn, user_id, bet_id, status, profit):
+        return False
+    if team_id is None:
+        return True
+    conn.execute(text("""
+        UPDATE teams
+        SET cumulative_loss = :cumulative_loss, progression_step = :progression_step, updated_at = :now
+        WHERE id = :team_id AND user_id = :user_id
+    """), {
+        "team_id": team_id,
+        "user_id": user_id,
+        "cumulative_loss": cumulative_loss,
+        "progression_step": progression_step,
+        "now": datetime.utcnow()
+    })
+    return True
+
+
+def _snapshot_rows(user_id: str, teams: List[Team], snapshot) -> Tuple[List[dict], List[dict]]:
+    """Rândurile scheduled_matches / bets din snapshot-ul Sheets al userului."""
+    match_rows = []
+    bet_rows = []
+    for team in teams:
+        for match in snapshot.team_matches(team.name) or []:
+            event_name = str(match.get("Meci", "")).strip()
+            if not event_name:
+                continue
+            status = str(match.get("Status", "")).strip().upper() or "PROGRAMAT"
+            bet_id = str(match.get("Bet ID", "")).strip()
+            row = {
+                "user_id": user_id,
+                "team_id": team.id,
+                "team_name": team.name,
+                "event_name": event_name,
+                "match_date": str(match.get("Data", "")),
+                "competition": match.get("Competiție", ""),
+                "odds": _to_float(match.get("Cotă")),
+                "status": status,
+                "stake": _to_float(match.get("Miză")),
+                "profit": _to_float(match.get("Profit")),
+                "bet_id": bet_id or None
+            }
+            match_rows.append(row)
+            if bet_id and status in ("PENDING", "WON", "LOST"):
+                bet_rows.append({
+                    **row,
+                    "stake": row["stake"] or 0.0,
+                    "odds": row["odds"] or 0.0,
+                    "expected_settle_at": expected_settle_at(row["match_date"])
+                })
+    return match_rows, bet_rows
+
+
+def _import_rows(conn, user_id: str, match_rows: List[dict], bet_rows: List[dict]) -> int:
+    result = conn.execute(text("""
+        INSERT INTO scheduled_matches (
+            user_id, team_id, team_name, event_name, match_date, competition,
+            odds, status, stake, profit, bet_id
+        ) VALUES (
+            :user_id, :team_id, :team_name, :event_name, :match_date, :competition,
+            :odds, :status, :stake, :profit, :bet_id
+        )
+        ON CONFLICT (user_id, team_name, event_name, match_date) DO NOTHING
+    """), match_rows)
+    imported = result.rowcount
+
+    if bet_rows:
+        conn.execute(text("""
+            INSERT INTO bets (
+                user_id, team_id, team_name, event_name, match_date, bet_id,
+                stake, odds, status, profit, expected_settle_at
+            ) VALUES (
+                :user_id, :team_id, :team_name, :event_name, :match_date, :bet_id,
+                :stake, :odds, :status, :profit, :expected_settle_at
+            )
+            ON CONFLICT (bet_id) DO NOTHING
+        """), bet_rows)
+
+    # Pariurile importate nu au trecut prin record_bet / settle_bet
+    rebuild_stats(conn, user_id)
+
+    logger.info(f"Importate {imported} meciuri și {len(bet_rows)} pariuri din Sheets pentru user {user_id}")
+    return imported
+
+
+class BetsRepository:
+    """
+    Repository pentru tabelele scheduled_matches și bets
+    Metodele *_async rulează pe engine-ul asyncpg (pentru codul de pe event loop).
+    """
+
+    def __init__(self):
+        self.engine = get_engine(ROLE_SCHEDULER)
+
+    @property
+    def async_engine(self):
+        return get_async_engine(ROLE_SCHEDULER)
+
+    # ==================== READS ====================
+
+    def get_teams_with_matches(self, user_id: str) -> Set[str]:
+        """Echipele userului care au deja meciuri în database (restul se importă din Sheets)."""
+        with self.engine.connect() as conn:
+            return _teams_with_matches(conn, user_id)
+
+    async def get_teams_with_matches_async(self, user_id: str) -> Set[str]:
+        """get_teams_with_matches fără să blocheze event loop-ul"""
+        async with self.async_engine.connect() as conn:
+            return await conn.run_sync(_teams_with_matches, user_id)
+
+    def get_scheduled_matches(self, user_id: str, team_name: str) -> List[dict]:
+        """Meciurile fără pariu ale echipei, în forma get_scheduled_matches din Sheets."""
+        with self.engine.connect() as conn:
+            return _scheduled_matches(conn, user_id, team_name)
+
+    async def get_scheduled_matches_async(self, user_id: str, team_name: str) -> List[dict]:
+        """get_scheduled_matches fără să blocheze event loop-ul"""
+        async with self.async_engine.connect() as conn:
+            return await conn.run_sync(_scheduled_matches, user_id, team_name)
+
+    def get_pending_bets(self, user_id: str, team_name: str = None) -> List[dict]:
+        """Pariurile PENDING, în forma get_pending_bets din Sheets."""
+        with self.engine.connect() as conn:
+            return _pending_bets(conn, user_id, team_name)
+
+    async def get_pending_bets_async(self, user_id: str, team_name: str = None) -> List[dict]:
+        """get_pending_bets fără să blocheze event loop-ul"""
+        async with self.async_engine.connect() as conn:
+            return await conn.run_sync(_pending_bets, user_id, team_name)
+
+    def get_users_due_for_results(self, user_ids: Iterable[str], now: datetime = None) -> Set[str]:
+        """
+        Userii (din user_ids) pentru care verificarea rezultatelor are sens:
+        - au un pariu PENDING cu expected_settle_at trecut (sau necunoscut)
+        Importul din Sheets (userii fără meciuri în database) se face la rularea bot-ului,
+        nu aici - altfel userii fără meciuri ar fi verificați la fiecare rulare.
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+        with self.engine.connect() as conn:
+            return _users_due_for_results(conn, user_ids, now or datetime.utcnow())
+
+    async def get_users_due_for_results_async(self, user_ids: Iterable[str], now: datetime = None) -> Set[str]:
+        """get_users_due_for_results fără să blocheze event loop-ul"""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+        async with self.async_engine.connect() as conn:
+            return await conn.run_sync(_users_due_for_results, user_ids, now or datetime.utcnow())
+
+    # ==================== WRITES ====================
+
+    def save_scheduled_matches(self, user_id: str, team: Team, matches: List[dict]) -> int:
+        """
+        Salvează meciurile găsite pe Betfair (start_time, event_name, competition, odds).
+
+        Returns:
+            Numărul de meciuri noi
+        """
+        if not matches:
+            return 0
+        with self.engine.begin() as conn:
+            return _save_scheduled_matches(conn, user_id, team, matches)
+
+    async def save_scheduled_matches_async(self, user_id: str, team: Team, matches: List[dict]) -> int:
+        """save_scheduled_matches fără să blocheze event loop-ul"""
+        if not matches:
+            return 0
+        async with self.async_engine.begin() as conn:
+            return await conn.run_sync(_save_scheduled_matches, user_id, team, matches)
+
+    def record_bet(
+        self,
+        user_id: str,
+        team: Team,
+        event_name: str,
+        match_date: str,
+        bet_id: str,
+        stake: float,
+        odds: float,
+        market_id: str = None,
+        selection_id: int = None
+    ) -> bool:
+        """Înregistrează pariul plasat, marchează meciul PENDING și actualizează statisticile (o singură tranzacție)."""
+        try:
+            with self.engine.begin() as conn:
+                _record_bet(conn, user_id, team, event_name, match_date, bet_id, stake, odds, market_id, selection_id)
+            return True
+        except Exception as e:
+            logger.error(f"Eroare la salvarea pariului {bet_id} pentru {team.name}: {e}")
+            return False
+
+    async def record_bet_async(
+        self,
+        user_id: str,
+        team: Team,
+        event_name: str,
+        match_date: str,
+        bet_id: str,
+        stake: float,
+        odds: float,
+        market_id: str = None,
+        selection_id: int = None
+    ) -> bool:
+        """record_bet fără să blocheze event loop-ul"""
+        try:
+            async with self.async_engine.begin() as conn:
+                await conn.run_sync(
+                    _record_bet, user_id, team, event_name, match_date, bet_id, stake, odds, market_id, selection_id
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Eroare la salvarea pariului {bet_id} pentru {team.name}: {e}")
+            return False
+
+    def mark_match_status(self, user_id: str, team_name: str, event_name: str, match_date: str, status: str) -> bool:
+        """Schimbă statusul unui meci (ex: ERROR la plasare eșuată)."""
+        try:
+            with self.engine.begin() as conn:
+                return _mark_match_status(conn, user_id, team_name, event_name, match_date, status)
+        except Exception as e:
+            logger.error(f"Eroare la actualizarea meciului {event_name}: {e}")
+            return False
+
+    async def mark_match_status_async(self, user_id: str, team_name: str, event_name: str, match_date: str, status: str) -> bool:
+        """mark_match_status fără să blocheze event loop-ul"""
+        try:
+            async with self.async_engine.begin() as conn:
+                return await conn.run_sync(_mark_match_status, user_id, team_name, event_name, match_date, status)
+        except Exception as e:
+            logger.error(f"Eroare la actualizarea meciului {event_name}: {e}")
+            return False
+
+    def settle_bet(self, user_id: str, bet_id: str, status: str, profit: float) -> bool:
+        """
+        Marchează pariul WON/LOST (și meciul lui) și actualizează statisticile.
+
+        Returns:
+            True doar dacă pariul era PENDING - un rezultat nu e aplicat de două ori
+        """
+        with self.engine.begin() as conn:
+            return _settle_bet(conn, user_id, bet_id, status, profit)
+
+    async def settle_bet_and_progress_async(
+        self,
+        user_id: str,
+        bet_id: str,
+        status: str,
+        profit: float,
+        team_id: Optional[str],
+        cumulative_loss: float,
+        progression_step: int
+    ) -> bool:
+        """
+        settle_bet și noua progresie a echipei (cumulative_loss, progression_step) într-o
+        singură tranzacție: un pariu settled are mereu progresia aplicată.
+        team_id None = echipa a fost ștearsă, se marchează doar pariul.
+
+        Returns:
+            True doar dacă pariul era PENDING (altfel nimic nu e modificat)
+        """
+        async with self.async_engine.begin() as conn:
+            return await conn.run_sync(
+                _settle_bet_and_progress, user_id, bet_id, status, profit,
+                team_id, cumulative_loss, progression_step
+            )
+
+    def import_from_snapshot(self, user_id: str, teams: List[Team], snapshot) -> int:
+        """
+        Import inițial din Google Sheets (userii existenți înainte de tabelele din DB).
+        Rândurile deja existente nu sunt modificate.
+
+        Returns:
+            Numărul de meciuri importate
+        """
+        match_rows, bet_rows = _snapshot_rows(user_id, teams, snapshot)
+        if not match_rows:
+            return 0
+        with self.engine.begin() as conn:
+            return _import_rows(conn, user_id, match_rows, bet_rows)
+
+    async def import_from_snapshot_async(self, user_id: str, teams: List[Team], snapshot) -> int:
+        """import_from_snapshot fără să blocheze event loop-ul"""
+        match_rows, bet_rows = _snapshot_rows(user_id, teams, snapshot)
+        if not match_rows:
+            return 0
+        async with self.async_engine.begin() as conn:
+            return await conn.run_sync(_import_rows, user_id, match_rows, bet_rows)
+
+
+# Singleton instance
+bets_repository = BetsRepository()
@@ -86,7 +86,7 @@ class BotEngine:
                 total_profit = 0.0
 
                 try:
-                    sheet = google_sheets_client._spreadsheet.worksheet(team_name)
+                    sheet = google_sheets_client.get_worksheet(team_name)
                     all_records = sheet.get_all_records()
 
                     for match in all_records:
@@ -424,6 +424,8 @@ class BotEngine:
         try:
             from app.services.google_sheets import google_sheets_client
             from app.services.betfair_client import betfair_client
+            from app.services.event_catalogue import event_catalogue, team_search_terms
+            from app.services.market_data import market_data_service
             from datetime import date
 
             # Connect to Google Sheets
@@ -514,99 +516,24 @@ class BotEngine:
 
                     logger.info(f"Plasare pariu: {team_name} - {event_name} - Miză: {stake} @ {odds}")
 
-                    # Find market on Betfair and place bet
-                    # Extract main team name (remove FC, United, etc for better matching)
-                    search_terms = [team_name]
-                    # Try without common suffixes
-                    for suffix in [" FC", " United FC", " United"]:
-                        if team_name.endswith(suffix):
-                            search_terms.append(team_name[:-len(suffix)])
-
-                    events = None
-                    for search_term in search_terms:
-                        events = await betfair_client.list_events(
-                            event_type_id="1",
-                            text_query=search_term
-                        )
-                        if events:
-                            logger.info(f"Găsit evenimente cu search term: {search_term}")
-                            break
-
-                    if not events:
-                        logger.warning(f"Nu s-a găsit evenimentul pe Betfair: {event_name}")
-                        continue
-
-                    # Find matching event BY DATE
-                    # Extragem doar data (YYYY-MM-DD) din match_date_str pentru comparare
+                    # Find match on Betfair - lookup în catalogul global (by name + date)
                     match_date_only = match_date_str[:10] if match_date_str else ""  # "2025-11-29"
 
-                    event_id = None
-                    matched_event_name = None
-                    for ev in events:
-                        ev_data = ev.get("event", {})
-                        ev_name = ev_data.get("name", "")
-                        ev_open_date = ev_data.get("openDate", "")  # "2025-12-04T20:00:00.000Z"
-                        ev_date_only = ev_open_date[:10] if ev_open_date else ""  # "2025-12-04"
-
-                        # Verificăm dacă numele se potrivește ȘI data e aceeași
-                        name_matches = False
-                        for search_term in search_terms:
-                            if search_term.lower() in ev_name.lower():
-                                name_matches = True
-                                break
-
-                        if name_matches and ev_date_only == match_date_only:
-                            event_id = ev_data.get("id")
-                            matched_event_name = ev_name
-                            logger.info(f"Match găsit cu data corectă: {ev_name} (event_id: {event_id}, data: {ev_date_only})")
-                            break
-                        elif name_matches:
-                            logger.info(f"Eveniment găsit dar data nu se potrivește: {ev_name} (Betfair: {ev_date_only}, Sheets: {match_date_only})")
-
-                    if not event_id:
-                        logger.warning(f"Nu s-a găsit event_id pentru {team_name} cu data {match_date_only}")
+                    if not await market_data_service.ensure_catalogue(fallback_client=betfair_client):
+                        logger.warning(f"Catalog evenimente indisponibil - skip {team_name}")
                         continue
 
-                    # Get market
-                    markets = await betfair_client.list_market_catalogue(
-                        event_ids=[event_id],
-                        market_type_codes=["MATCH_ODDS"]
-                    )
-
-                    if not markets:
-                        logger.warning(f"Nu s-a găsit piața pentru {event_name}")
-                        continue
-
-                    market = markets[0]
-                    market_id = market.get("marketId", "")
-
-                    # Get selection ID - găsim runner-ul care conține numele echipei noastre
-                    runners = market.get("runners", [])
-                    if not runners:
-                        logger.warning(f"Nu s-au găsit runners pentru {event_name}")
+                    fixture = event_catalogue.find_fixture(team_search_terms(team_name), match_date_only)
+                    if not fixture:
+                        logger.warning(f"Nu s-a găsit meciul pe Betfair pentru {team_name} cu data {match_date_only}")
                         continue
 
-                    # Căutăm runner-ul echipei noastre (nu primul runner!)
-                    # IMPORTANT: Folosim match EXACT pentru a evita meciuri greșite (ex: Arsenal vs Arsenal Wolves)
-                    selection_id = None
-                    selected_runner_name = None
-                    for runner in runners:
-                        runner_name = runner.get("runnerName", "")
-                        # Verificăm dacă numele echipei se potrivește EXACT cu runner-ul
-                        for search_term in search_terms:
-                            if search_term.lower() == runner_name.lower():
-                                selection_id = str(runner.get("selectionId", ""))
-                                selected_runner_name = runner_name
-                                break
-                        if selection_id:
-                            break
-
-                    if not selection_id:
-                        logger.warning(f"Nu s-a găsit runner pentru echipa {team_name} în meciul {event_name}")
-                        logger.warning(f"  Runners disponibili: {[r.get('runnerName') for r in runners]}")
-                        continue
-
-                    logger.info(f"Selectat runner: {selected_runner_name} (ID: {selection_id}) pentru {team_name}")
+                    market_id = fixture["market_id"]
+                    selection_id = fixture["selection_id"]
+                    logger.info(
+                        f"Selectat runner: {fixture['runner_name']} (ID: {selection_id}) pentru {team_name} "
+                        f"- {fixture['event_name']} (event_id: {fixture['event_id']})"
+                    )
 
                     # Place bet
                     place_result = await betfair_client.place_bet(
@@ -716,8 +643,16 @@ class BotEngine:
                 results["message"] = "Nu s-a putut conecta la Betfair"
                 return results
 
-            # Get settled orders from Betfair (ultimele 3 zile pentru siguranță)
-            settled_orders = await betfair_client.get_settled_orders(days=3)
+            # Get settled orders from Betfair - doar cele finalizate de la checkpoint-ul anterior
+            from app.services.settlement_checkpoints import settlement_checkpoints, LEGACY_ACCOUNT_ID
+            checkpoint = await settlement_checkpoints.get_async(LEGACY_ACCOUNT_ID)
+            settled_orders = await betfair_client.get_cleared_orders_since(
+                settlement_checkpoints.window_start(checkpoint)
+            )
+            if settled_orders is None:
+                results["success"] = False
+                results["message"] = "Nu s-au putut citi ordinele finalizate de pe Betfair"
+                return results
 
             # Create a map of bet_id -> settled order
             settled_map = {}
@@ -726,7 +661,7 @@ class BotEngine:
                 if bet_id:
                     settled_map[bet_id] = order
 
-            logger.info(f"Găsite {len(settled_map)} ordine settled pe Betfair (ultimele 3 zile)")
+            logger.info(f"Găsite {len(settled_map)} ordine settled pe Betfair de la ultimul checkpoint")
 
             # Log detaliat pentru debugging
             if settled_orders:
@@ -787,6 +722,10 @@ class BotEngine:
                     else:
                         logger.warning(f"  → Pariul {bet_id} NU există nici în current orders! Posibil problemă.")
 
+            new_checkpoint = settlement_checkpoints.next_checkpoint(checkpoint, settled_orders)
+            if new_checkpoint:
+                await settlement_checkpoints.save_async(LEGACY_ACCOUNT_ID, new_checkpoint)
+
             results["message"] = f"Verificare completă: {results['won']} WIN, {results['lost']} LOST, {results['still_pending']} în așteptare"
 
         except Exception as e:
@@ -860,22 +799,37 @@ class BotEngine:
 
                     matches_to_add = []
 
-                    for event in events[:20]:
+                    # Skip reserve/youth teams
+                    candidate_events = [
+                        e for e in events[:20]
+                        if not any(kw in e.get("event", {}).get("name", "") for kw in skip_keywords)
+                    ]
+
+                    # Piețele și prețurile tuturor meciurilor - request-uri grupate, nu unul per meci
+                    event_ids = [e.get("event", {}).get("id") for e in candidate_events if e.get("event", {}).get("id")]
+                    all_markets = await betfair_client.list_market_catalogue(
+                        event_ids=event_ids,
+                        market_type_codes=["MATCH_ODDS"]
+                    ) if event_ids else []
+                    markets_by_event = {}
+                    for m in all_markets:
+                        markets_by_event.setdefault(m.get("event", {}).get("id", ""), []).append(m)
+
+                    market_ids = [m.get("marketId") for m in all_markets if m.get("marketId")]
+                    books_by_market = {
+                        b.get("marketId"): b
+                        for b in (await betfair_client.list_market_book(market_ids) if market_ids else [])
+                    }
+
+                    for event in candidate_events:
                         event_data = event.get("event", {})
                         event_id = event_data.get("id", "")
                         event_name = event_data.get("name", "")
 
-                        # Skip reserve/youth teams
-                        if any(kw in event_name for kw in skip_keywords):
-                            continue
-
                         # Get market info
                         if event_id:
                             try:
-                                markets = await betfair_client.list_market_catalogue(
-                                    event_ids=[event_id],
-                                    market_type_codes=["MATCH_ODDS"]
-                                )
+                                markets = markets_by_event.get(event_id, [])
 
                                 if markets:
                                     market = markets[0]
@@ -896,7 +850,7 @@ class BotEngine:
                                     # Get odds pentru echipa noastră (nu gazda!)
                                     odds = ""
                                     if market_id:
-                                        prices = await betfair_client.list_market_book([market_id])
+                                        prices = [books_by_market[market_id]] if market_id in books_by_market else []
                                         if prices and prices[0].get("runners"):
                                             price_runners = prices[0].get("runners", [])
                                             market_runners = market.get("runners", [])
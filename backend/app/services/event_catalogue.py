@@ -0,0 +1,257 @@
+"""
+Event Catalogue - Snapshot global al evenimentelor de fotbal de pe Betfair
+Încarcă o singură dată fereastra de 7 zile (listEvents + listMarketCatalogue MATCH_ODDS)
+și indexează meciurile după numele runner-ului și dată, astfel încât găsirea
+meciului unei echipe devine un lookup în memorie în loc de 1-3 request-uri textQuery.
+"""
+import asyncio
+import logging
+import time
+import unicodedata
+from typing import Dict, List, Optional, Set
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def normalize_name(name: str) -> str:
+    """Normalizează un nume de echipă pentru comparare (lowercase, fără diacritice, spații simple)."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(without_accents.lower().split())
+
+
+def team_search_terms(team_name: str) -> List[str]:
+    """Variantele de nume căutate pentru o echipă (cu și fără sufixe FC/United)."""
+    search_terms = [team_name]
+    for suffix in [" FC", " United FC", " United"]:
+        if team_name.endswith(suffix):
+            search_terms.append(team_name[:-len(suffix)])
+    return search_terms
+
+
+class EventCatalogue:
+    """
+    Cache în memorie cu toate meciurile de fotbal din următoarele 7 zile.
+
+    Refresh incremental: listEvents aduce lista completă de evenimente (1 request),
+    iar listMarketCatalogue se cere doar pentru evenimentele care nu au încă piața
+    MATCH_ODDS în catalog (inclusiv cele al căror fetch a eșuat la refresh-ul anterior).
+    """
+
+    FOOTBALL_EVENT_TYPE_ID = "1"
+
+    def __init__(self):
+        self._events: Dict[str, dict] = {}           # event_id -> listEvents entry
+        self._markets: Dict[str, dict] = {}          # event_id -> MATCH_ODDS catalogue
+        self._runner_index: Dict[str, Set[str]] = {}  # nume normalizat -> event_ids
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._stats = {
+            'refreshes': 0,
+            'refresh_failures': 0,
+            'catalogue_requests': 0,
+            'lookups': 0,
+            'lookup_hits': 0
+        }
+
+    def is_loaded(self) -> bool:
+        """True dacă există un snapshot încărcat."""
+        return self._loaded_at is not None and bool(self._events)
+
+    def is_fresh(self) -> bool:
+        """True dacă snapshot-ul e mai nou decât intervalul de refresh."""
+        if self._loaded_at is None:
+            return False
+        return time.monotonic() - self._loaded_at < settings.event_catalogue_refresh_minutes * 60
+
+    async def ensure_fresh(self, client) -> bool:
+        """
+        Reîmprospătează catalogul dacă e expirat.
+
+        Args:
+            client: BetfairClient conectat folosit pentru request-uri
+
+        Returns:
+            True dacă există un snapshot utilizabil
+        """
+        if self.is_fresh():
+            return True
+
+        async with self._lock:
+            # Alt caller a făcut refresh cât am așteptat lock-ul
+            if self.is_fresh():
+                return True
+            await self._refresh(client)
+
+        return self.is_loaded()
+
+    async def _refresh(self, client) -> None:
+        """Refresh incremental: evenimente noi -> catalogue, evenimente dispărute -> eliminate."""
+        try:
+            events = await client.list_events(event_type_id=self.FOOTBALL_EVENT_TYPE_ID)
+        except Exception as e:
+            logger.error(f"Eroare refresh catalog evenimente: {e}")
+            events = []
+
+        if not events:
+            # Păstrăm snapshot-ul vechi (dacă există) - mai bun decât nimic
+            self._stats['refresh_failures'] += 1
+            logger.warning("Catalog evenimente: listEvents nu a returnat nimic")
+            return
+
+        current = {e["event"]["id"]: e for e in events if e.get("event", {}).get("id")}
+
+        removed = [event_id for event_id in self._events if event_id not in current]
+        for event_id in removed:
+            self._drop_event(event_id)
+
+        new_ids = [event_id for event_id in current if event_id not in self._markets]
+        self._events.update(current)
+
+        if new_ids:
+            # Clientul împarte ID-urile în request-uri sub limita de weight Betfair
+            self._stats['catalogue_requests'] += 1
+            try:
+                markets = await client.list_market_catalogue(
+                    event_ids=new_ids,
+                    market_type_codes=["MATCH_ODDS"]
+                )
+            except Exception as e:
+                # Evenimentele rămân fără piață și sunt cerute din nou la următorul refresh
+                self._stats['refresh_failures'] += 1
+                logger.error(f"Eroare listMarketCatalogue pentru {len(new_ids)} evenimente noi: {e}")
+                return
+            for market in markets:
+                event_id = market.get("event", {}).get("id")
+                if event_id in self._events:
+                    self._add_market(event_id, market)
+
+        self._loaded_at = time.monotonic()
+        self._stats['refreshes'] += 1
+        logger.info(
+            f"Catalog evenimente actualizat: {len(self._events)} evenimente "
+            f"(+{len(new_ids)}, -{len(removed)}), {len(self._markets)} piețe MATCH_ODDS"
+        )
+
+    def _add_market(self, event_id: str, market: dict) -> None:
+        """Indexează piața MATCH_ODDS a unui eveniment după numele runner-ilor."""
+        self._markets[event_id] = market
+        for runner in market.get("runners", []):
+            key = normalize_name(runner.get("runnerName", ""))
+            if key:
+                self._runner_index.setdefault(key, set()).add(event_id)
+
+    def _drop_event(self, event_id: str) -> None:
+        """Elimină un eveniment (și intrările lui din index)."""
+        self._events.pop(event_id, None)
+        market = self._markets.pop(event_id, None)
+        if not market:
+            return
+        for runner in market.get("runners", []):
+            key = normalize_name(runner.get("runnerName", ""))
+            event_ids = self._runner_index.get(key)
+            if event_ids:
+                event_ids.discard(event_id)
+                if not event_ids:
+                    del self._runner_index[key]
+
+    def find_fixture(self, search_terms: List[str], match_date: str) -> Optional[dict]:
+        """
+        Găsește meciul unei echipe după nume (match EXACT pe runner) și dată.
+
+        Args:
+            search_terms: Variantele de nume ale echipei (vezi team_search_terms)
+            match_date: Data meciului, format YYYY-MM-DD (comparată cu openDate)
+
+        Returns:
+            dict cu event_id, event_name, market_id, selection_id, runner_name, market
+            sau None dacă nu există
+        """
+        self._stats['lookups'] += 1
+
+        for term in search_terms:
+            for event_id in self._runner_index.get(normalize_name(term), ()):
+                event = self._events.get(event_id, {}).get("event", {})
+                if (event.get("openDate") or "")[:10] != match_date:
+                    continue
+
+                market = self._markets[event_id]
+                for runner in market.get("runners", []):
+                    if normalize_name(runner.get("runnerName", "")) == normalize_name(term):
+                        self._stats['lookup_hits'] += 1
+                        return {
+                            "event_id": event_id,
+                            "event_name": event.get("name", ""),
+                            "open_date": event.get("openDate", ""),
+                            "market_id": market.get("marketId", ""),
+                            "selection_id": str(runner.get("selectionId", "")),
+                            "runner_name": runner.get("runnerName", ""),
+                            "market": market
+                        }
+
+        return None
+
+    def find_team_markets(self, search_terms: List[str]) -> List[dict]:
+        """
+        Toate piețele MATCH_ODDS viitoare în care joacă o echipă (match EXACT pe runner).
+
+        Returns:
+            Lista de dict cu market_id și open_date
+        """
+        found = {}
+        for term in search_terms:
+            for event_id in self._runner_index.get(normalize_name(term), ()):
+                market_id = self._markets.get(event_id, {}).get("marketId")
+                if market_id:
+                    found[market_id] = self._events.get(event_id, {}).get("event", {}).get("openDate", "")
+
+        return [{"market_id": m, "open_date": d} for m, d in found.items()]
+
+    def search_runners(self, query: str, skip_keywords: List[str] = None) -> Dict[str, str]:
+        """
+        Caută echipe (runners) al căror nume conține query-ul.
+
+        Args:
+            query: Text căutat
+            skip_keywords: Cuvinte care exclud meciul / runner-ul (rezerve, tineret)
+
+        Returns:
+            dict runner_name -> selection_id
+        """
+        skip_keywords = skip_keywords or []
+        needle = normalize_name(query)
+        found: Dict[str, str] = {}
+
+        for key, event_ids in self._runner_index.items():
+            if needle not in key:
+                continue
+            for event_id in event_ids:
+                event_name = self._events.get(event_id, {}).get("event", {}).get("name", "")
+                if any(kw in event_name for kw in skip_keywords):
+                    continue
+                for runner in self._markets[event_id].get("runners", []):
+                    runner_name = runner.get("runnerName", "")
+                    if normalize_name(runner_name) != key or runner_name in found:
+                        continue
+                    if any(kw in runner_name for kw in skip_keywords):
+                        continue
+                    found[runner_name] = str(runner.get("selectionId", ""))
+
+        return found
+
+    def get_stats(self) -> dict:
+        """Returnează metricile catalogului."""
+        return {
+            **self._stats,
+            'events': len(self._events),
+            'markets': len(self._markets),
+            'indexed_names': len(self._runner_index),
+            'age_seconds': round(time.monotonic() - self._loaded_at, 1) if self._loaded_at else None
+        }
+
+
+# Singleton instance
+event_catalogue = EventCatalogue()
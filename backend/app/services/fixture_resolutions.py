@@ -0,0 +1,106 @@
+"""
+Fixture Resolutions - event_id / market_id rezolvate pentru meciurile echipelor, în database
+Cheia e (selectionId Betfair al echipei, data meciului), deci rezultatul e partajat între
+rulări și între toți userii care urmăresc aceeași echipă: prima rulare care găsește meciul
+în catalog îl salvează, următoarele plasează pariul fără lookup.
+"""
+from sqlalchemy import text
+from typing import Optional
+from datetime import date, timedelta
+import logging
+
+from app.database import get_async_engine, ROLE_SCHEDULER
+
+logger = logging.getLogger(__name__)
+
+
+class FixtureResolutionRepository:
+    """Repository pentru tabela fixture_resolutions"""
+
+    def __init__(self):
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'saved': 0,
+            'invalidated': 0
+        }
+
+    @property
+    def engine(self):
+        return get_async_engine(ROLE_SCHEDULER)
+
+    async def get(self, selection_id: str, fixture_date: str) -> Optional[dict]:
+        """Meciul rezolvat (în forma întoarsă de event_catalogue.find_fixture) sau None."""
+        async with self.engine.connect() as conn:
+            result = await conn.execute(text("""
+                SELECT selection_id, event_id, event_name, market_id, runner_name
+                FROM fixture_resolutions
+                WHERE selection_id = :selection_id AND fixture_date = :fixture_date
+            """), {"selection_id": str(selection_id), "fixture_date": fixture_date})
+            row = result.fetchone()
+
+        if not row:
+            self._stats['misses'] += 1
+            return None
+
+        self._stats['hits'] += 1
+        return {
+            "event_id": row.event_id,
+            "event_name": row.event_name or "",
+            "market_id": row.market_id,
+            "selection_id": row.selection_id,
+            "runner_name": row.runner_name or ""
+        }
+
+    async def save(self, fixture_date: str, fixture: dict) -> None:
+        """Salvează meciul rezolvat (dacă altă rulare l-a salvat deja, rămâne cel existent)."""
+        async with self.engine.begin() as conn:
+            result = await conn.execute(text("""
+                INSERT INTO fixture_resolutions (
+                    selection_id, fixture_date, event_id, event_name, market_id, runner_name
+                ) VALUES (
+                    :selection_id, :fixture_date, :event_id, :event_name, :market_id, :runner_name
+                )
+                ON CONFLICT (selection_id, fixture_date) DO NOTHING
+            """), {
+                "selection_id": str(fixture["selection_id"]),
+                "fixture_date": fixture_date,
+                "event_id": str(fixture["event_id"]),
+                "event_name": fixture.get("event_name", ""),
+                "market_id": fixture["market_id"],
+                "runner_name": fixture.get("runner_name", "")
+            })
+            self._stats['saved'] += result.rowcount
+
+    async def invalidate(self, selection_id: str, fixture_date: str) -> None:
+        """Șterge rezolvarea (ex: plasarea pe piața salvată a eșuat)."""
+        async with self.engine.begin() as conn:
+            result = await conn.execute(text("""
+                DELETE FROM fixture_resolutions
+                WHERE selection_id = :selection_id AND fixture_date = :fixture_date
+            """), {"selection_id": str(selection_id), "fixture_date": fixture_date})
+            self._stats['invalidated'] += result.rowcount
+
+    async def purge(self, keep_days: int = 2) -> int:
+        """Șterge meciurile mai vechi de keep_days zile (după data meciului)."""
+        cutoff = (date.today() - timedelta(days=keep_days)).isoformat()
+        async with self.engine.begin() as conn:
+            result = await conn.execute(text("""
+                DELETE FROM fixture_resolutions WHERE fixture_date < :cutoff
+            """), {"cutoff": cutoff})
+            purged = result.rowcount
+
+        logger.info(f"Șterse {purged} rezolvări de meciuri anterioare datei {cutoff}")
+        return purged
+
+    def get_stats(self) -> dict:
+        """Metrici: hit rate-ul cache-ului de rezolvări."""
+        lookups = self._stats['hits'] + self._stats['misses']
+        return {
+            **self._stats,
+            'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else 0.0
+        }
+
+
+# Singleton instance
+fixture_resolutions = FixtureResolutionRepository()
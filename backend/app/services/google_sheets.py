@@ -2,6 +2,8 @@ import logging
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
+from app.services.sheets_handles import open_handle
+
 logger = logging.getLogger(__name__)
 
 
@@ -14,6 +16,7 @@ class GoogleSheetsClient:
     def __init__(self):
         self._client = None
         self._spreadsheet = None
+        self._handle = None  # worksheet-urile spreadsheet-ului, citite o singură dată
         self._spreadsheet_id: Optional[str] = None
         self._credentials_path: Optional[str] = None
         self._connected = False
@@ -65,7 +68,8 @@ class GoogleSheetsClient:
                 )
 
             self._client = gspread.authorize(credentials)
-            self._spreadsheet = self._client.open_by_key(self._spreadsheet_id)
+            self._handle = open_handle(self._client, self._spreadsheet_id)
+            self._spreadsheet = self._handle.spreadsheet
             self._connected = True
 
             logger.info(f"Conectat la Google Sheets: {self._spreadsheet.title}")
@@ -104,15 +108,30 @@ class GoogleSheetsClient:
         """Deconectează clientul."""
         self._client = None
         self._spreadsheet = None
+        self._handle = None
         self._connected = False
         logger.info("Deconectat de la Google Sheets")
 
+    def _worksheet(self, name: str) -> Any:
+        """Worksheet-ul din handle (fără request de metadate); WorksheetNotFound dacă lipsește."""
+        return self._handle.worksheet(name)
+
+    def get_worksheet(self, name: str) -> Any:
+        """Worksheet-ul cu numele dat (pentru apelanții din afara clientului)."""
+        return self._worksheet(name)
+
+    def _add_worksheet(self, title: str, rows: int, cols: int) -> Any:
+        """Creează worksheet-ul și îl adaugă în handle."""
+        worksheet = self._spreadsheet.add_worksheet(title=title, rows=rows, cols=cols)
+        self._handle.add(worksheet)
+        return worksheet
+
     def _get_or_create_worksheet(self, name: str, headers: List[str]) -> Any:
         """Obține sau creează un worksheet."""
         try:
-            worksheet = self._spreadsheet.worksheet(name)
+            worksheet = self._worksheet(name)
         except Exception:
-            worksheet = self._spreadsheet.add_worksheet(title=name, rows=1000, cols=len(headers))
+            worksheet = self._add_worksheet(name, rows=1000, cols=len(headers))
             worksheet.append_row(headers)
             logger.info(f"Worksheet creat: {name}")
         return worksheet
@@ -222,7 +241,7 @@ class GoogleSheetsClient:
         """Creează un sheet separat pentru o echipă."""
         try:
             try:
-                worksheet = self._spreadsheet.worksheet(team_name)
+                worksheet = self._worksheet(team_name)
                 logger.info(f"Sheet '{team_name}' există deja")
                 self._apply_status_formatting(worksheet)
                 return worksheet
@@ -230,7 +249,7 @@ class GoogleSheetsClient:
                 pass
 
             headers = ["Data", "Meci", "Competiție", "Cotă", "Miză", "Status", "Profit", "Bet ID"]
-            worksheet = self._spreadsheet.add_worksheet(title=team_name, rows=100, cols=len(headers))
+            worksheet = self._add_worksheet(team_name, rows=100, cols=len(headers))
             worksheet.append_row(headers)
             self._apply_status_formatting(worksheet)
 
@@ -350,7 +369,7 @@ class GoogleSheetsClient:
             return False
 
         try:
-            worksheet = self._spreadsheet.worksheet(team_name)
+            worksheet = self._worksheet(team_name)
 
             for match in matches:
                 # Check if match already exists (by event_name)
@@ -386,7 +405,7 @@ class GoogleSheetsClient:
             return False
 
         try:
-            worksheet = self._spreadsheet.worksheet("Index")
+            worksheet = self._worksheet("Index")
             cell = worksheet.find(team_name)
 
             if cell:
@@ -408,7 +427,7 @@ class GoogleSheetsClient:
             return False
 
         try:
-            worksheet = self._spreadsheet.worksheet("Index")
+            worksheet = self._worksheet("Index")
             cell = worksheet.find(team_name)
 
             if cell:
@@ -428,7 +447,7 @@ class GoogleSheetsClient:
             return False
 
         try:
-            worksheet = self._spreadsheet.worksheet("Index")
+            worksheet = self._worksheet("Index")
             cell = worksheet.find(team_name)
 
             if cell:
@@ -448,7 +467,7 @@ class GoogleSheetsClient:
             return False
 
         try:
-            worksheet = self._spreadsheet.worksheet(team_name)
+            worksheet = self._worksheet(team_name)
             cell = worksheet.find(event_name)
 
             if cell:
@@ -473,7 +492,7 @@ class GoogleSheetsClient:
             return []
 
         try:
-            worksheet = self._spreadsheet.worksheet(team_name)
+            worksheet = self._worksheet(team_name)
             records = worksheet.get_all_records()
 
             matches = []
@@ -496,7 +515,7 @@ class GoogleSheetsClient:
             return False
 
         try:
-            worksheet = self._spreadsheet.worksheet("Index")
+            worksheet = self._worksheet("Index")
             cell = worksheet.find(team_id)
 
             if cell:
@@ -508,8 +527,9 @@ class GoogleSheetsClient:
 
                 if team_name:
                     try:
-                        team_sheet = self._spreadsheet.worksheet(team_name)
+                        team_sheet = self._worksheet(team_name)
                         self._spreadsheet.del_worksheet(team_sheet)
+                        self._handle.remove(team_name)
                         logger.info(f"Sheet șters: {team_name}")
                     except Exception as e:
                         logger.warning(f"Nu s-a putut șterge sheet-ul {team_name}: {e}")
@@ -568,7 +588,7 @@ class GoogleSheetsClient:
             return []
 
         try:
-            worksheet = self._spreadsheet.worksheet("Istoric")
+            worksheet = self._worksheet("Istoric")
             records = worksheet.get_all_records()
 
             bets = []
@@ -602,7 +622,7 @@ class GoogleSheetsClient:
             # Dacă avem team_name specific, căutăm doar în acel sheet
             if team_name:
                 try:
-                    worksheet = self._spreadsheet.worksheet(team_name)
+                    worksheet = self._worksheet(team_name)
                     records = worksheet.get_all_records()
 
                     for record in records:
@@ -623,7 +643,7 @@ class GoogleSheetsClient:
                     continue
 
                 try:
-                    worksheet = self._spreadsheet.worksheet(t_name)
+                    worksheet = self._worksheet(t_name)
                     records = worksheet.get_all_records()
 
                     for record in records:
@@ -659,7 +679,7 @@ class GoogleSheetsClient:
             return False
 
         try:
-            worksheet = self._spreadsheet.worksheet(team_name)
+            worksheet = self._worksheet(team_name)
 
             # Find the row with this bet_id
             cell = worksheet.find(str(bet_id))
@@ -689,7 +709,7 @@ class GoogleSheetsClient:
             return False
 
         try:
-            worksheet = self._spreadsheet.worksheet("Index")
+            worksheet = self._worksheet("Index")
             cell = worksheet.find(team_name)
 
             if not cell:
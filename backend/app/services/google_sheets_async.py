@@ -0,0 +1,170 @@
+"""
+Google Sheets Async - Fațadă non-blocking peste GoogleSheetsMultiService
+gspread face I/O sincron; apelat direct din cod async blochează event loop-ul
+(bot-urile celorlalți useri, ping-urile WebSocket). Aici fiecare apel rulează pe
+un executor dedicat, limitat, cu timeout și anulare.
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.config import get_settings
+from app.services.sheets_rate_limiter import PRIORITY_BOT, PRIORITY_DASHBOARD, set_priority
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Prioritatea implicită per metodă (restul: PRIORITY_BOT); se poate da explicit cu priority=
+METHOD_PRIORITIES = {
+    'get_betting_stats': PRIORITY_DASHBOARD,
+    'get_spreadsheet': PRIORITY_DASHBOARD,
+}
+
+
+class AsyncSheetsService:
+    """
+    Versiunea async a GoogleSheetsMultiService.
+
+    Orice metodă publică a serviciului sincron e disponibilă cu același nume și
+    aceiași parametri, dar trebuie așteptată:
+
+        pending = await google_sheets_async_service.get_pending_bets(spreadsheet_id)
+
+    - cel mult sheets_max_workers apeluri gspread rulează simultan, restul așteaptă la coadă
+    - un apel anulat înainte să pornească nu mai ajunge la Google; unul deja pornit
+      se termină în thread, dar apelantul nu îl mai așteaptă
+    - sheets_call_timeout_seconds: după timeout apelantul primește asyncio.TimeoutError
+    - prioritatea (bot / dashboard / formatare) ajunge la rate limiter-ul quota-ului;
+      apelurile non-bot ocupă cel mult jumătate din thread-uri, ca un val de cereri
+      din dashboard să nu țină bot-ul la coadă
+    """
+
+    def __init__(self, sync_service: Any = None, max_workers: Optional[int] = None):
+        self._sync_service = sync_service
+        self._max_workers = max_workers or settings.sheets_max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._low_priority_slots = asyncio.Semaphore(max(self._max_workers // 2, 1))
+        self._in_flight = 0
+        self._stats = {
+            'calls': 0,
+            'errors': 0,
+            'timeouts': 0,
+            'cancelled': 0,
+            'max_call_seconds': 0.0
+        }
+
+    @property
+    def sync_service(self):
+        """Serviciul sincron (încărcat la primul apel, ca importul să nu ceară credențiale)."""
+        if self._sync_service is None:
+            from app.services.google_sheets_multi import google_sheets_multi_service
+            self._sync_service = google_sheets_multi_service
+        return self._sync_service
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers,
+                thread_name_prefix="sheets"
+            )
+        return self._executor
+
+    async def run(
+        self,
+        func: Callable,
+        *args,
+        timeout: Optional[float] = None,
+        priority: int = PRIORITY_BOT,
+        **kwargs
+    ) -> Any:
+        """
+        Rulează un apel sincron gspread pe executor-ul Sheets.
+
+        Args:
+            func: Funcția sincronă
+            timeout: Secunde (None = sheets_call_timeout_seconds, 0 = fără timeout)
+            priority: Clasa de prioritate pentru quota Sheets
+
+        Returns:
+            Rezultatul funcției
+        """
+        if priority == PRIORITY_BOT:
+            return await self._run(func, args, kwargs, timeout, priority)
+        async with self._low_priority_slots:
+            return await self._run(func, args, kwargs, timeout, priority)
+
+    async def _run(self, func: Callable, args: tuple, kwargs: dict, timeout: Optional[float], priority: int) -> Any:
+        if timeout is None:
+            timeout = settings.sheets_call_timeout_seconds
+
+        # Prioritatea e citită de QuotaHTTPClient din contextul thread-ului
+        context = contextvars.copy_context()
+        context.run(set_priority, priority)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._get_executor(),
+            functools.partial(context.run, func, *args, **kwargs)
+        )
+
+        self._stats['calls'] += 1
+        self._in_flight += 1
+        started = time.monotonic()
+        try:
+            if timeout:
+                return await asyncio.wait_for(future, timeout)
+            return await future
+        except asyncio.TimeoutError:
+            self._stats['timeouts'] += 1
+            logger.warning(f"Apel Sheets {getattr(func, '__name__', func)} a depășit {timeout}s")
+            raise
+        except asyncio.CancelledError:
+            self._stats['cancelled'] += 1
+            raise
+        except Exception:
+            self._stats['errors'] += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            elapsed = time.monotonic() - started
+            if elapsed > self._stats['max_call_seconds']:
+                self._stats['max_call_seconds'] = round(elapsed, 3)
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        method = getattr(self.sync_service, name)
+        if not callable(method):
+            return method
+
+        default_priority = METHOD_PRIORITIES.get(name, PRIORITY_BOT)
+
+        @functools.wraps(method)
+        async def call(*args, priority: int = default_priority, **kwargs):
+            return await self.run(method, *args, priority=priority, **kwargs)
+
+        return call
+
+    def shutdown(self) -> None:
+        """Oprește executor-ul - apelat la oprirea aplicației (apelurile din coadă sunt anulate)."""
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> dict:
+        """Returnează metricile apelurilor Sheets."""
+        return {
+            **self._stats,
+            'max_workers': self._max_workers,
+            'in_flight': self._in_flight,
+            'queued': max(self._in_flight - self._max_workers, 0)
+        }
+
+
+# Singleton instance
+google_sheets_async_service = AsyncSheetsService()
@@ -3,15 +3,36 @@ Google Sheets service for multi-user (SaaS)
 Each user gets their own dedicated spreadsheet
 """
 import gspread
+from gspread.utils import absolute_range_name
 from google.oauth2.service_account import Credentials
 from typing import Optional
 import logging
+import threading
 
 from app.config import get_settings
+from app.services.sheets_cache import CACHE_HANDLES, CACHE_ROWS, CACHE_SNAPSHOT, SheetsCache, invalidates
+from app.services.sheets_handles import SpreadsheetHandle, open_handle
+from app.services.sheets_snapshot import INDEX_SHEET, RowIndex, SpreadsheetSnapshot, appended_row, load_snapshot
+from app.services.sheets_rate_limiter import PRIORITY_BACKGROUND, QuotaHTTPClient, sheets_priority
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+SNAPSHOT_TTL = 60
+
+# Structura (sheet-urile, rândurile) se schimbă doar la adăugarea/ștergerea echipelor și
+# e ținută la zi de aplicație; recitită periodic pentru modificările făcute din afara ei
+STRUCTURE_TTL = 600
+
+# Lock-uri pentru încărcarea snapshot-ului / handle-ului (spreadsheet-urile împart un număr fix)
+LOAD_LOCK_STRIPES = 64
+
+# Coloanele din sheet-ul echipei (A=Data, B=Meci, C=Competiție, D=Cotă, E=Miză, F=Status, G=Profit, H=Bet ID)
+MATCH_COLUMNS = {'stake': 'E', 'status': 'F', 'profit_loss': 'G', 'bet_id': 'H'}
+
+# Coloanele din Index scrise de bot
+INDEX_COLUMNS = {'cumulative_loss': 'G', 'last_stake': 'H', 'progression_step': 'I'}
+
 # Google Sheets API scopes
 SCOPES = [
     'https://www.googleapis.com/auth/spreadsheets',
@@ -26,33 +47,86 @@ class GoogleSheetsMultiService:
         """Initialize Google Sheets client"""
         self.credentials = None
         self.client = None
-        self._cache: dict = {}
-        self._cache_timestamps: dict = {}
-        self._cache_ttl = 60  # Cache TTL in seconds
+        self.cache = SheetsCache(settings.sheets_cache_max_entries, default_ttl=SNAPSHOT_TTL)
+        # un singur load concurent per spreadsheet (reentrant: snapshot-ul cere handle-ul)
+        self._load_locks = [threading.RLock() for _ in range(LOAD_LOCK_STRIPES)]
         self._initialize_client()
 
-    def _get_cached(self, key: str):
-        """Get cached value if not expired."""
-        import time
-        if key in self._cache:
-            if time.time() - self._cache_timestamps.get(key, 0) < self._cache_ttl:
-                return self._cache[key]
-        return None
-
-    def _set_cached(self, key: str, value):
-        """Set cached value with timestamp."""
-        import time
-        self._cache[key] = value
-        self._cache_timestamps[key] = time.time()
-
-    def invalidate_cache(self, key: str = None):
-        """Invalidate cache for a specific key or all."""
-        if key:
-            self._cache.pop(key, None)
-            self._cache_timestamps.pop(key, None)
-        else:
-            self._cache.clear()
-            self._cache_timestamps.clear()
+    def get_snapshot(self, spreadsheet_id: str) -> SpreadsheetSnapshot:
+        """
+        Snapshot-ul spreadsheet-ului (Index + toate echipele), cu cache SNAPSHOT_TTL.
+        Un singur values_batch_get; titlurile sheet-urilor vin din handle-ul spreadsheet-ului.
+        """
+        snapshot = self.cache.get(spreadsheet_id, CACHE_SNAPSHOT)
+        if snapshot is not None:
+            return snapshot
+
+        with self._load_lock(spreadsheet_id):
+            snapshot = self.cache.get(spreadsheet_id, CACHE_SNAPSHOT)
+            if snapshot is None:
+                snapshot = self._load_snapshot(spreadsheet_id)
+                self.cache.set(spreadsheet_id, CACHE_SNAPSHOT, snapshot)
+                # Fiecare citire completă reface și numerele de rând
+                self.cache.set(spreadsheet_id, CACHE_ROWS, RowIndex(snapshot), ttl=STRUCTURE_TTL)
+            return snapshot
+
+    def _load_lock(self, spreadsheet_id: str) -> threading.RLock:
+        return self._load_locks[hash(spreadsheet_id) % LOAD_LOCK_STRIPES]
+
+    def get_handle(self, spreadsheet_id: str, refresh: bool = False) -> SpreadsheetHandle:
+        """
+        Spreadsheet-ul deschis + worksheet-urile lui (id, titlu), cache STRUCTURE_TTL.
+        Înlocuiește open_by_key / spreadsheet.worksheet(), care citesc metadatele la fiecare apel.
+        """
+        if refresh:
+            self.cache.invalidate(spreadsheet_id, CACHE_HANDLES)
+        handle = self.cache.get(spreadsheet_id, CACHE_HANDLES)
+        if handle is not None:
+            return handle
+
+        with self._load_lock(spreadsheet_id):
+            handle = self.cache.get(spreadsheet_id, CACHE_HANDLES)
+            if handle is None:
+                handle = open_handle(self.client, spreadsheet_id)
+                self.cache.set(spreadsheet_id, CACHE_HANDLES, handle, ttl=STRUCTURE_TTL)
+            return handle
+
+    def get_row_index(self, spreadsheet_id: str, refresh: bool = False) -> RowIndex:
+        """
+        Numerele de rând ale spreadsheet-ului (Index + sheet-urile echipelor).
+        Păstrate între scrieri; refresh=True recitește snapshot-ul.
+        """
+        if refresh:
+            self.cache.invalidate(spreadsheet_id, CACHE_SNAPSHOT, CACHE_ROWS)
+        rows = self.cache.get(spreadsheet_id, CACHE_ROWS)
+        if rows is None:
+            rows = RowIndex(self.get_snapshot(spreadsheet_id))
+            self.cache.set(spreadsheet_id, CACHE_ROWS, rows, ttl=STRUCTURE_TTL)
+        return rows
+
+    def _find_row(self, spreadsheet_id: str, lookup) -> Optional[int]:
+        """Rândul găsit de lookup(RowIndex); la ratare, o recitire (rând adăugat din afara aplicației)."""
+        row = lookup(self.get_row_index(spreadsheet_id))
+        if row is None:
+            row = lookup(self.get_row_index(spreadsheet_id, refresh=True))
+        return row
+
+    def _write_cells(self, spreadsheet_id: str, data: list) -> None:
+        """Un singur values_batch_update pentru range-uri A1 absolute."""
+        self.client.http_client.values_batch_update(
+            spreadsheet_id,
+            body={'valueInputOption': 'RAW', 'data': data}
+        )
+
+    def _load_snapshot(self, spreadsheet_id: str) -> SpreadsheetSnapshot:
+        """Citește snapshot-ul (titlurile din handle-ul din cache)."""
+        try:
+            return load_snapshot(self.client, spreadsheet_id, self.get_handle(spreadsheet_id).titles())
+        except gspread.exceptions.APIError as e:
+            # Un sheet redenumit/șters din afara aplicației - redeschidem spreadsheet-ul
+            logger.info(f"Snapshot cu titluri din cache eșuat ({e}) - recitire handle")
+            titles = self.get_handle(spreadsheet_id, refresh=True).titles()
+            return load_snapshot(self.client, spreadsheet_id, titles)
 
     def _initialize_client(self):
         """Initialize Google Sheets client with service account"""
@@ -61,7 +135,8 @@ class GoogleSheetsMultiService:
                 settings.google_sheets_credentials_path,
                 scopes=SCOPES
             )
-            self.client = gspread.authorize(self.credentials)
+            # Toate request-urile trec prin quota comună a service account-ului
+            self.client = gspread.authorize(self.credentials, http_client=QuotaHTTPClient)
             logger.info("Google Sheets client initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Google Sheets client: {e}")
@@ -161,11 +236,12 @@ class GoogleSheetsMultiService:
             worksheet.update('A1:P1', [headers])
 
             # Format header row
-            worksheet.format('A1:P1', {
-                "backgroundColor": {"red": 0.2, "green": 0.4, "blue": 0.8},
-                "textFormat": {"bold": True, "foregroundColor": {"red": 1, "green": 1, "blue": 1}},
-                "horizontalAlignment": "CENTER"
-            })
+            with sheets_priority(PRIORITY_BACKGROUND):
+                worksheet.format('A1:P1', {
+                    "backgroundColor": {"red": 0.2, "green": 0.4, "blue": 0.8},
+                    "textFormat": {"bold": True, "foregroundColor": {"red": 1, "green": 1, "blue": 1}},
+                    "horizontalAlignment": "CENTER"
+                })
 
             logger.info(f"Setup structure for spreadsheet: {spreadsheet.id}")
 
@@ -184,11 +260,12 @@ class GoogleSheetsMultiService:
             gspread Spreadsheet object
         """
         try:
-            return self.client.open_by_key(spreadsheet_id)
+            return self.get_handle(spreadsheet_id).spreadsheet
         except Exception as e:
             logger.error(f"Failed to open spreadsheet {spreadsheet_id}: {e}")
             raise
 
+    @invalidates(CACHE_SNAPSHOT)
     def add_team_sheet(self, spreadsheet_id: str, team_name: str) -> bool:
         """
         Add a new sheet for a team
@@ -201,18 +278,19 @@ class GoogleSheetsMultiService:
             True if successful
         """
         try:
-            spreadsheet = self.get_spreadsheet(spreadsheet_id)
+            handle = self.get_handle(spreadsheet_id)
 
-            # Check if sheet already exists
+            # Check if sheet already exists (din handle, fără request)
             try:
-                spreadsheet.worksheet(team_name)
+                handle.worksheet(team_name)
                 logger.info(f"Sheet '{team_name}' already exists")
                 return True
             except gspread.exceptions.WorksheetNotFound:
                 pass
 
             # Create new sheet
-            worksheet = spreadsheet.add_worksheet(title=team_name, rows=1000, cols=20)
+            worksheet = handle.spreadsheet.add_worksheet(title=team_name, rows=1000, cols=20)
+            handle.add(worksheet)
 
             # Setup headers for team sheet (same order as PARIURI)
             headers = [
@@ -228,20 +306,28 @@ class GoogleSheetsMultiService:
 
             worksheet.update('A1:H1', [headers])
 
+            rows = self.cache.get(spreadsheet_id, CACHE_ROWS)
+            if rows:
+                rows.add_sheet(team_name)
+
             # Format header row
-            worksheet.format('A1:H1', {
-                "backgroundColor": {"red": 0.2, "green": 0.6, "blue": 0.4},
-                "textFormat": {"bold": True, "foregroundColor": {"red": 1, "green": 1, "blue": 1}},
-                "horizontalAlignment": "CENTER"
-            })
+            with sheets_priority(PRIORITY_BACKGROUND):
+                worksheet.format('A1:H1', {
+                    "backgroundColor": {"red": 0.2, "green": 0.6, "blue": 0.4},
+                    "textFormat": {"bold": True, "foregroundColor": {"red": 1, "green": 1, "blue": 1}},
+                    "horizontalAlignment": "CENTER"
+                })
 
             logger.info(f"Created sheet '{team_name}' in spreadsheet {spreadsheet_id}")
             return True
 
         except Exception as e:
+            # Sheet-ul poate exista deși add_worksheet a dat eroare
+            self.cache.invalidate(spreadsheet_id, CACHE_HANDLES)
             logger.error(f"Failed to add team sheet '{team_name}': {e}")
             return False
 
+    @invalidates(CACHE_SNAPSHOT)
     def update_team_in_index(
         self,
         spreadsheet_id: str,
@@ -260,18 +346,8 @@ class GoogleSheetsMultiService:
             True if successful
         """
         try:
-            spreadsheet = self.get_spreadsheet(spreadsheet_id)
-            index_sheet = spreadsheet.worksheet("Index")
-
-            # Get all records
-            records = index_sheet.get_all_records()
-
-            # Find row with team_id
-            row_index = None
-            for i, record in enumerate(records, start=2):  # Start from row 2 (after header)
-                if record.get('id') == team_id:
-                    row_index = i
-                    break
+            # Row with team_id (din row index, fără citirea întregului Index)
+            row_index = self._find_row(spreadsheet_id, lambda rows: rows.team_id_row(team_id))
 
             # Prepare row data
             row_data = [
@@ -292,14 +368,24 @@ class GoogleSheetsMultiService:
 
             if row_index:
                 # Update existing row
-                index_sheet.update(f'A{row_index}:M{row_index}', [row_data])
+                self._write_cells(spreadsheet_id, [
+                    {'range': absolute_range_name(INDEX_SHEET, f'A{row_index}:M{row_index}'), 'values': [row_data]}
+                ])
                 logger.info(f"Updated team {team_id} in Index")
             else:
                 # Append new row
-                index_sheet.append_row(row_data)
+                response = self.client.http_client.values_append(
+                    spreadsheet_id,
+                    absolute_range_name(INDEX_SHEET),
+                    params={'valueInputOption': 'RAW', 'insertDataOption': 'INSERT_ROWS'},
+                    body={'values': [row_data]}
+                )
+                new_row = appended_row(response)
+                rows = self.cache.get(spreadsheet_id, CACHE_ROWS)
+                if rows and new_row:
+                    rows.add_team(row_data[0], row_data[1], new_row)
                 logger.info(f"Added team {team_id} to Index")
 
-            self.invalidate_cache(f"index_{spreadsheet_id}")
             return True
 
         except Exception as e:
@@ -308,7 +394,7 @@ class GoogleSheetsMultiService:
 
     def load_team(self, spreadsheet_id: str, team_name: str) -> Optional[dict]:
         """
-        Load team data from Index sheet (cu cache 60s)
+        Load team data from Index sheet (din snapshot, cache SNAPSHOT_TTL)
 
         Args:
             spreadsheet_id: User's spreadsheet ID
@@ -318,26 +404,17 @@ class GoogleSheetsMultiService:
             Team data dict or None
         """
         try:
-            cache_key = f"index_{spreadsheet_id}"
-            records = self._get_cached(cache_key)
-
-            if records is None:
-                spreadsheet = self.client.open_by_key(spreadsheet_id)
-                index_sheet = spreadsheet.worksheet("Index")
-                records = index_sheet.get_all_records()
-                self._set_cached(cache_key, records)
-
-            for record in records:
-                if record.get("name") == team_name:
-                    return {
-                        "id": str(record.get("id", "")),
-                        "name": record.get("name", ""),
-                        "cumulative_loss": float(record.get("cumulative_loss", 0)),
-                        "progression_step": int(record.get("progression_step", 0)),
-                        "last_stake": float(record.get("last_stake", 100)),
-                        "initial_stake": float(record.get("initial_stake", 100)),
-                        "status": record.get("status", "active")
-                    }
+            record = self.get_snapshot(spreadsheet_id).index_record(team_name)
+            if record:
+                return {
+                    "id": str(record.get("id", "")),
+                    "name": record.get("name", ""),
+                    "cumulative_loss": float(record.get("cumulative_loss", 0)),
+                    "progression_step": int(record.get("progression_step", 0)),
+                    "last_stake": float(record.get("last_stake", 100)),
+                    "initial_stake": float(record.get("initial_stake", 100)),
+                    "status": record.get("status", "active")
+                }
 
             return None
 
@@ -347,7 +424,7 @@ class GoogleSheetsMultiService:
 
     def get_pending_bets(self, spreadsheet_id: str, team_name: str = None) -> list:
         """
-        Get pending bets from all team sheets or specific team (cu cache 60s pentru Index)
+        Get pending bets from all team sheets or specific team (din snapshot, cache SNAPSHOT_TTL)
 
         Args:
             spreadsheet_id: User's spreadsheet ID
@@ -357,48 +434,32 @@ class GoogleSheetsMultiService:
             List of pending bets
         """
         try:
-            spreadsheet = self.client.open_by_key(spreadsheet_id)
-
-            cache_key = f"index_{spreadsheet_id}"
-            teams = self._get_cached(cache_key)
-            if teams is None:
-                index_sheet = spreadsheet.worksheet("Index")
-                teams = index_sheet.get_all_records()
-                self._set_cached(cache_key, teams)
+            snapshot = self.get_snapshot(spreadsheet_id)
 
             pending_bets = []
 
-            for team_record in teams:
-                t_name = team_record.get("name", "")
+            for t_name in snapshot.team_names():
                 if team_name and t_name != team_name:
                     continue
 
-                try:
-                    # Cache team sheet reads to avoid rate limits
-                    team_cache_key = f"team_sheet_{spreadsheet_id}_{t_name}"
-                    matches = self._get_cached(team_cache_key)
-
-                    if matches is None:
-                        team_sheet = spreadsheet.worksheet(t_name)
-                        matches = team_sheet.get_all_records()
-                        self._set_cached(team_cache_key, matches)
-
-                    for match in matches:
-                        status = str(match.get("Status", "")).strip().upper()
-                        if status == "PENDING":
-                            pending_bets.append({
-                                "team_name": t_name,
-                                "Meci": match.get("Meci", ""),
-                                "Data": match.get("Data", ""),
-                                "Cotă": match.get("Cotă", ""),
-                                "Miză": match.get("Miză", ""),
-                                "Bet ID": match.get("Bet ID", ""),
-                                "Status": status
-                            })
-                except Exception as e:
-                    logger.warning(f"Could not read team sheet {t_name}: {e}")
+                matches = snapshot.team_matches(t_name)
+                if matches is None:
+                    logger.warning(f"Could not read team sheet {t_name}: sheet not found")
                     continue
 
+                for match in matches:
+                    status = str(match.get("Status", "")).strip().upper()
+                    if status == "PENDING":
+                        pending_bets.append({
+                            "team_name": t_name,
+                            "Meci": match.get("Meci", ""),
+                            "Data": match.get("Data", ""),
+                            "Cotă": match.get("Cotă", ""),
+                            "Miză": match.get("Miză", ""),
+                            "Bet ID": match.get("Bet ID", ""),
+                            "Status": status
+                        })
+
             return pending_bets
 
         except Exception as e:
@@ -407,7 +468,7 @@ class GoogleSheetsMultiService:
 
     def get_scheduled_matches(self, spreadsheet_id: str, team_name: str) -> list:
         """
-        Get scheduled matches (without status) from team sheet (cu cache 60s)
+        Get scheduled matches (without status) from team sheet (din snapshot, cache SNAPSHOT_TTL)
 
         Args:
             spreadsheet_id: User's spreadsheet ID
@@ -417,14 +478,10 @@ class GoogleSheetsMultiService:
             List of scheduled matches
         """
         try:
-            cache_key = f"matches_{spreadsheet_id}_{team_name}"
-            matches = self._get_cached(cache_key)
-
+            matches = self.get_snapshot(spreadsheet_id).team_matches(team_name)
             if matches is None:
-                spreadsheet = self.client.open_by_key(spreadsheet_id)
-                team_sheet = spreadsheet.worksheet(team_name)
-                matches = team_sheet.get_all_records()
-                self._set_cached(cache_key, matches)
+                logger.error(f"Error getting scheduled matches for {team_name}: sheet not found")
+                return []
 
             scheduled = []
             for match in matches:
@@ -444,6 +501,7 @@ class GoogleSheetsMultiService:
             logger.error(f"Error getting scheduled matches for {team_name}: {e}")
             return []
 
+    @invalidates(CACHE_SNAPSHOT)
     def update_match_status(
         self,
         spreadsheet_id: str,
@@ -452,7 +510,8 @@ class GoogleSheetsMultiService:
         status: str,
         stake: float = None,
         profit_loss: float = None,
-        bet_id: str = None
+        bet_id: str = None,
+        match_date: str = None
     ) -> bool:
         """
         Update match status in team sheet
@@ -465,36 +524,27 @@ class GoogleSheetsMultiService:
             stake: Stake amount
             profit_loss: Profit or loss amount
             bet_id: Betfair bet ID
+            match_date: Data meciului (alege rândul când meciul apare de mai multe ori)
 
         Returns:
             Success boolean
         """
         try:
-            spreadsheet = self.client.open_by_key(spreadsheet_id)
-            team_sheet = spreadsheet.worksheet(team_name)
-
-            # Find the row with this match
-            cell = team_sheet.find(event_name)
-            if not cell:
+            # Find the row with this match (row index, fără find() pe tot sheet-ul)
+            row = self._find_row(spreadsheet_id, lambda rows: rows.match_row(team_name, event_name, match_date))
+            if not row:
                 logger.warning(f"Match {event_name} not found in {team_name} sheet")
                 return False
 
-            row = cell.row
-
             # Update columns (A=Data, B=Meci, C=Competiție, D=Cotă, E=Miză, F=Status, G=Profit, H=Bet ID)
-            updates = []
-            if stake is not None:
-                updates.append({'range': f'E{row}', 'values': [[stake]]})  # Miză column (E)
-            if status:
-                updates.append({'range': f'F{row}', 'values': [[status]]})  # Status column (F)
-            if profit_loss is not None:
-                updates.append({'range': f'G{row}', 'values': [[profit_loss]]})  # Profit column (G)
-            if bet_id:
-                updates.append({'range': f'H{row}', 'values': [[bet_id]]})  # Bet ID column (H)
+            fields = {'stake': stake, 'status': status or None, 'profit_loss': profit_loss, 'bet_id': bet_id or None}
+            updates = [
+                {'range': absolute_range_name(team_name, f'{MATCH_COLUMNS[field]}{row}'), 'values': [[value]]}
+                for field, value in fields.items() if value is not None
+            ]
 
             if updates:
-                team_sheet.batch_update(updates)
-                self.invalidate_cache(f"matches_{spreadsheet_id}_{team_name}")
+                self._write_cells(spreadsheet_id, updates)
                 logger.info(f"Updated match {event_name} in {team_name}: status={status}")
                 return True
 
@@ -504,6 +554,7 @@ class GoogleSheetsMultiService:
             logger.error(f"Error updating match status: {e}")
             return False
 
+    @invalidates(CACHE_SNAPSHOT)
     def update_team_progression(
         self,
         spreadsheet_id: str,
@@ -529,42 +580,41 @@ class GoogleSheetsMultiService:
             Success boolean
         """
         try:
-            spreadsheet = self.client.open_by_key(spreadsheet_id)
-            index_sheet = spreadsheet.worksheet("Index")
-
-            # Find the row with this team
-            cell = index_sheet.find(team_name)
-            if not cell:
+            # Find the row with this team (row index)
+            row = self._find_row(spreadsheet_id, lambda rows: rows.team_row(team_name))
+            if not row:
                 logger.warning(f"Team {team_name} not found in Index")
                 return False
 
-            row = cell.row
-
             # Update cumulative_loss (column G) and progression_step (column I)
             updates = [
-                {'range': f'G{row}', 'values': [[cumulative_loss]]},
-                {'range': f'I{row}', 'values': [[progression_step]]}
+                {'range': absolute_range_name(INDEX_SHEET, f'G{row}'), 'values': [[cumulative_loss]]},
+                {'range': absolute_range_name(INDEX_SHEET, f'I{row}'), 'values': [[progression_step]]}
             ]
 
             # Actualizare statistici dacă won e specificat
             if won is not None:
-                row_values = index_sheet.row_values(row)
-                current_total_matches = int(row_values[13]) if len(row_values) > 13 and row_values[13] else 0
-                current_matches_won = int(row_values[14]) if len(row_values) > 14 and row_values[14] else 0
-                current_total_profit = float(row_values[15]) if len(row_values) > 15 and row_values[15] else 0
+                # Valorile curente N:P (total_matches, matches_won, total_profit) ale rândului
+                response = self.client.http_client.values_get(
+                    spreadsheet_id,
+                    absolute_range_name(INDEX_SHEET, f'N{row}:P{row}')
+                )
+                row_values = (response.get('values') or [[]])[0]
+                current_total_matches = int(row_values[0]) if len(row_values) > 0 and row_values[0] else 0
+                current_matches_won = int(row_values[1]) if len(row_values) > 1 and row_values[1] else 0
+                current_total_profit = float(row_values[2]) if len(row_values) > 2 and row_values[2] else 0
 
                 new_total_matches = current_total_matches + 1
                 new_matches_won = current_matches_won + (1 if won else 0)
                 new_total_profit = current_total_profit + profit
 
                 updates.extend([
-                    {'range': f'N{row}', 'values': [[new_total_matches]]},
-                    {'range': f'O{row}', 'values': [[new_matches_won]]},
-                    {'range': f'P{row}', 'values': [[new_total_profit]]}
+                    {'range': absolute_range_name(INDEX_SHEET, f'N{row}'), 'values': [[new_total_matches]]},
+                    {'range': absolute_range_name(INDEX_SHEET, f'O{row}'), 'values': [[new_matches_won]]},
+                    {'range': absolute_range_name(INDEX_SHEET, f'P{row}'), 'values': [[new_total_profit]]}
                 ])
 
-            index_sheet.batch_update(updates)
-            self.invalidate_cache(f"teams_{spreadsheet_id}")
+            self._write_cells(spreadsheet_id, updates)
             logger.info(f"Updated {team_name} progression: loss={cumulative_loss}, step={progression_step}")
             return True
 
@@ -572,6 +622,7 @@ class GoogleSheetsMultiService:
             logger.error(f"Error updating team progression: {e}")
             return False
 
+    @invalidates(CACHE_SNAPSHOT)
     def update_last_stake(self, spreadsheet_id: str, team_name: str, stake: float) -> bool:
         """
         Update last_stake in Index sheet
@@ -585,19 +636,16 @@ class GoogleSheetsMultiService:
             Success boolean
         """
         try:
-            spreadsheet = self.client.open_by_key(spreadsheet_id)
-            index_sheet = spreadsheet.worksheet("Index")
-
-            # Find the row with this team
-            cell = index_sheet.find(team_name)
-            if not cell:
+            # Find the row with this team (row index)
+            row = self._find_row(spreadsheet_id, lambda rows: rows.team_row(team_name))
+            if not row:
                 logger.warning(f"Team {team_name} not found in Index")
                 return False
 
-            row = cell.row
-
             # Update last_stake (column H)
-            index_sheet.update(f'H{row}', [[stake]])
+            self._write_cells(spreadsheet_id, [
+                {'range': absolute_range_name(INDEX_SHEET, f'H{row}'), 'values': [[stake]]}
+            ])
             logger.info(f"Updated {team_name} last_stake: {stake}")
             return True
 
@@ -605,6 +653,77 @@ class GoogleSheetsMultiService:
             logger.error(f"Error updating last_stake: {e}")
             return False
 
+    @invalidates(CACHE_SNAPSHOT)
+    def apply_sheet_writes(self, spreadsheet_id: str, match_writes: list, team_writes: list) -> int:
+        """
+        Aplică scrierile coalescate din coada write-behind: rândurile din row index +
+        un singur values_batch_update pentru toate celulele.
+        Spre deosebire de celelalte metode, erorile API sunt propagate (coada decide retry-ul).
+
+        Args:
+            spreadsheet_id: User's spreadsheet ID
+            match_writes: [{'team_name', 'event_name', 'match_date', 'fields': {stake, status, profit_loss, bet_id}}]
+            team_writes: [{'team_name', 'fields': {cumulative_loss, last_stake, progression_step},
+                           'matches', 'won', 'profit'}]
+
+        Returns:
+            Numărul de celule scrise
+        """
+        snapshot = None
+        if any(write.get('matches') for write in team_writes):
+            # Statisticile se incrementează - au nevoie de valorile curente (snapshot proaspăt)
+            self.cache.invalidate(spreadsheet_id, CACHE_SNAPSHOT)
+            snapshot = self.get_snapshot(spreadsheet_id)
+
+        def lookup(rows: RowIndex, write: dict) -> Optional[int]:
+            if 'event_name' in write:
+                return rows.match_row(write['team_name'], write['event_name'], write.get('match_date'))
+            return rows.team_row(write['team_name'])
+
+        rows = self.get_row_index(spreadsheet_id)
+        if any(lookup(rows, write) is None for write in match_writes + team_writes):
+            rows = self.get_row_index(spreadsheet_id, refresh=True)
+            snapshot = self.get_snapshot(spreadsheet_id) if snapshot else None
+
+        data = []
+
+        for write in match_writes:
+            t_name = write['team_name']
+            row = lookup(rows, write)
+            if row is None:
+                logger.warning(f"Match {write['event_name']} not found in {t_name} sheet")
+                continue
+            for field, value in write['fields'].items():
+                data.append({'range': absolute_range_name(t_name, f'{MATCH_COLUMNS[field]}{row}'), 'values': [[value]]})
+
+        for write in team_writes:
+            t_name = write['team_name']
+            row = lookup(rows, write)
+            if row is None:
+                logger.warning(f"Team {t_name} not found in Index")
+                continue
+            for field, value in write['fields'].items():
+                data.append({'range': absolute_range_name(INDEX_SHEET, f'{INDEX_COLUMNS[field]}{row}'), 'values': [[value]]})
+
+            if write.get('matches'):
+                # Statistici (N=total_matches, O=matches_won, P=total_profit) - incrementate
+                record = snapshot.index_record(t_name) or {}
+                total_matches = int(record.get("total_matches") or 0) + write['matches']
+                matches_won = int(record.get("matches_won") or 0) + write['won']
+                total_profit = float(record.get("total_profit") or 0) + write['profit']
+                data.extend([
+                    {'range': absolute_range_name(INDEX_SHEET, f'N{row}'), 'values': [[total_matches]]},
+                    {'range': absolute_range_name(INDEX_SHEET, f'O{row}'), 'values': [[matches_won]]},
+                    {'range': absolute_range_name(INDEX_SHEET, f'P{row}'), 'values': [[total_profit]]}
+                ])
+
+        if data:
+            self._write_cells(spreadsheet_id, data)
+            logger.info(f"Applied {len(match_writes)} match / {len(team_writes)} team writes in {len(data)} cells")
+
+        return len(data)
+
+    @invalidates(CACHE_SNAPSHOT)
     def save_match_for_team(
         self,
         spreadsheet_id: str,
@@ -623,9 +742,6 @@ class GoogleSheetsMultiService:
             Success boolean
         """
         try:
-            spreadsheet = self.client.open_by_key(spreadsheet_id)
-            team_sheet = spreadsheet.worksheet(team_name)
-
             # Append new row (A=Data, B=Meci, C=Competiție, D=Cotă, E=Miză, F=Status, G=Profit, H=Bet ID)
             row = [
                 match_data.get('start_time', ''),      # A: Data
@@ -638,7 +754,19 @@ class GoogleSheetsMultiService:
                 ''                                      # H: Bet ID (empty - filled when bet placed)
             ]
 
-            team_sheet.append_row(row)
+            response = self.client.http_client.values_append(
+                spreadsheet_id,
+                absolute_range_name(team_name),
+                params={'valueInputOption': 'RAW', 'insertDataOption': 'INSERT_ROWS'},
+                body={'values': [row]}
+            )
+
+            # Rândul nou intră în row index (altfel prima scriere pe el ar reciti snapshot-ul)
+            new_row = appended_row(response)
+            rows = self.cache.get(spreadsheet_id, CACHE_ROWS)
+            if rows and new_row:
+                rows.add_match(team_name, row[1], row[0], new_row)
+
             logger.info(f"Saved match {match_data.get('event_name')} for {team_name}")
             return True
 
@@ -648,7 +776,7 @@ class GoogleSheetsMultiService:
 
     def get_betting_stats(self, spreadsheet_id: str) -> dict:
         """
-        Get betting statistics from all team sheets.
+        Get betting statistics from all team sheets (din snapshot, cache SNAPSHOT_TTL).
 
         Args:
             spreadsheet_id: User's spreadsheet ID
@@ -666,18 +794,13 @@ class GoogleSheetsMultiService:
         }
 
         try:
-            spreadsheet = self.client.open_by_key(spreadsheet_id)
-            index_sheet = spreadsheet.worksheet("Index")
-            teams = index_sheet.get_all_records()
-
-            for team_record in teams:
-                team_name = team_record.get("name", "")
-                if not team_name:
-                    continue
+            snapshot = self.get_snapshot(spreadsheet_id)
 
+            for team_name in snapshot.team_names():
                 try:
-                    team_sheet = spreadsheet.worksheet(team_name)
-                    matches = team_sheet.get_all_records()
+                    matches = snapshot.team_matches(team_name)
+                    if matches is None:
+                        raise ValueError("sheet not found")
 
                     for match in matches:
                         status = str(match.get("Status", "")).strip().upper()
@@ -723,6 +846,7 @@ class GoogleSheetsMultiService:
             logger.error(f"Error getting betting stats: {e}")
             return stats
 
+    @invalidates(CACHE_SNAPSHOT)
     def delete_team_from_index(self, spreadsheet_id: str, team_id: str, team_name: str) -> bool:
         """
         Delete a team from Index sheet and delete team's sheet.
@@ -736,24 +860,31 @@ class GoogleSheetsMultiService:
             True if successful
         """
         try:
-            spreadsheet = self.client.open_by_key(spreadsheet_id)
-            index_sheet = spreadsheet.worksheet("Index")
+            handle = self.get_handle(spreadsheet_id)
+            index_sheet = handle.worksheet(INDEX_SHEET)
 
-            # Find and delete row in Index
+            # Find (row index) and delete row in Index
             try:
-                cell = index_sheet.find(team_id)
-                if cell:
-                    index_sheet.delete_rows(cell.row)
+                row = self._find_row(spreadsheet_id, lambda rows: rows.team_id_row(team_id))
+                if row:
+                    index_sheet.delete_rows(row)
+                    self.get_row_index(spreadsheet_id).delete_index_row(row)
                     logger.info(f"Deleted team {team_id} from Index")
             except Exception as e:
+                self.cache.invalidate(spreadsheet_id, CACHE_ROWS)
                 logger.warning(f"Could not find team {team_id} in Index: {e}")
 
             # Delete team's sheet
             try:
-                team_sheet = spreadsheet.worksheet(team_name)
-                spreadsheet.del_worksheet(team_sheet)
+                team_sheet = handle.worksheet(team_name)
+                handle.spreadsheet.del_worksheet(team_sheet)
+                handle.remove(team_name)
+                rows = self.cache.get(spreadsheet_id, CACHE_ROWS)
+                if rows:
+                    rows.remove_sheet(team_name)
                 logger.info(f"Deleted sheet '{team_name}'")
             except Exception as e:
+                self.cache.invalidate(spreadsheet_id, CACHE_HANDLES)
                 logger.warning(f"Could not delete sheet '{team_name}': {e}")
 
             return True
@@ -762,6 +893,7 @@ class GoogleSheetsMultiService:
             logger.error(f"Error deleting team from sheets: {e}")
             return False
 
+    @invalidates()
     def delete_user_spreadsheet(self, spreadsheet_id: str) -> bool:
         """
         Delete user spreadsheet (use with caution!)
@@ -773,7 +905,6 @@ class GoogleSheetsMultiService:
             True if successful
         """
         try:
-            spreadsheet = self.get_spreadsheet(spreadsheet_id)
             self.client.del_spreadsheet(spreadsheet_id)
             logger.info(f"Deleted spreadsheet: {spreadsheet_id}")
             return True
@@ -0,0 +1,326 @@
+"""
+Job Queue - Joburi în fundal pornite din API (rulare manuală bot, configurare echipă nouă)
+Endpoint-ul pune jobul în coadă și returnează imediat id-ul; un număr limitat de workeri
+(job_queue_workers) le execută. Starea e salvată în tabela jobs (pentru GET /api/jobs/{id})
+și fiecare schimbare e trimisă pe WebSocket-ul userului.
+Joburile nu sunt anulate la timeout (pot fi în mijlocul unei plasări de pariu): handler-ul
+verifică job.expired() și nu mai pornește pași noi după job_timeout_seconds.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.database import get_async_engine, get_engine, ROLE_API
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+class JobError(Exception):
+    """Eroare cu mesaj pentru user (jobul e marcat failed cu acest mesaj)."""
+
+
+class Job:
+    """Un job din coadă; handler-ul raportează progresul prin report()."""
+
+    def __init__(self, queue: "JobQueue", user: User, kind: str, handler: "JobHandler", dedupe_key: Optional[str]):
+        self.id = str(uuid.uuid4())
+        self.user = user
+        self.user_id = user.id
+        self.kind = kind
+        self.handler = handler
+        self.dedupe_key = dedupe_key
+        self.status = JOB_QUEUED
+        self.progress = 0
+        self.message = ""
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.deadline: Optional[float] = None  # time.monotonic(), setat la pornire
+        self._queue = queue
+
+    def expired(self) -> bool:
+        """True după job_timeout_seconds de la pornire (handler-ul nu mai începe pași noi)."""
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self) -> float:
+        """Secundele rămase până la deadline (0 dacă a trecut)."""
+        if self.deadline is None:
+            return settings.job_timeout_seconds
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    async def report(self, progress: int, message: str) -> None:
+        """Progres (0-100) și pasul curent, salvate și trimise userului."""
+        self.progress = max(0, min(int(progress), 100))
+        self.message = message
+        await self._queue._save(self)
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+JobHandler = Callable[[Job], Awaitable[Optional[dict]]]
+JobNotifier = Callable[[str, dict], Awaitable[None]]
+
+
+class JobQueue:
+    """
+    Coadă de joburi cu workeri limitați.
+
+    - submit(user, kind, handler): persistă jobul și îl pune în coadă; un job de același
+      tip (și dedupe_key) deja în coadă / în lucru pentru user e returnat în loc de unul nou
+    - start/stop: workerii (apelat la pornirea / oprirea aplicației); la oprire joburile
+      în lucru au job_shutdown_grace_seconds să se termine
+    - get_job: starea din database (rămâne disponibilă după terminare)
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._busy: Set[asyncio.Task] = set()
+        self._stopping = False
+        self._active: Dict[Tuple[str, str, Optional[str]], Job] = {}
+        self._notifier: Optional[JobNotifier] = None
+        self._stats = {
+            'submitted': 0,
+            'deduplicated': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'timeouts': 0,
+            'max_job_seconds': 0.0
+        }
+
+    @property
+    def engine(self):
+        return get_async_engine(ROLE_API)
+
+    def set_notifier(self, notifier: JobNotifier) -> None:
+        """Funcția care trimite actualizările pe WebSocket: notifier(user_id, job_dict)."""
+        self._notifier = notifier
+
+    def start(self) -> None:
+        """Pornește workerii; joburile rămase din procesul anterior sunt marcate failed."""
+        self._fail_interrupted()
+        self._stopping = False
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < settings.job_queue_workers:
+            self._workers.append(asyncio.create_task(self._work()))
+
+    async def stop(self) -> None:
+        """
+        Oprește workerii: cei liberi imediat, cei cu un job în lucru după ce jobul se termină
+        sau după job_shutdown_grace_seconds. Joburile rămase (în coadă sau anulate) sunt
+        marcate failed la repornire.
+        """
+        self._stopping = True
+        busy = [worker for worker in self._workers if worker in self._busy]
+        for worker in self._workers:
+            if worker not in self._busy:
+                worker.cancel()
+
+        if busy:
+            logger.info(f"Oprire: se așteaptă {len(busy)} job(uri) în lucru")
+            _, pending = await asyncio.wait(busy, timeout=settings.job_shutdown_grace_seconds)
+            for worker in pending:
+                logger.warning("Job încă în lucru după perioada de grație - anulat")
+                worker.cancel()
+
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def _fail_interrupted(self) -> None:
+        try:
+            with get_engine(ROLE_API).begin() as conn:
+                result = conn.execute(text("""
+                    UPDATE jobs
+                    SET status = :failed, error = :error, finished_at = :now
+                    WHERE status IN (:queued, :running)
+                """), {
+                    "failed": JOB_FAILED,
+                    "queued": JOB_QUEUED,
+                    "running": JOB_RUNNING,
+                    "error": "Întrerupt de repornirea serverului",
+                    "now": datetime.utcnow()
+                })
+                if result.rowcount:
+                    logger.warning(f"{result.rowcount} job(uri) întrerupte de repornire marcate failed")
+        except Exception as e:
+            logger.error(f"Eroare la marcarea joburilor întrerupte: {e}")
+
+    async def submit(self, user: User, kind: str, handler: JobHandler, dedupe_key: Optional[str] = None) -> Job:
+        """
+        Pune un job în coadă.
+
+        Args:
+            user: Userul care a pornit jobul (primește progresul pe WebSocket)
+            kind: Tipul jobului ("run_now", "team_setup")
+            handler: Corutina care face lucrul; rezultatul ei e salvat în jobs.result
+            dedupe_key: Deosebește joburile de același tip ale userului (ex: id-ul echipei)
+        """
+        key = (user.id, kind, dedupe_key)
+        existing = self._active.get(key)
+        if existing:
+            self._stats['deduplicated'] += 1
+            return existing
+
+        job = Job(self, user, kind, handler, dedupe_key)
+        async with self.engine.begin() as conn:
+            await conn.execute(text("""
+                INSERT INTO jobs (id, user_id, kind, status, progress, created_at)
+                VALUES (:id, :user_id, :kind, :status, 0, :created_at)
+            """), {
+                "id": job.id,
+                "user_id": job.user_id,
+                "kind": kind,
+                "status": JOB_QUEUED,
+                "created_at": job.created_at
+            })
+
+        self._active[key] = job
+        self._stats['submitted'] += 1
+        self._queue.put_nowait(job)
+        await self._notify(job)
+        return job
+
+    async def _work(self) -> None:
+        worker = asyncio.current_task()
+        while not self._stopping:
+            job = await self._queue.get()
+            self._busy.add(worker)
+            try:
+                await self._run(job)
+            except Exception as e:
+                logger.error(f"Eroare worker joburi ({job.kind} {job.id}): {e}")
+            finally:
+                self._busy.discard(worker)
+                self._active.pop((job.user_id, job.kind, job.dedupe_key), None)
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = JOB_RUNNING
+        job.started_at = datetime.utcnow()
+        start = time.monotonic()
+        job.deadline = start + settings.job_timeout_seconds
+        await self._save(job)
+
+        try:
+            job.result = await job.handler(job) or {}
+            job.status = JOB_SUCCEEDED
+            job.progress = 100
+            self._stats['succeeded'] += 1
+        except Exception as e:
+            job.status = JOB_FAILED
+            job.error = str(e)
+            self._stats['failed'] += 1
+            if not isinstance(e, JobError):
+                logger.error(f"Job {job.kind} {job.id} eșuat pentru {job.user.email}: {e}", exc_info=True)
+        finally:
+            job.finished_at = datetime.utcnow()
+            self._stats['max_job_seconds'] = max(self._stats['max_job_seconds'], time.monotonic() - start)
+            if job.expired():
+                self._stats['timeouts'] += 1
+
+        await self._save(job)
+
+    async def _save(self, job: Job) -> None:
+        """Salvează starea jobului și o trimite userului (erorile nu opresc jobul)."""
+        try:
+            async with self.engine.begin() as conn:
+                await conn.execute(text("""
+                    UPDATE jobs
+                    SET status = :status, progress = :progress, message = :message,
+                        result = CAST(:result AS JSONB), error = :error,
+                        started_at = :started_at, finished_at = :finished_at
+                    WHERE id = :id
+                """), {
+                    "id": job.id,
+                    "status": job.status,
+                    "progress": job.progress,
+                    "message": job.message,
+                    "result": json.dumps(job.result, default=str) if job.result is not None else None,
+                    "error": job.error,
+                    "started_at": job.started_at,
+                    "finished_at": job.finished_at
+                })
+        except Exception as e:
+            logger.warning(f"Nu s-a putut salva starea jobului {job.id}: {e}")
+
+        await self._notify(job)
+
+    async def _notify(self, job: Job) -> None:
+        if not self._notifier:
+            return
+        try:
+            await self._notifier(job.user_id, job.to_dict())
+        except Exception as e:
+            logger.warning(f"Nu s-a putut trimite progresul jobului {job.id}: {e}")
+
+    async def get_job(self, job_id: str, user_id: str) -> Optional[dict]:
+        """Starea jobului (doar pentru userul care l-a pornit)."""
+        async with self.engine.connect() as conn:
+            result = await conn.execute(text("""
+                SELECT id, kind, status, progress, message, result, error,
+                       created_at, started_at, finished_at
+                FROM jobs
+                WHERE id = :id AND user_id = :user_id
+            """), {"id": job_id, "user_id": user_id})
+            row = result.fetchone()
+
+        if not row:
+            return None
+
+        job_result: Any = row.result
+        if isinstance(job_result, str):
+            job_result = json.loads(job_result)
+        return {
+            'id': row.id,
+            'kind': row.kind,
+            'status': row.status,
+            'progress': row.progress,
+            'message': row.message or "",
+            'result': job_result,
+            'error': row.error,
+            'created_at': row.created_at.isoformat() if row.created_at else None,
+            'started_at': row.started_at.isoformat() if row.started_at else None,
+            'finished_at': row.finished_at.isoformat() if row.finished_at else None
+        }
+
+    def get_stats(self) -> dict:
+        """Metrici: joburi în coadă / în lucru și rezultatele lor."""
+        return {
+            **self._stats,
+            'max_job_seconds': round(self._stats['max_job_seconds'], 2),
+            'queued': self._queue.qsize(),
+            'active': len(self._active),
+            'workers': len(self._workers)
+        }
+
+
+# Singleton instance
+job_queue = JobQueue()
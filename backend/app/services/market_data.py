@@ -0,0 +1,316 @@
+"""
+Market Data Service - Planul de date de piață comun pentru toți userii
+Un singur client Betfair cu credențialele master (BETFAIR_MASTER_*) citește și
+cache-uiește evenimente, catalogue și prețuri. Clienții per user se ocupă doar de
+operațiile pe ordine (placeOrders, listCurrentOrders, listClearedOrders).
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.betfair_client import BetfairClient
+from app.services.betfair_stream import MarketStream, market_price_cache
+from app.services.event_catalogue import event_catalogue, team_search_terms
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class MarketDataService:
+    """
+    Client Betfair partajat pentru date de piață (read-only).
+
+    - list_events / list_market_catalogue: cache cu TTL = intervalul de refresh al catalogului
+    - list_market_book: prețuri din market stream pentru echipele urmărite, altfel
+      cache scurt (market_data_price_ttl_seconds) peste REST
+    - ensure_catalogue: reîmprospătează catalogul global cu clientul master
+    - sync_market_stream: ține subscripția market stream la zi cu echipele active
+    """
+
+    def __init__(self):
+        self._client: Optional[BetfairClient] = None
+        self._lock = asyncio.Lock()
+        self._events_cache: Dict[Tuple[str, str], Tuple[float, List[Dict[str, Any]]]] = {}
+        self._catalogue_cache: Dict[Tuple[str, Tuple[str, ...]], Tuple[float, List[Dict[str, Any]]]] = {}
+        self._book_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._market_stream: Optional[MarketStream] = None
+        self._stats = {
+            'logins': 0,
+            'requests': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'catalogue_failures': 0
+        }
+
+    @staticmethod
+    def _master_credentials() -> Optional[Dict[str, str]]:
+        """Credențialele master din environment (None dacă lipsesc)."""
+        app_key = os.environ.get("BETFAIR_MASTER_APP_KEY")
+        username = os.environ.get("BETFAIR_MASTER_USERNAME")
+        password = os.environ.get("BETFAIR_MASTER_PASSWORD")
+        if not all([app_key, username, password]):
+            return None
+        return {'app_key': app_key, 'username': username, 'password': password}
+
+    def is_configured(self) -> bool:
+        """True dacă există credențiale master."""
+        return self._master_credentials() is not None
+
+    async def get_client(self) -> Optional[BetfairClient]:
+        """Returnează clientul master conectat (login o singură dată, apoi refolosit)."""
+        if self._client and self._client.is_connected():
+            return self._client
+
+        async with self._lock:
+            if self._client and self._client.is_connected():
+                return self._client
+
+            credentials = self._master_credentials()
+            if not credentials:
+                logger.warning("Master Betfair credentials not configured - market data plane indisponibil")
+                return None
+
+            client = BetfairClient()
+            client.configure(
+                app_key=credentials['app_key'],
+                username=credentials['username'],
+                password=credentials['password']
+            )
+            self._stats['logins'] += 1
+            await client.connect()
+            if not client.is_connected():
+                logger.warning("Nu s-a putut conecta la Betfair cu credențialele master")
+                return None
+
+            self._client = client
+            return client
+
+    async def ensure_catalogue(self, fallback_client: Optional[BetfairClient] = None) -> bool:
+        """
+        Reîmprospătează catalogul global de evenimente dacă e expirat.
+
+        Args:
+            fallback_client: Client folosit dacă nu există credențiale master
+
+        Returns:
+            True dacă există un snapshot utilizabil
+        """
+        if event_catalogue.is_fresh():
+            return True
+
+        client = await self.get_client() or fallback_client
+        if not client:
+            return event_catalogue.is_loaded()
+        return await event_catalogue.ensure_fresh(client)
+
+    def _catalogue_ttl(self) -> float:
+        return settings.event_catalogue_refresh_minutes * 60
+
+    async def list_events(self, event_type_id: str, text_query: Optional[str] = None) -> List[Dict[str, Any]]:
+        """listEvents prin clientul master, cu cache per (sport, query)."""
+        key = (event_type_id, text_query or "")
+        cached = self._events_cache.get(key)
+        if cached and time.monotonic() - cached[0] < self._catalogue_ttl():
+            self._stats['cache_hits'] += 1
+            return cached[1]
+
+        client = await self.get_client()
+        if not client:
+            return []
+
+        self._stats['cache_misses'] += 1
+        self._stats['requests'] += 1
+        events = await client.list_events(event_type_id=event_type_id, text_query=text_query)
+        if events:
+            self._events_cache[key] = (time.monotonic(), events)
+        return events
+
+    async def list_market_catalogue(
+        self,
+        event_ids: List[str],
+        market_type_codes: List[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        listMarketCatalogue prin clientul master, cu cache per (eveniment, tipuri piețe).
+
+        Se cache-uiesc doar evenimentele pentru care s-au primit piețe: un răspuns gol
+        (eroare Betfair, returnată de client ca listă goală) nu ascunde piețele pe durata TTL.
+        """
+        codes = tuple(market_type_codes or ["MATCH_ODDS"])
+        now = time.monotonic()
+
+        markets: List[Dict[str, Any]] = []
+        missing: List[str] = []
+        for event_id in event_ids:
+            cached = self._catalogue_cache.get((event_id, codes))
+            if cached and now - cached[0] < self._catalogue_ttl():
+                markets.extend(cached[1])
+                self._stats['cache_hits'] += 1
+            else:
+                missing.append(event_id)
+
+        if not missing:
+            return markets
+
+        client = await self.get_client()
+        if not client:
+            return markets
+
+        self._stats['cache_misses'] += len(missing)
+        self._stats['requests'] += 1
+        try:
+            fetched = await client.list_market_catalogue(event_ids=missing, market_type_codes=list(codes))
+        except Exception as e:
+            self._stats['catalogue_failures'] += 1
+            logger.error(f"Eroare listMarketCatalogue pentru {len(missing)} evenimente: {e}")
+            return markets
+        if not fetched:
+            self._stats['catalogue_failures'] += 1
+
+        by_event: Dict[str, List[Dict[str, Any]]] = {}
+        for market in fetched:
+            event_id = market.get("event", {}).get("id")
+            if event_id in missing:
+                by_event.setdefault(event_id, []).append(market)
+        for event_id, event_markets in by_event.items():
+            self._catalogue_cache[(event_id, codes)] = (now, event_markets)
+
+        return markets + fetched
+
+    async def list_market_book(self, market_ids: List[str]) -> List[Dict[str, Any]]:
+        """listMarketBook (EX_BEST_OFFERS): market stream, apoi cache scurt, apoi REST prin clientul master."""
+        now = time.monotonic()
+        ttl = settings.market_data_price_ttl_seconds
+
+        books, not_streamed = market_price_cache.get_books(market_ids)
+        missing: List[str] = []
+        for market_id in not_streamed:
+            cached = self._book_cache.get(market_id)
+            if cached and now - cached[0] < ttl:
+                books.append(cached[1])
+                self._stats['cache_hits'] += 1
+            else:
+                missing.append(market_id)
+
+        if not missing:
+            return books
+
+        client = await self.get_client()
+        if not client:
+            return books
+
+        self._stats['cache_misses'] += len(missing)
+        self._stats['requests'] += 1
+        fetched = await client.list_market_book(missing)
+        for book in fetched:
+            if book.get("marketId"):
+                self._book_cache[book["marketId"]] = (now, book)
+
+        return books + fetched
+
+    async def sync_market_stream(self) -> None:
+        """
+        Subscrie market stream-ul la piețele MATCH_ODDS ale tuturor echipelor active.
+
+        Piețele cele mai apropiate au prioritate când se depășește limita contului.
+        """
+        if not settings.betfair_market_stream_enabled:
+            return
+
+        from app.services.teams_repository import teams_repository
+
+        if not await self.ensure_catalogue():
+            return
+
+        client = await self.get_client()
+        if not client:
+            return
+
+        markets = {}
+        for team_name in teams_repository.get_tracked_team_names():
+            for market in event_catalogue.find_team_markets(team_search_terms(team_name)):
+                markets[market['market_id']] = market['open_date']
+
+        market_ids = [
+            market_id for market_id, _ in sorted(markets.items(), key=lambda m: m[1])
+        ][:settings.betfair_market_stream_max_markets]
+
+        if not market_ids:
+            await self._stop_market_stream()
+            return
+
+        stream = self._market_stream
+        if stream and stream.client is client and stream.is_running():
+            await stream.update_markets(market_ids)
+            return
+
+        await self._stop_market_stream()
+        self._market_stream = MarketStream(
+            client,
+            market_ids,
+            market_price_cache,
+            host=settings.betfair_stream_host,
+            port=settings.betfair_stream_port,
+            use_ssl=settings.betfair_stream_ssl,
+            heartbeat_ms=settings.betfair_stream_heartbeat_ms,
+            ladder_levels=settings.betfair_market_stream_ladder_levels
+        )
+        self._market_stream.start()
+        logger.info(f"Market stream pornit pentru {len(market_ids)} piețe MATCH_ODDS")
+
+    async def _stop_market_stream(self) -> None:
+        if self._market_stream:
+            await self._market_stream.stop()
+            self._market_stream = None
+        market_price_cache.set_live(False)
+        market_price_cache.clear()
+
+    def purge_expired(self) -> None:
+        """Elimină intrările expirate din cache-uri."""
+        now = time.monotonic()
+        catalogue_ttl = self._catalogue_ttl()
+        price_ttl = settings.market_data_price_ttl_seconds
+
+        for cache, ttl in (
+            (self._events_cache, catalogue_ttl),
+            (self._catalogue_cache, catalogue_ttl),
+            (self._book_cache, price_ttl)
+        ):
+            for key in [k for k, (ts, _) in cache.items() if now - ts >= ttl]:
+                del cache[key]
+
+    async def keep_alive(self) -> None:
+        """Menține sesiunea master activă și curăță cache-urile expirate."""
+        self.purge_expired()
+        if self._client and self._client.is_connected():
+            if not await self._client.keep_alive():
+                # Următorul get_client() face login din nou
+                await self._client.disconnect()
+                self._client = None
+
+    async def close(self) -> None:
+        """Deconectează clientul master - apelat la oprirea aplicației."""
+        await self._stop_market_stream()
+        if self._client:
+            await self._client.disconnect()
+            self._client = None
+
+    def get_stats(self) -> dict:
+        """Returnează metricile planului de date."""
+        return {
+            **self._stats,
+            'connected': bool(self._client and self._client.is_connected()),
+            'batching': self._client.get_batch_stats() if self._client else None,
+            'cached_events_queries': len(self._events_cache),
+            'cached_catalogues': len(self._catalogue_cache),
+            'cached_books': len(self._book_cache),
+            'market_stream': self._market_stream.get_stats() if self._market_stream else None,
+            'price_cache': market_price_cache.get_stats()
+        }
+
+
+# Singleton instance
+market_data_service = MarketDataService()
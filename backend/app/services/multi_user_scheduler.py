@@ -3,78 +3,220 @@ Multi-User Scheduler - Rulează bot-ul pentru toți userii activi
 """
 import logging
 import asyncio
+import time
 from datetime import datetime
-from typing import List
-from sqlalchemy import create_engine, text
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, text
 
 from app.models.user import User
-from app.services.user_bot_service import UserBotService
+from app.services.user_bot_service import UserBotService, UserWorkItem
+from app.services.teams_repository import teams_repository
+from app.services.bets_repository import bets_repository
 from app.config import get_settings
+from app.database import get_async_engine, ROLE_SCHEDULER
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+# Useri care pot rula bot-ul (vezi load_work_plan)
+_ELIGIBLE_USERS_QUERY = """
+    SELECT DISTINCT u.{columns}
+    FROM users u
+    INNER JOIN betfair_credentials bc ON u.id = bc.user_id
+    INNER JOIN teams t ON u.id = t.user_id
+    WHERE u.is_active = true
+      AND u.subscription_status IN ('active', 'trial')
+      AND u.subscription_ends_at > NOW()
+      AND t.status = 'active'
+"""
+
+
+def _row_to_user(row) -> User:
+    return User(
+        id=row.id,
+        email=row.email,
+        password_hash=row.password_hash,
+        is_active=row.is_active,
+        is_verified=row.is_verified,
+        full_name=row.full_name,
+        subscription_plan=row.subscription_plan,
+        subscription_status=row.subscription_status,
+        max_teams=row.max_teams,
+        google_sheets_id=row.google_sheets_id,
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+        last_login=row.last_login,
+        trial_ends_at=row.trial_ends_at,
+        subscription_ends_at=row.subscription_ends_at
+    )
+
+
 class MultiUserScheduler:
     """
     Scheduler care rulează bot-ul pentru toți userii activi.
-    Execută în paralel cu limit controlat (max 5 useri simultan).
+    Userii sunt puși într-o coadă consumată de max_concurrent_users workeri:
+    următorul user pornește imediat ce se eliberează un loc (fără batch-uri și pauze).
     """
 
     def __init__(self):
-        self.engine = create_engine(settings.database_url)
-        self.max_concurrent_users = 5  # Max 5 useri simultan
-        self.delay_between_batches = 10  # 10 secunde între batch-uri
+        self.max_concurrent_users = settings.scheduler_max_concurrent_users
+        # Starea rulărilor curente / ultimelor rulări, per tip ("bot_run", "results_check")
+        self._runs: Dict[str, Dict[str, Any]] = {}
+
+    async def load_active_user_ids(self) -> List[str]:
+        """ID-urile userilor care pot rula bot-ul (aceleași condiții ca load_work_plan)."""
+        async with get_async_engine(ROLE_SCHEDULER).connect() as conn:
+            result = await conn.execute(text(_ELIGIBLE_USERS_QUERY.format(columns="id")))
+            return [row.id for row in result]
 
-    def get_active_users(self) -> List[User]:
+    async def load_work_plan(self, user_ids: Optional[List[str]] = None) -> List[UserWorkItem]:
         """
-        Query useri activi care pot rula bot-ul:
-        - subscription_status = 'active' sau 'trial'
-        - subscription_ends_at > NOW()
-        - is_active = true
-        - au betfair_credentials
-        - au cel puțin 1 team activ
+        Planul de lucru al rulării, în 3 query-uri (nu 1 + 2 per user):
+        1. useri activi care pot rula bot-ul:
+           - subscription_status = 'active' sau 'trial'
+           - subscription_ends_at > NOW()
+           - is_active = true
+           - au betfair_credentials
+           - au cel puțin 1 team activ
+        2. credențialele lor criptate (decriptate doar la login)
+        3. echipele lor active
+
+        Args:
+            user_ids: Doar acești useri (tot verificați ca eligibili); None = toți
         """
-        with self.engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT DISTINCT u.*
-                FROM users u
-                INNER JOIN betfair_credentials bc ON u.id = bc.user_id
-                INNER JOIN teams t ON u.id = t.user_id
-                WHERE u.is_active = true
-                  AND u.subscription_status IN ('active', 'trial')
-                  AND u.subscription_ends_at > NOW()
-                  AND t.status = 'active'
-                ORDER BY u.created_at ASC
-            """))
-
-            users = []
-            for row in result:
-                user = User(
-                    id=row.id,
-                    email=row.email,
-                    password_hash=row.password_hash,
-                    is_active=row.is_active,
-                    is_verified=row.is_verified,
-                    full_name=row.full_name,
-                    subscription_plan=row.subscription_plan,
-                    subscription_status=row.subscription_status,
-                    max_teams=row.max_teams,
-                    google_sheets_id=row.google_sheets_id,
-                    created_at=row.created_at,
-                    updated_at=row.updated_at,
-                    last_login=row.last_login,
-                    trial_ends_at=row.trial_ends_at,
-                    subscription_ends_at=row.subscription_ends_at
-                )
-                users.append(user)
+        query = _ELIGIBLE_USERS_QUERY.format(columns="*")
+        params = {}
+        if user_ids is not None:
+            if not user_ids:
+                return []
+            query += " AND u.id IN :user_ids"
+            params["user_ids"] = list(user_ids)
+
+        async with get_async_engine(ROLE_SCHEDULER).connect() as conn:
+            statement = text(query + " ORDER BY u.created_at ASC")
+            if params:
+                statement = statement.bindparams(bindparam("user_ids", expanding=True))
+            result = await conn.execute(statement, params)
+            users = [_row_to_user(row) for row in result]
+            if not users:
+                return []
+
+            user_ids = [user.id for user in users]
+            result = await conn.execute(text("""
+                SELECT user_id, username_encrypted, password_encrypted, app_key_encrypted,
+                       cert_encrypted, key_encrypted
+                FROM betfair_credentials
+                WHERE user_id IN :user_ids
+            """).bindparams(bindparam("user_ids", expanding=True)), {"user_ids": user_ids})
+            credentials = {row.user_id: row for row in result}
+
+        teams = await teams_repository.get_active_teams_for_users_async(user_ids)
+
+        return [
+            UserWorkItem(user, credentials.get(user.id), teams.get(user.id, []))
+            for user in users
+        ]
+
+    async def _run_queue(
+        self,
+        kind: str,
+        items: List[UserWorkItem],
+        worker: Callable[[UserWorkItem, float], Awaitable[dict]],
+        timeout_seconds: float
+    ) -> List[Tuple[User, Any]]:
+        """
+        Procesează userii printr-o coadă cu concurență limitată.
 
-            return users
+        Args:
+            kind: Tipul rulării (pentru metrici)
+            items: Planul de lucru (userii de procesat, cu datele preîncărcate)
+            worker: Corutina rulată pentru fiecare user: worker(item, deadline)
+            timeout_seconds: Timpul per user (userul blocat nu ține ocupat un loc). Nu e
+                aplicat prin anulare - o plasare în curs nu e întreruptă: worker-ul primește
+                deadline-ul (time.monotonic()) și nu mai pornește pași noi după el
+                (rezultatul lui are atunci 'timed_out': True)
+
+        Returns:
+            Lista (user, rezultat sau excepție), în ordinea terminării
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in items:
+            queue.put_nowait(item)
+
+        run = {
+            'started_at': datetime.now().isoformat(),
+            'finished_at': None,
+            'total': len(items),
+            'completed': 0,
+            'in_flight': 0,
+            'timeouts': 0,
+            'failures': 0,
+            'max_user_seconds': 0.0,
+            '_queue': queue,
+            '_start': time.monotonic()
+        }
+        self._runs[kind] = run
+        results: List[Tuple[User, Any]] = []
+
+        async def consume():
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                user = item.user
+
+                run['in_flight'] += 1
+                user_start = time.monotonic()
+                try:
+                    result = await worker(item, user_start + timeout_seconds)
+                    if result.get('timed_out'):
+                        run['timeouts'] += 1
+                        logger.error(f"⏱️ Timeout pentru {user.email} ({kind})")
+                except Exception as e:
+                    result = e
+                finally:
+                    run['in_flight'] -= 1
+                    run['completed'] += 1
+                    run['max_user_seconds'] = max(run['max_user_seconds'], time.monotonic() - user_start)
+
+                if isinstance(result, Exception):
+                    run['failures'] += 1
+                results.append((user, result))
+
+        workers = [
+            asyncio.create_task(consume())
+            for _ in range(min(self.max_concurrent_users, len(items)))
+        ]
+        await asyncio.gather(*workers)
+
+        run['finished_at'] = datetime.now().isoformat()
+        run['_duration'] = time.monotonic() - run['_start']
+        return results
+
+    def get_stats(self) -> dict:
+        """Metrici: adâncimea cozii, useri în lucru și throughput pentru fiecare tip de rulare."""
+        stats = {
+            'max_concurrent_users': self.max_concurrent_users,
+            'runs': {}
+        }
+        for kind, run in self._runs.items():
+            elapsed = run.get('_duration') or (time.monotonic() - run['_start'])
+            stats['runs'][kind] = {
+                **{k: v for k, v in run.items() if not k.startswith('_')},
+                'queue_depth': run['_queue'].qsize(),
+                'running': run['finished_at'] is None,
+                'elapsed_seconds': round(elapsed, 2),
+                'max_user_seconds': round(run['max_user_seconds'], 2),
+                'users_per_minute': round(run['completed'] / elapsed * 60, 2) if elapsed > 0 else 0.0
+            }
+        return stats
 
     async def run_for_all_users(self) -> dict:
         """
         Rulează bot-ul pentru toți userii activi.
-        Execută în paralel cu limit controlat (max 5 useri simultan).
+        Execută în paralel cu limită controlată (max_concurrent_users useri simultan).
 
         Returns:
             dict cu statistici globale
@@ -96,59 +238,43 @@ class MultiUserScheduler:
         }
 
         try:
-            # 1. Get active users
-            users = self.get_active_users()
-            global_stats['total_users'] = len(users)
+            # 1. Get active users (cu credențialele și echipele lor)
+            plan = await self.load_work_plan()
+            global_stats['total_users'] = len(plan)
 
-            if not users:
+            if not plan:
                 logger.info("No active users found")
                 return global_stats
 
-            logger.info(f"Found {len(users)} active users")
-
-            # 2. Split în batch-uri de max_concurrent_users
-            batches = [
-                users[i:i + self.max_concurrent_users]
-                for i in range(0, len(users), self.max_concurrent_users)
-            ]
-
-            logger.info(f"Split into {len(batches)} batches")
-
-            # 3. Process fiecare batch în paralel
-            for batch_idx, batch in enumerate(batches, 1):
-                logger.info("-" * 80)
-                logger.info(f"🚀 Processing batch {batch_idx}/{len(batches)} ({len(batch)} users)")
-                logger.info(f"Users: {', '.join([u.email for u in batch])}")
-                logger.info("-" * 80)
-
-                # Run toți userii din batch în paralel
-                tasks = [self._run_for_user(user) for user in batch]
-                batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                # Collect results
-                for user, result in zip(batch, batch_results):
-                    if isinstance(result, Exception):
-                        logger.error(f"❌ Exception for {user.email}: {result}")
-                        global_stats['user_results'].append({
-                            'user_id': user.id,
-                            'user_email': user.email,
-                            'success': False,
-                            'errors': [str(result)]
-                        })
-                        global_stats['failed_users'] += 1
+            logger.info(f"Found {len(plan)} active users")
+
+            # 2. Coadă cu max_concurrent_users workeri
+            results = await self._run_queue(
+                "bot_run",
+                plan,
+                self._run_for_user,
+                settings.scheduler_user_timeout_seconds
+            )
+
+            # 3. Collect results
+            for user, result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"❌ Exception for {user.email}: {result}")
+                    global_stats['user_results'].append({
+                        'user_id': user.id,
+                        'user_email': user.email,
+                        'success': False,
+                        'errors': [str(result)]
+                    })
+                    global_stats['failed_users'] += 1
+                else:
+                    global_stats['user_results'].append(result)
+                    if result.get('success'):
+                        global_stats['successful_users'] += 1
+                        global_stats['total_teams_processed'] += result.get('teams_processed', 0)
+                        global_stats['total_bets_placed'] += result.get('bets_placed', 0)
                     else:
-                        global_stats['user_results'].append(result)
-                        if result.get('success'):
-                            global_stats['successful_users'] += 1
-                            global_stats['total_teams_processed'] += result.get('teams_processed', 0)
-                            global_stats['total_bets_placed'] += result.get('bets_placed', 0)
-                        else:
-                            global_stats['failed_users'] += 1
-
-                # Delay între batch-uri (except ultimul)
-                if batch_idx < len(batches):
-                    logger.info(f"⏳ Waiting {self.delay_between_batches}s before next batch...")
-                    await asyncio.sleep(self.delay_between_batches)
+                        global_stats['failed_users'] += 1
 
             # 4. Final stats
             end_time = datetime.now()
@@ -172,13 +298,15 @@ class MultiUserScheduler:
             global_stats['error'] = str(e)
             return global_stats
 
-    async def _run_for_user(self, user: User) -> dict:
+    async def _run_for_user(self, item: UserWorkItem, deadline: float) -> dict:
         """
         Rulează bot-ul pentru un singur user.
+        După deadline nu mai e pornită nicio echipă (cele în lucru se termină).
 
         Returns:
             dict cu rezultatul pentru acest user
         """
+        user = item.user
         result = {
             'user_id': user.id,
             'user_email': user.email,
@@ -192,21 +320,30 @@ class MultiUserScheduler:
 
         try:
             # 1. Create bot service pentru acest user
-            bot_service = UserBotService(user)
+            bot_service = UserBotService(user, item)
 
-            # 2. Initialize (load credentials, connect Betfair, etc.)
-            initialized = await bot_service.initialize()
+            # 2. Initialize (load credentials, connect Betfair, etc.) - poate fi întreruptă
+            try:
+                initialized = await asyncio.wait_for(
+                    bot_service.initialize(), timeout=max(deadline - time.monotonic(), 0)
+                )
+            except asyncio.TimeoutError:
+                result['timed_out'] = True
+                result['errors'].append("Timeout la inițializare")
+                return result
             if not initialized:
                 result['errors'].append("Failed to initialize bot service")
                 return result
 
-            # 3. Run bot
-            stats = await bot_service.run_bot()
+            # 3. Run bot (echipele nepornite până la deadline rămân pentru rularea următoare)
+            stats = await bot_service.run_bot(deadline=deadline)
 
             result['success'] = True
             result['teams_processed'] = stats.get('teams_processed', 0)
             result['bets_placed'] = stats.get('bets_placed', 0)
             result['errors'] = stats.get('errors', [])
+            if stats.get('teams_skipped'):
+                result['timed_out'] = True
 
             logger.info(f"✅ Bot completed for {user.email}: {stats}")
 
@@ -238,6 +375,7 @@ class MultiUserScheduler:
         global_stats = {
             'start_time': start_time.isoformat(),
             'total_users': 0,
+            'skipped_users': 0,
             'successful_users': 0,
             'failed_users': 0,
             'total_won': 0,
@@ -247,55 +385,45 @@ class MultiUserScheduler:
         }
 
         try:
-            # Get active users
-            users = self.get_active_users()
-            global_stats['total_users'] = len(users)
-
-            if not users:
-                logger.info("No active users found")
+            # Active users - planul complet se încarcă doar pentru cei cu pariuri PENDING
+            # care ar putea fi settled
+            active_ids = await self.load_active_user_ids()
+            due_ids = await bets_repository.get_users_due_for_results_async(active_ids)
+            plan = await self.load_work_plan(user_ids=[user_id for user_id in active_ids if user_id in due_ids])
+            global_stats['total_users'] = len(plan)
+            global_stats['skipped_users'] = len(active_ids) - len(plan)
+
+            if not plan:
+                logger.info(f"No users with bets due for settlement ({len(active_ids)} active)")
                 return global_stats
 
-            logger.info(f"Checking results for {len(users)} active users")
-
-            # Split în batch-uri
-            batches = [
-                users[i:i + self.max_concurrent_users]
-                for i in range(0, len(users), self.max_concurrent_users)
-            ]
-
-            # Process fiecare batch în paralel
-            for batch_idx, batch in enumerate(batches, 1):
-                logger.info("-" * 80)
-                logger.info(f"🔍 Checking batch {batch_idx}/{len(batches)} ({len(batch)} users)")
-                logger.info(f"Users: {', '.join([u.email for u in batch])}")
-                logger.info("-" * 80)
-
-                tasks = [self._check_results_for_user(user) for user in batch]
-                batch_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                for user, result in zip(batch, batch_results):
-                    if isinstance(result, Exception):
-                        logger.error(f"❌ Exception for {user.email}: {result}")
-                        global_stats['user_results'].append({
-                            'user_email': user.email,
-                            'success': False,
-                            'error': str(result)
-                        })
-                        global_stats['failed_users'] += 1
+            logger.info(f"Checking results for {len(plan)}/{len(active_ids)} active users (PENDING bets past kickoff)")
+
+            results = await self._run_queue(
+                "results_check",
+                plan,
+                self._check_results_for_user,
+                settings.scheduler_results_timeout_seconds
+            )
+
+            for user, result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"❌ Exception for {user.email}: {result}")
+                    global_stats['user_results'].append({
+                        'user_email': user.email,
+                        'success': False,
+                        'error': str(result)
+                    })
+                    global_stats['failed_users'] += 1
+                else:
+                    global_stats['user_results'].append(result)
+                    if result.get('success'):
+                        global_stats['successful_users'] += 1
+                        global_stats['total_won'] += result.get('won', 0)
+                        global_stats['total_lost'] += result.get('lost', 0)
+                        global_stats['total_still_pending'] += result.get('still_pending', 0)
                     else:
-                        global_stats['user_results'].append(result)
-                        if result.get('success'):
-                            global_stats['successful_users'] += 1
-                            global_stats['total_won'] += result.get('won', 0)
-                            global_stats['total_lost'] += result.get('lost', 0)
-                            global_stats['total_still_pending'] += result.get('still_pending', 0)
-                        else:
-                            global_stats['failed_users'] += 1
-
-                # Delay între batch-uri
-                if batch_idx < len(batches):
-                    logger.info(f"⏳ Waiting {self.delay_between_batches}s before next batch...")
-                    await asyncio.sleep(self.delay_between_batches)
+                        global_stats['failed_users'] += 1
 
             # Final stats
             end_time = datetime.now()
@@ -318,13 +446,16 @@ class MultiUserScheduler:
             global_stats['error'] = str(e)
             return global_stats
 
-    async def _check_results_for_user(self, user: User) -> dict:
+    async def _check_results_for_user(self, item: UserWorkItem, deadline: float) -> dict:
         """
         Verifică rezultatele pentru un singur user.
+        Verificarea poate fi întreruptă la deadline: nu plasează pariuri, iar fiecare
+        settlement e o singură tranzacție (ce rămâne e preluat la verificarea următoare).
 
         Returns:
             dict cu rezultatul pentru acest user
         """
+        user = item.user
         result = {
             'user_email': user.email,
             'success': False,
@@ -338,17 +469,23 @@ class MultiUserScheduler:
 
         try:
             # Create bot service
-            bot_service = UserBotService(user)
-
-            # Initialize
-            initialized = await bot_service.initialize()
-            if not initialized:
+            bot_service = UserBotService(user, item)
+
+            async def check() -> Optional[dict]:
+                if not await bot_service.initialize():
+                    return None
+                return await bot_service.check_bet_results()
+
+            try:
+                check_result = await asyncio.wait_for(check(), timeout=max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                result['timed_out'] = True
+                result['errors'].append("Timeout la verificarea rezultatelor")
+                return result
+            if check_result is None:
                 result['errors'].append("Failed to initialize bot service")
                 return result
 
-            # Check results
-            check_result = await bot_service.check_bet_results()
-
             result['success'] = True
             result['won'] = check_result.get('won', 0)
             result['lost'] = check_result.get('lost', 0)
@@ -0,0 +1,154 @@
+"""
+Settlement Checkpoints - Watermark per cont pentru verificarea rezultatelor
+Reține ultimul settledDate procesat, astfel încât listClearedOrders să ceară doar
+ordinele finalizate de la verificarea anterioară (nu toată fereastra de 3 zile).
+"""
+from sqlalchemy import text
+from typing import Dict, Iterable, List, Optional
+from datetime import datetime, timedelta, timezone
+import logging
+
+from app.config import get_settings
+from app.database import get_engine, get_async_engine, ROLE_SCHEDULER
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Contul bot-ului legacy (single-user, credențiale din environment)
+LEGACY_ACCOUNT_ID = "legacy"
+
+
+def parse_settled_date(value: Optional[str]) -> Optional[datetime]:
+    """Convertește settledDate Betfair (ISO, 'Z') în datetime UTC naiv."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+_GET_QUERY = """
+    SELECT last_settled_at FROM settlement_checkpoints
+    WHERE account_id = :account_id
+"""
+
+_SAVE_QUERY = """
+    INSERT INTO settlement_checkpoints (account_id, last_settled_at, updated_at)
+    VALUES (:account_id, :last_settled_at, :updated_at)
+    ON CONFLICT (account_id) DO UPDATE
+    SET last_settled_at = EXCLUDED.last_settled_at,
+        updated_at = EXCLUDED.updated_at
+"""
+
+
+class SettlementCheckpointRepository:
+    """
+    Repository pentru tabela settlement_checkpoints
+    get_async / save_async rulează pe engine-ul asyncpg (verificările per user, de pe event loop).
+    """
+
+    def __init__(self):
+        self.engine = get_engine(ROLE_SCHEDULER)
+
+    @property
+    def async_engine(self):
+        return get_async_engine(ROLE_SCHEDULER)
+
+    def get(self, account_id: str) -> Optional[datetime]:
+        """Ultimul settledDate procesat pentru cont (None dacă nu există)."""
+        try:
+            with self.engine.connect() as conn:
+                row = conn.execute(text(_GET_QUERY), {"account_id": account_id}).fetchone()
+                return row.last_settled_at if row else None
+        except Exception as e:
+            logger.error(f"Eroare la citirea checkpoint-ului de settlement pentru {account_id}: {e}")
+            return None
+
+    async def get_async(self, account_id: str) -> Optional[datetime]:
+        """get fără să blocheze event loop-ul"""
+        try:
+            async with self.async_engine.connect() as conn:
+                row = (await conn.execute(text(_GET_QUERY), {"account_id": account_id})).fetchone()
+                return row.last_settled_at if row else None
+        except Exception as e:
+            logger.error(f"Eroare la citirea checkpoint-ului de settlement pentru {account_id}: {e}")
+            return None
+
+    def save(self, account_id: str, last_settled_at: datetime) -> bool:
+        """Salvează (upsert) checkpoint-ul contului."""
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text(_SAVE_QUERY), {
+                    "account_id": account_id,
+                    "last_settled_at": last_settled_at,
+                    "updated_at": datetime.utcnow()
+                })
+            return True
+        except Exception as e:
+            logger.error(f"Eroare la salvarea checkpoint-ului de settlement pentru {account_id}: {e}")
+            return False
+
+    async def save_async(self, account_id: str, last_settled_at: datetime) -> bool:
+        """save fără să blocheze event loop-ul"""
+        try:
+            async with self.async_engine.begin() as conn:
+                await conn.execute(text(_SAVE_QUERY), {
+                    "account_id": account_id,
+                    "last_settled_at": last_settled_at,
+                    "updated_at": datetime.utcnow()
+                })
+            return True
+        except Exception as e:
+            logger.error(f"Eroare la salvarea checkpoint-ului de settlement pentru {account_id}: {e}")
+            return False
+
+    def window_start(self, checkpoint: Optional[datetime]) -> datetime:
+        """
+        De la ce dată se cer ordinele finalizate.
+
+        Fără checkpoint: toată fereastra de lookback. Cu checkpoint: puțin înainte de el
+        (overlap pentru ordinele raportate cu întârziere), dar niciodată mai vechi de lookback.
+        """
+        lookback_start = datetime.utcnow() - timedelta(days=settings.settlement_lookback_days)
+        if checkpoint is None:
+            return lookback_start
+        return max(checkpoint - timedelta(minutes=settings.settlement_overlap_minutes), lookback_start)
+
+    @staticmethod
+    def next_checkpoint(
+        current: Optional[datetime],
+        settled_orders: List[Dict],
+        failed_settled_dates: Iterable[Optional[datetime]] = ()
+    ) -> Optional[datetime]:
+        """
+        Noul watermark după procesare.
+
+        Avansează la cel mai nou settledDate văzut, dar nu trece de un ordin
+        care nu a putut fi procesat (va fi cerut din nou la verificarea următoare,
+        chiar dacă asta mută checkpoint-ul înapoi - window_start limitează la lookback).
+
+        Returns:
+            Noul checkpoint sau None dacă nu trebuie modificat
+        """
+        seen = [d for d in (parse_settled_date(o.get("settledDate")) for o in settled_orders) if d]
+        if not seen:
+            return None
+
+        candidate = max(seen)
+        failed = [d for d in failed_settled_dates if d]
+        if failed:
+            candidate = min(candidate, min(failed) - timedelta(milliseconds=1))
+        elif current is not None and candidate <= current:
+            return None
+
+        if candidate == current:
+            return None
+        return candidate
+
+
+# Singleton instance
+settlement_checkpoints = SettlementCheckpointRepository()
@@ -0,0 +1,128 @@
+"""
+Sheets Cache - Cache LRU limitat pentru datele citite din Google Sheets
+Intrările sunt grupate per spreadsheet (namespace) și pe tip (snapshot, handles, rânduri),
+fiecare tip cu TTL-ul lui. Cache-ul are o limită de intrări: la depășire pleacă
+cea mai veche folosită, iar cele expirate sunt eliminate la acces. Metodele care
+scriu în Sheets invalidează tipurile afectate prin decoratorul invalidates.
+"""
+import functools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Tipuri de intrări (per spreadsheet)
+CACHE_SNAPSHOT = "snapshot"
+CACHE_HANDLES = "handles"
+CACHE_ROWS = "rows"
+
+
+class SheetsCache:
+    """
+    Cache thread-safe (apelurile gspread rulează pe thread-urile executor-ului).
+
+    - get / set: intrarea (spreadsheet_id, kind), cu TTL per intrare
+    - invalidate(spreadsheet_id, *kinds): tipurile date sau tot namespace-ul
+    - max_entries: peste limită e eliminată intrarea folosită cel mai demult
+    """
+
+    def __init__(self, max_entries: int, default_ttl: float = 60):
+        self.max_entries = max(max_entries, 1)
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        # (spreadsheet_id, kind) -> (expiră la, valoare), în ordinea folosirii
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._namespaces: Dict[str, Set[str]] = {}
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0
+        }
+
+    def get(self, spreadsheet_id: str, kind: str) -> Optional[Any]:
+        """Valoarea din cache (None dacă lipsește sau a expirat)."""
+        key = (spreadsheet_id, kind)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[1]
+
+    def set(self, spreadsheet_id: str, kind: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Salvează valoarea (ttl implicit: default_ttl)."""
+        key = (spreadsheet_id, kind)
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            self._namespaces.setdefault(spreadsheet_id, set()).add(kind)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, spreadsheet_id: str, *kinds: str) -> None:
+        """Elimină tipurile date pentru spreadsheet (fără tipuri: tot namespace-ul)."""
+        with self._lock:
+            for kind in list(kinds or self._namespaces.get(spreadsheet_id, ())):
+                if (spreadsheet_id, kind) in self._entries:
+                    self._remove((spreadsheet_id, kind))
+                    self._stats['invalidations'] += 1
+
+    def clear(self) -> None:
+        """Golește tot cache-ul."""
+        with self._lock:
+            self._entries.clear()
+            self._namespaces.clear()
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        self._entries.pop(key, None)
+        kinds = self._namespaces.get(key[0])
+        if kinds is not None:
+            kinds.discard(key[1])
+            if not kinds:
+                del self._namespaces[key[0]]
+
+    def get_stats(self) -> dict:
+        """Returnează metricile cache-ului (pentru dimensionarea max_entries)."""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else 0.0,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'spreadsheets': len(self._namespaces)
+            }
+
+
+def invalidates(*kinds: str):
+    """
+    Decorator pentru metodele care scriu în Sheets (primul argument: spreadsheet_id).
+
+    După apel - reușit sau nu, o scriere eșuată poate fi fost aplicată parțial -
+    tipurile date sunt invalidate în self.cache (fără tipuri: tot namespace-ul).
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, spreadsheet_id: str, *args, **kwargs):
+            try:
+                return method(self, spreadsheet_id, *args, **kwargs)
+            finally:
+                self.cache.invalidate(spreadsheet_id, *kinds)
+        return wrapper
+    return decorator
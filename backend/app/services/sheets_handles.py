@@ -0,0 +1,65 @@
+"""
+Sheets Handles - Obiectele gspread Spreadsheet / Worksheet refolosite între apeluri
+open_by_key și spreadsheet.worksheet(titlu) citesc fiecare metadatele spreadsheet-ului.
+Un SpreadsheetHandle le citește o singură dată (id-urile și titlurile tuturor
+worksheet-urilor) și e actualizat la adăugarea / ștergerea unui sheet.
+"""
+import logging
+import threading
+from typing import Dict, List
+
+import gspread
+
+logger = logging.getLogger(__name__)
+
+
+class SpreadsheetHandle:
+    """
+    Spreadsheet-ul deschis și worksheet-urile lui, partajate între thread-uri.
+
+    - worksheet(titlu): fără request; WorksheetNotFound dacă titlul nu există
+    - add / remove: ținut la zi de metodele care adaugă / șterg sheet-uri
+    """
+
+    def __init__(self, spreadsheet: gspread.Spreadsheet, worksheets: List[gspread.Worksheet]):
+        self.spreadsheet = spreadsheet
+        self._lock = threading.Lock()
+        self._worksheets: Dict[str, gspread.Worksheet] = {ws.title: ws for ws in worksheets}
+
+    @property
+    def id(self) -> str:
+        return self.spreadsheet.id
+
+    def worksheet(self, title: str) -> gspread.Worksheet:
+        """Worksheet-ul cu titlul dat (din cache)."""
+        with self._lock:
+            worksheet = self._worksheets.get(title)
+        if worksheet is None:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return worksheet
+
+    def titles(self) -> List[str]:
+        """Titlurile worksheet-urilor, în ordinea din spreadsheet."""
+        with self._lock:
+            return list(self._worksheets)
+
+    def sheet_ids(self) -> Dict[str, int]:
+        """Titlu -> sheetId (pentru request-urile batch_update)."""
+        with self._lock:
+            return {title: ws.id for title, ws in self._worksheets.items()}
+
+    def add(self, worksheet: gspread.Worksheet) -> None:
+        """Worksheet nou (întors de add_worksheet)."""
+        with self._lock:
+            self._worksheets[worksheet.title] = worksheet
+
+    def remove(self, title: str) -> None:
+        """Worksheet șters."""
+        with self._lock:
+            self._worksheets.pop(title, None)
+
+
+def open_handle(client: gspread.Client, spreadsheet_id: str) -> SpreadsheetHandle:
+    """Deschide spreadsheet-ul și citește lista de worksheet-uri (2 request-uri de metadate)."""
+    spreadsheet = client.open_by_key(spreadsheet_id)
+    return SpreadsheetHandle(spreadsheet, spreadsheet.worksheets())
@@ -0,0 +1,227 @@
+"""
+Sheets Rate Limiter - Quota Google Sheets comună pentru toți userii
+Toți tenanții folosesc același service account, deci limitele per minut (citire /
+scriere) sunt comune. Fiecare request HTTP gspread ia un token din bucket-ul
+potrivit; când tokenii lipsesc, request-urile așteaptă în ordinea priorității
+(bot > dashboard > formatare). 429 / 5xx sunt reîncercate cu backoff exponențial
+cu jitter.
+"""
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict
+
+from gspread.exceptions import APIError
+from gspread.http_client import HTTPClient
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Clase de prioritate (număr mai mic = servit primul)
+PRIORITY_BOT = 0
+PRIORITY_DASHBOARD = 1
+PRIORITY_BACKGROUND = 2
+PRIORITY_NAMES = {PRIORITY_BOT: 'bot', PRIORITY_DASHBOARD: 'dashboard', PRIORITY_BACKGROUND: 'background'}
+
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 32.0
+
+_priority: ContextVar[int] = ContextVar("sheets_priority", default=PRIORITY_BOT)
+
+
+def current_priority() -> int:
+    """Prioritatea request-urilor Sheets din contextul curent."""
+    return _priority.get()
+
+
+def set_priority(priority: int) -> None:
+    """Setează prioritatea în contextul curent (folosit de fațada async în contextul copiat)."""
+    _priority.set(priority)
+
+
+@contextmanager
+def sheets_priority(priority: int):
+    """Request-urile Sheets din acest bloc folosesc prioritatea dată."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe (request-urile gspread rulează pe thread-urile executor-ului).
+
+    Tokenii se reumplu continuu (per_minute / 60 pe secundă) până la burst; cei care
+    așteaptă sunt serviți în ordinea (prioritate, sosire).
+    """
+
+    def __init__(self, name: str, per_minute: int, burst: int):
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._queue: list = []
+        self._counter = itertools.count()
+        self._stats = {
+            'acquired': 0,
+            'waited': 0,
+            'wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+            'drained': 0
+        }
+        self._by_priority: Dict[str, Dict[str, float]] = {
+            name: {'acquired': 0, 'wait_seconds': 0.0} for name in PRIORITY_NAMES.values()
+        }
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority: int = PRIORITY_BOT) -> float:
+        """
+        Blochează până când un token e disponibil pentru această prioritate.
+
+        Returns:
+            Secundele așteptate
+        """
+        started = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._counter))
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    self._refill()
+                    is_head = self._queue[0] == ticket
+                    if is_head and self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+                    # Doar primul din coadă așteaptă reumplerea; ceilalți sunt treziți când pleacă el
+                    self._cond.wait((1 - self.tokens) / self.rate if is_head else None)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+
+            waited = time.monotonic() - started
+            self._stats['acquired'] += 1
+            if waited > 0.001:
+                self._stats['waited'] += 1
+                self._stats['wait_seconds'] += waited
+                self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], waited)
+            per_priority = self._by_priority[PRIORITY_NAMES.get(priority, 'background')]
+            per_priority['acquired'] += 1
+            per_priority['wait_seconds'] += waited
+        return waited
+
+    def drain(self) -> None:
+        """Golește bucket-ul după un 429 - toți apelanții încetinesc, nu doar cel respins."""
+        with self._cond:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+            self._stats['drained'] += 1
+
+    def get_stats(self) -> dict:
+        """Returnează metricile bucket-ului."""
+        with self._cond:
+            self._refill()
+            return {
+                **self._stats,
+                'wait_seconds': round(self._stats['wait_seconds'], 3),
+                'max_wait_seconds': round(self._stats['max_wait_seconds'], 3),
+                'per_minute': round(self.rate * 60),
+                'tokens': round(self.tokens, 2),
+                'waiting': len(self._queue),
+                'by_priority': {
+                    name: {'acquired': int(s['acquired']), 'wait_seconds': round(s['wait_seconds'], 3)}
+                    for name, s in self._by_priority.items()
+                }
+            }
+
+
+class SheetsRateLimiter:
+    """Bucket-urile de citire / scriere ale service account-ului și statisticile de retry."""
+
+    def __init__(self):
+        self.read = TokenBucket('read', settings.sheets_read_quota_per_minute, settings.sheets_quota_burst)
+        self.write = TokenBucket('write', settings.sheets_write_quota_per_minute, settings.sheets_quota_burst)
+        self._lock = threading.Lock()
+        self._stats = {
+            'throttled': 0,
+            'server_errors': 0,
+            'retries': 0,
+            'gave_up': 0
+        }
+
+    def bucket_for(self, method: str) -> TokenBucket:
+        """GET consumă din quota de citire, restul din quota de scriere."""
+        return self.read if method.upper() == 'GET' else self.write
+
+    def record(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def get_stats(self) -> dict:
+        """Returnează metricile de quota."""
+        return {
+            **self._stats,
+            'read': self.read.get_stats(),
+            'write': self.write.get_stats()
+        }
+
+
+# Singleton instance
+sheets_rate_limiter = SheetsRateLimiter()
+
+
+class QuotaHTTPClient(HTTPClient):
+    """
+    HTTP client gspread care respectă quota comună și reîncearcă erorile temporare.
+
+    - 429: reîncercat pentru orice request (nu a fost aplicat)
+    - 5xx: reîncercat doar pentru GET (o scriere poate fi fost aplicată)
+    - backoff exponențial cu full jitter, maxim sheets_max_retries încercări în plus
+    """
+
+    def request(self, method: str, endpoint: str, *args, **kwargs):
+        bucket = sheets_rate_limiter.bucket_for(method)
+        priority = current_priority()
+        attempt = 0
+
+        while True:
+            bucket.acquire(priority)
+            try:
+                return super().request(method, endpoint, *args, **kwargs)
+            except APIError as e:
+                status = e.response.status_code
+                if status == 429:
+                    sheets_rate_limiter.record('throttled')
+                    bucket.drain()
+                elif status >= 500:
+                    sheets_rate_limiter.record('server_errors')
+
+                retryable = status == 429 or (status >= 500 and method.upper() == 'GET')
+                if not retryable:
+                    raise
+                if attempt >= settings.sheets_max_retries:
+                    sheets_rate_limiter.record('gave_up')
+                    raise
+
+                delay = random.uniform(0, min(BACKOFF_BASE_SECONDS * 2 ** attempt, BACKOFF_MAX_SECONDS))
+                attempt += 1
+                sheets_rate_limiter.record('retries')
+                logger.warning(
+                    f"Sheets {method} {status} - reîncercare {attempt}/{settings.sheets_max_retries} în {delay:.1f}s"
+                )
+                time.sleep(delay)
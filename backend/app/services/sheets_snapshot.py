@@ -0,0 +1,185 @@
+"""
+Sheets Snapshot - Spreadsheet-ul unui user citit cu un singur request
+Index + toate sheet-urile echipelor vin dintr-un values_batch_get și sunt parsate
+o singură dată; get_pending_bets, get_scheduled_matches, get_betting_stats și
+load_team citesc din același snapshot. RowIndex păstrează din el numerele de rând
+pentru scrieri.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from gspread.utils import a1_to_rowcol, absolute_range_name, fill_gaps, numericise_all, to_records
+
+logger = logging.getLogger(__name__)
+
+INDEX_SHEET = "Index"
+
+
+def parse_records(values: List[List[Any]]) -> List[Dict[str, Any]]:
+    """Rândurile unui sheet -> listă de dict-uri (la fel ca Worksheet.get_all_records)."""
+    if not values:
+        return []
+    rows = fill_gaps(values)
+    headers, rows = rows[0], rows[1:]
+    return to_records(headers, [numericise_all(row) for row in rows])
+
+
+class SpreadsheetSnapshot:
+    """
+    Conținutul spreadsheet-ului unui user la un moment dat.
+
+    - index: rândurile din Index (câte unul per echipă)
+    - team_sheets: titlu sheet -> rândurile meciurilor (Data, Meci, Cotă, Status...)
+    """
+
+    def __init__(self, spreadsheet_id: str, index: List[Dict[str, Any]], team_sheets: Dict[str, List[Dict[str, Any]]]):
+        self.spreadsheet_id = spreadsheet_id
+        self.index = index
+        self.team_sheets = team_sheets
+        self.loaded_at = time.time()
+
+    def team_names(self) -> List[str]:
+        """Echipele din Index, în ordinea rândurilor."""
+        return [str(record.get("name", "")) for record in self.index if record.get("name")]
+
+    def index_record(self, team_name: str) -> Optional[Dict[str, Any]]:
+        """Rândul echipei din Index (None dacă nu există)."""
+        for record in self.index:
+            if record.get("name") == team_name:
+                return record
+        return None
+
+    def team_matches(self, team_name: str) -> Optional[List[Dict[str, Any]]]:
+        """Rândurile din sheet-ul echipei (None dacă sheet-ul nu există)."""
+        return self.team_sheets.get(team_name)
+
+
+class RowIndex:
+    """
+    Cheie -> număr de rând, per worksheet (rândul 1 e header-ul).
+
+    - Index: după numele și după id-ul echipei
+    - sheet-urile echipelor: după (Meci, Data); un meci poate apărea de mai multe ori,
+      deci Data face rândul unic
+
+    Construit din snapshot și ținut la zi la adăugarea / ștergerea de rânduri, ca
+    scrierile să țintească direct range-uri A1 (fără find() pe tot sheet-ul).
+    """
+
+    def __init__(self, snapshot: SpreadsheetSnapshot):
+        self._lock = threading.Lock()
+        self.teams: Dict[str, int] = {}
+        self.team_ids: Dict[str, int] = {}
+        for row, record in enumerate(snapshot.index, start=2):
+            if record.get("name"):
+                self.teams.setdefault(str(record["name"]), row)
+            if record.get("id"):
+                self.team_ids.setdefault(str(record["id"]), row)
+        self.index_rows = len(snapshot.index) + 1
+
+        self.matches: Dict[str, Dict[Tuple[str, str], int]] = {}
+        self.match_rows: Dict[str, int] = {}
+        for title, records in snapshot.team_sheets.items():
+            rows: Dict[Tuple[str, str], int] = {}
+            for row, record in enumerate(records, start=2):
+                rows.setdefault((str(record.get("Meci", "")), str(record.get("Data", ""))), row)
+            self.matches[title] = rows
+            self.match_rows[title] = len(records) + 1
+
+    def team_row(self, team_name: str) -> Optional[int]:
+        """Rândul echipei în Index."""
+        return self.teams.get(team_name)
+
+    def team_id_row(self, team_id: str) -> Optional[int]:
+        """Rândul echipei în Index, după id."""
+        return self.team_ids.get(str(team_id))
+
+    def match_row(self, team_name: str, event_name: str, match_date: Optional[str] = None) -> Optional[int]:
+        """
+        Rândul meciului în sheet-ul echipei.
+
+        Fără match_date: rândul meciului dacă numele e unic; altfel primul, cu warning.
+        """
+        rows = self.matches.get(team_name, {})
+        if match_date is not None:
+            return rows.get((event_name, str(match_date)))
+
+        candidates = sorted(row for (name, _), row in rows.items() if name == event_name)
+        if len(candidates) > 1:
+            logger.warning(f"Meciul {event_name} apare de {len(candidates)} ori în {team_name} - folosit rândul {candidates[0]}")
+        return candidates[0] if candidates else None
+
+    def add_sheet(self, title: str) -> None:
+        """Sheet nou (doar header)."""
+        with self._lock:
+            self.matches.setdefault(title, {})
+            self.match_rows.setdefault(title, 1)
+
+    def remove_sheet(self, title: str) -> None:
+        """Sheet șters."""
+        with self._lock:
+            self.matches.pop(title, None)
+            self.match_rows.pop(title, None)
+
+    def add_match(self, team_name: str, event_name: str, match_date: str, row: int) -> None:
+        """Rând adăugat la finalul sheet-ului echipei."""
+        with self._lock:
+            self.matches.setdefault(team_name, {}).setdefault((event_name, str(match_date)), row)
+            self.match_rows[team_name] = max(self.match_rows.get(team_name, 1), row)
+
+    def add_team(self, team_id: str, team_name: str, row: int) -> None:
+        """Rând adăugat la finalul Index-ului."""
+        with self._lock:
+            self.teams.setdefault(team_name, row)
+            self.team_ids.setdefault(str(team_id), row)
+            self.index_rows = max(self.index_rows, row)
+
+    def delete_index_row(self, row: int) -> None:
+        """Rând șters din Index: rândurile de sub el urcă cu unu."""
+        with self._lock:
+            for rows in (self.teams, self.team_ids):
+                for key, value in list(rows.items()):
+                    if value == row:
+                        del rows[key]
+                    elif value > row:
+                        rows[key] = value - 1
+            self.index_rows -= 1
+
+
+def appended_row(response: dict) -> Optional[int]:
+    """Rândul scris de un values.append (din updates.updatedRange, ex: 'Ajax'!A5:H5)."""
+    updated_range = response.get('updates', {}).get('updatedRange', '')
+    if '!' not in updated_range:
+        return None
+    start = updated_range.rsplit('!', 1)[1].split(':')[0]
+    return a1_to_rowcol(start)[0]
+
+
+def load_snapshot(client, spreadsheet_id: str, sheet_titles: List[str]) -> SpreadsheetSnapshot:
+    """
+    Citește toate sheet-urile date cu un singur values_batch_get.
+
+    Args:
+        client: gspread Client
+        spreadsheet_id: User's spreadsheet ID
+        sheet_titles: Titlurile sheet-urilor (Index + echipele)
+
+    Returns:
+        SpreadsheetSnapshot
+    """
+    titles = [INDEX_SHEET] + [t for t in sheet_titles if t != INDEX_SHEET]
+    response = client.http_client.values_batch_get(
+        spreadsheet_id,
+        [absolute_range_name(title) for title in titles]
+    )
+    value_ranges = response.get('valueRanges', [])
+
+    sheets = {
+        title: parse_records(value_range.get('values', []))
+        for title, value_range in zip(titles, value_ranges)
+    }
+    index = sheets.pop(INDEX_SHEET, [])
+    return SpreadsheetSnapshot(spreadsheet_id, index, sheets)
+
@@ -0,0 +1,379 @@
+"""
+Sheets Write Queue - Scrieri Google Sheets write-behind, grupate per spreadsheet
+Bot-ul nu mai așteaptă după Sheets: statusurile meciurilor, last_stake și progresia
+sunt puse în coadă (persistată în DB în fundal, pe engine-ul async), iar la fiecare
+interval de flush toate scrierile unui spreadsheet devin un singur values_batch_update.
+Erorile 429/5xx sunt reîncercate cu backoff (de cel mult sheets_write_max_attempts ori);
+cele definitive rămân în tabelă cu status 'failed' (și eroarea), pentru investigare /
+reluare manuală.
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import gspread
+import requests
+from sqlalchemy import bindparam, text
+
+from app.config import get_settings
+from app.database import get_async_engine, get_engine, ROLE_SCHEDULER
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Coduri HTTP după care flush-ul e reîncercat (quota / erori temporare Google)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+MAX_BACKOFF_SECONDS = 300
+
+
+def merge_operations(operations: List[dict]) -> Tuple[List[dict], List[dict]]:
+    """
+    Coalescează operațiile în ordinea în care au fost puse în coadă.
+
+    - meci (team, event, data): câmpurile mai noi le suprascriu pe cele vechi
+    - echipă: câmpurile absolute (cumulative_loss, progression_step, last_stake)
+      - ultima valoare câștigă; statisticile (matches, won, profit) se adună
+
+    Returns:
+        (match_writes, team_writes)
+    """
+    matches: Dict[Tuple[str, str, Optional[str]], dict] = {}
+    teams: Dict[str, dict] = {}
+
+    for op in operations:
+        if op['kind'] == 'match':
+            key = (op['team_name'], op['event_name'], op.get('match_date'))
+            entry = matches.setdefault(key, {
+                'team_name': op['team_name'],
+                'event_name': op['event_name'],
+                'match_date': op.get('match_date'),
+                'fields': {}
+            })
+            entry['fields'].update(op.get('fields', {}))
+        else:
+            entry = teams.setdefault(op['team_name'], {
+                'team_name': op['team_name'],
+                'fields': {},
+                'matches': 0,
+                'won': 0,
+                'profit': 0.0
+            })
+            entry['fields'].update(op.get('fields', {}))
+            entry['matches'] += op.get('matches', 0)
+            entry['won'] += op.get('won', 0)
+            entry['profit'] += op.get('profit', 0.0)
+
+    return list(matches.values()), list(teams.values())
+
+
+def _insert_operations(conn, entries: List[dict]) -> None:
+    for entry in entries:
+        entry['id'] = conn.execute(text("""
+            INSERT INTO sheets_write_queue (spreadsheet_id, operation)
+            VALUES (:spreadsheet_id, CAST(:operation AS JSONB))
+            RETURNING id
+        """), {"spreadsheet_id": entry['spreadsheet_id'], "operation": json.dumps(entry['op'])}).scalar()
+
+
+def is_retryable(error: BaseException) -> bool:
+    """True pentru erori temporare (quota, 5xx, timeout, rețea)."""
+    if isinstance(error, gspread.exceptions.APIError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, (asyncio.TimeoutError, requests.exceptions.RequestException, ConnectionError))
+
+
+class SheetsWriteQueue:
+    """
+    Coadă write-behind per spreadsheet.
+
+    - update_match / update_last_stake / update_team_progression: pun operația în
+      coadă (memorie) și returnează imediat; salvarea în tabela sheets_write_queue
+      se face în fundal, grupat, pe engine-ul async (și înainte de orice flush)
+    - start/stop: bucla de flush (sheets_write_flush_seconds) și flush-ul final
+    """
+
+    def __init__(self):
+        self.engine = get_engine(ROLE_SCHEDULER)
+        # spreadsheet_id -> [{'id': id din DB sau None, 'spreadsheet_id', 'op'}]
+        self._pending: Dict[str, List[dict]] = {}
+        self._in_flight: Dict[str, List[dict]] = {}
+        self._unsaved: List[dict] = []
+        self._persist_lock = asyncio.Lock()
+        self._persist_task: Optional[asyncio.Task] = None
+        self._retry_at: Dict[str, float] = {}
+        self._attempts: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._loaded = False
+        self._stats = {
+            'enqueued': 0,
+            'flushes': 0,
+            'operations_written': 0,
+            'cells_written': 0,
+            'retries': 0,
+            'failed': 0,
+            'persist_errors': 0
+        }
+
+    @property
+    def async_engine(self):
+        return get_async_engine(ROLE_SCHEDULER)
+
+    # ==================== ENQUEUE ====================
+
+    def update_match(
+        self,
+        spreadsheet_id: str,
+        team_name: str,
+        event_name: str,
+        status: str = None,
+        stake: float = None,
+        profit_loss: float = None,
+        bet_id: str = None,
+        match_date: str = None
+    ) -> None:
+        """Echivalentul update_match_status (match_date alege rândul când meciul apare de mai multe ori)."""
+        fields = {}
+        if stake is not None:
+            fields['stake'] = stake
+        if status:
+            fields['status'] = status
+        if profit_loss is not None:
+            fields['profit_loss'] = profit_loss
+        if bet_id:
+            fields['bet_id'] = bet_id
+
+        op = {'kind': 'match', 'team_name': team_name, 'event_name': event_name, 'fields': fields}
+        if match_date:
+            op['match_date'] = match_date
+        self._enqueue(spreadsheet_id, op)
+
+    def update_last_stake(self, spreadsheet_id: str, team_name: str, stake: float) -> None:
+        """Echivalentul update_last_stake."""
+        self._enqueue(spreadsheet_id, {'kind': 'team', 'team_name': team_name, 'fields': {'last_stake': stake}})
+
+    def update_team_progression(
+        self,
+        spreadsheet_id: str,
+        team_name: str,
+        cumulative_loss: float,
+        progression_step: int,
+        won: bool = None,
+        profit: float = 0
+    ) -> None:
+        """Echivalentul update_team_progression (statisticile se adună la flush)."""
+        op = {
+            'kind': 'team',
+            'team_name': team_name,
+            'fields': {'cumulative_loss': cumulative_loss, 'progression_step': progression_step}
+        }
+        if won is not None:
+            op.update({'matches': 1, 'won': 1 if won else 0, 'profit': profit})
+        self._enqueue(spreadsheet_id, op)
+
+    def _enqueue(self, spreadsheet_id: str, op: dict) -> None:
+        entry = {'id': None, 'spreadsheet_id': spreadsheet_id, 'op': op}
+        self._pending.setdefault(spreadsheet_id, []).append(entry)
+        self._unsaved.append(entry)
+        self._stats['enqueued'] += 1
+
+        # Salvarea în DB nu blochează apelantul: un singur task în fundal salvează tot ce s-a strâns
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # fără event loop - salvate la următorul flush
+        if self._persist_task is None or self._persist_task.done():
+            self._persist_task = loop.create_task(self._persist_unsaved())
+
+    async def _persist_unsaved(self) -> None:
+        """Salvează în DB scrierile puse în coadă de la ultima salvare (rămân în memorie dacă eșuează)."""
+        async with self._persist_lock:
+            await self._save_unsaved()
+
+    async def _save_unsaved(self) -> None:
+        """Apelat cu _persist_lock deținut."""
+        entries, self._unsaved = self._unsaved, []
+        if not entries:
+            return
+        try:
+            async with self.async_engine.begin() as conn:
+                await conn.run_sync(_insert_operations, entries)
+        except Exception as e:
+            for entry in entries:
+                entry['id'] = None
+            self._stats['persist_errors'] += len(entries)
+            logger.error(f"Eroare la salvarea a {len(entries)} scrieri Sheets în coadă: {e}")
+
+    async def _delete(self, row_ids: List[int]) -> None:
+        if not row_ids:
+            return
+        try:
+            async with self.async_engine.begin() as conn:
+                await conn.execute(text("""
+                    DELETE FROM sheets_write_queue WHERE id IN :ids
+                """).bindparams(bindparam("ids", expanding=True)), {"ids": row_ids})
+        except Exception as e:
+            logger.error(f"Eroare la ștergerea scrierilor Sheets din coadă: {e}")
+
+    async def _mark_failed(self, entries: List[dict], error: BaseException) -> None:
+        """Scrierile eșuate definitiv rămân în tabelă (status 'failed') și nu mai sunt reîncărcate."""
+        unsaved = [entry for entry in entries if entry['id'] is None]
+        if unsaved:
+            try:
+                async with self.async_engine.begin() as conn:
+                    await conn.run_sync(_insert_operations, unsaved)
+            except Exception as e:
+                logger.error(f"Eroare la salvarea a {len(unsaved)} scrieri Sheets eșuate: {e}")
+
+        row_ids = [entry['id'] for entry in entries if entry['id'] is not None]
+        if not row_ids:
+            return
+        try:
+            async with self.async_engine.begin() as conn:
+                await conn.execute(text("""
+                    UPDATE sheets_write_queue SET status = 'failed', error = :error
+                    WHERE id IN :ids
+                """).bindparams(bindparam("ids", expanding=True)), {"ids": row_ids, "error": str(error)[:1000]})
+        except Exception as e:
+            logger.error(f"Eroare la marcarea scrierilor Sheets eșuate: {e}")
+
+    def _load_persisted(self) -> None:
+        """Reîncarcă scrierile rămase neaplicate la oprirea anterioară (fără cele eșuate definitiv)."""
+        try:
+            with self.engine.connect() as conn:
+                result = conn.execute(text("""
+                    SELECT id, spreadsheet_id, operation FROM sheets_write_queue
+                    WHERE status = 'pending'
+                    ORDER BY id
+                """))
+                rows = result.fetchall()
+        except Exception as e:
+            logger.error(f"Eroare la încărcarea cozii de scrieri Sheets: {e}")
+            return
+
+        for row in rows:
+            op = row.operation if isinstance(row.operation, dict) else json.loads(row.operation)
+            self._pending.setdefault(row.spreadsheet_id, []).append(
+                {'id': row.id, 'spreadsheet_id': row.spreadsheet_id, 'op': op}
+            )
+
+        if rows:
+            logger.info(f"Reîncărcate {len(rows)} scrieri Sheets din coadă")
+
+    # ==================== FLUSH ====================
+
+    def start(self) -> None:
+        """Pornește bucla de flush (apelat la pornirea aplicației)."""
+        if not self._loaded:
+            self._load_persisted()
+            self._loaded = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Oprește bucla și scrie tot ce a rămas în coadă."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._retry_at.clear()
+        await self.flush_all()
+        await self._persist_unsaved()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.sheets_write_flush_seconds)
+            try:
+                await self.flush_all()
+            except Exception as e:
+                logger.error(f"Eroare flush coadă Sheets: {e}")
+
+    async def flush_all(self) -> None:
+        """Flush pentru toate spreadsheet-urile cu scrieri în coadă (care nu sunt în backoff)."""
+        now = time.monotonic()
+        spreadsheet_ids = [
+            spreadsheet_id for spreadsheet_id, ops in self._pending.items()
+            if ops and self._retry_at.get(spreadsheet_id, 0) <= now and spreadsheet_id not in self._in_flight
+        ]
+        if spreadsheet_ids:
+            await asyncio.gather(*(self.flush(spreadsheet_id) for spreadsheet_id in spreadsheet_ids))
+
+    async def flush(self, spreadsheet_id: str) -> bool:
+        """
+        Scrie toate operațiile din coadă ale unui spreadsheet într-un singur batch.
+
+        Returns:
+            True dacă s-a scris (sau nu era nimic de scris)
+        """
+        from app.services.google_sheets_async import google_sheets_async_service
+
+        # Intră în flush doar scrierile a căror salvare în DB s-a terminat (altfel rândul ar fi
+        # inserat după ștergere și reaplicat la repornire). Cele puse în coadă cât a durat
+        # salvarea rămân pentru flush-ul următor.
+        async with self._persist_lock:
+            await self._save_unsaved()
+            unsaved = {id(entry) for entry in self._unsaved}
+            queued = self._pending.pop(spreadsheet_id, [])
+            entries = [entry for entry in queued if id(entry) not in unsaved]
+            remaining = [entry for entry in queued if id(entry) in unsaved]
+            if remaining:
+                self._pending[spreadsheet_id] = remaining
+        if not entries:
+            return True
+
+        self._in_flight[spreadsheet_id] = entries
+        match_writes, team_writes = merge_operations([entry['op'] for entry in entries])
+        try:
+            cells = await google_sheets_async_service.apply_sheet_writes(spreadsheet_id, match_writes, team_writes)
+        except Exception as e:
+            attempts = self._attempts.get(spreadsheet_id, 0) + 1
+            if is_retryable(e) and attempts < settings.sheets_write_max_attempts:
+                self._attempts[spreadsheet_id] = attempts
+                delay = min(2 ** attempts, MAX_BACKOFF_SECONDS) * random.uniform(0.5, 1.0)
+                self._retry_at[spreadsheet_id] = time.monotonic() + delay
+                # Înapoi în coadă, înaintea scrierilor apărute între timp
+                self._pending[spreadsheet_id] = entries + self._pending.get(spreadsheet_id, [])
+                self._stats['retries'] += 1
+                logger.warning(
+                    f"Flush Sheets eșuat pentru {spreadsheet_id} (încercarea {attempts}): {e} - reîncercare în {delay:.0f}s"
+                )
+            else:
+                self._attempts.pop(spreadsheet_id, None)
+                self._retry_at.pop(spreadsheet_id, None)
+                self._stats['failed'] += len(entries)
+                await self._mark_failed(entries, e)
+                logger.error(
+                    f"Flush Sheets eșuat definitiv pentru {spreadsheet_id} (încercarea {attempts}), "
+                    f"{len(entries)} scrieri marcate failed în sheets_write_queue: {e}"
+                )
+            return False
+        finally:
+            self._in_flight.pop(spreadsheet_id, None)
+
+        self._attempts.pop(spreadsheet_id, None)
+        self._retry_at.pop(spreadsheet_id, None)
+        await self._delete([entry['id'] for entry in entries if entry['id'] is not None])
+        self._stats['flushes'] += 1
+        self._stats['operations_written'] += len(entries)
+        self._stats['cells_written'] += cells
+        return True
+
+    def get_stats(self) -> dict:
+        """Returnează metricile cozii."""
+        return {
+            **self._stats,
+            'queued': sum(len(ops) for ops in self._pending.values()),
+            'unsaved': len(self._unsaved),
+            'spreadsheets_queued': sum(1 for ops in self._pending.values() if ops),
+            'in_flight': sum(len(ops) for ops in self._in_flight.values()),
+            'backing_off': len(self._retry_at)
+        }
+
+
+# Singleton instance
+sheets_write_queue = SheetsWriteQueue()
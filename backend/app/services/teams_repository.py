@@ -1,66 +1,144 @@
 """
 Teams Repository - Database operations for teams
 """
-from sqlalchemy import create_engine, text
+from sqlalchemy import bindparam, text
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import logging
 
 from app.models.schemas import Team, TeamCreate, TeamUpdate, TeamStatus, Sport
 from app.config import get_settings
+from app.database import get_engine, get_async_engine, ROLE_API
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+def _row_to_team(row) -> Team:
+    """Rând din tabela teams -> Team (statisticile se completează din user_team_stats)."""
+    return Team(
+        id=row.id,
+        user_id=row.user_id,
+        name=row.name,
+        betfair_id=row.betfair_id,
+        sport=Sport(row.sport),
+        league=row.league,
+        country=row.country,
+        cumulative_loss=row.cumulative_loss,
+        last_stake=row.last_stake,
+        progression_step=row.progression_step,
+        initial_stake=float(row.initial_stake) if hasattr(row, 'initial_stake') else 100.0,
+        status=TeamStatus(row.status),
+        total_matches=0,
+        matches_won=0,
+        matches_lost=0,
+        total_profit=0.0,
+        created_at=row.created_at,
+        updated_at=row.updated_at
+    )
+
+
+def _user_teams_query(active_only: bool) -> str:
+    if active_only:
+        return """
+            SELECT * FROM teams
+            WHERE user_id = :user_id AND status = 'active'
+            ORDER BY created_at DESC
+        """
+    return """
+        SELECT * FROM teams
+        WHERE user_id = :user_id
+        ORDER BY created_at DESC
+    """
+
+
+def _update_statement(team_id: str, user_id: str, update: TeamUpdate) -> Optional[Tuple[str, dict]]:
+    """UPDATE-ul dinamic pentru câmpurile setate (None dacă nu e nimic de modificat)."""
+    updates = []
+    params = {"team_id": team_id, "user_id": user_id, "updated_at": datetime.utcnow()}
+
+    if update.name is not None:
+        updates.append("name = :name")
+        params["name"] = update.name
+    if update.betfair_id is not None:
+        updates.append("betfair_id = :betfair_id")
+        params["betfair_id"] = update.betfair_id
+    if update.sport is not None:
+        updates.append("sport = :sport")
+        params["sport"] = update.sport.value
+    if update.league is not None:
+        updates.append("league = :league")
+        params["league"] = update.league
+    if update.country is not None:
+        updates.append("country = :country")
+        params["country"] = update.country
+    if update.status is not None:
+        updates.append("status = :status")
+        params["status"] = update.status.value
+    if update.cumulative_loss is not None:
+        updates.append("cumulative_loss = :cumulative_loss")
+        params["cumulative_loss"] = update.cumulative_loss
+    if update.progression_step is not None:
+        updates.append("progression_step = :progression_step")
+        params["progression_step"] = update.progression_step
+    if update.initial_stake is not None:
+        updates.append("initial_stake = :initial_stake")
+        params["initial_stake"] = update.initial_stake
+
+    if not updates:
+        return None
+
+    updates.append("updated_at = :updated_at")
+    query = f"""
+        UPDATE teams
+        SET {', '.join(updates)}
+        WHERE id = :team_id AND user_id = :user_id
+    """
+    return query, params
+
+
 class TeamsRepository:
-    """Repository for teams database operations"""
+    """
+    Repository for teams database operations
+    Metodele *_async rulează pe engine-ul asyncpg (pentru codul de pe event loop).
+    """
 
     def __init__(self):
-        self.engine = create_engine(settings.database_url)
+        self.engine = get_engine(ROLE_API)
+
+    @property
+    def async_engine(self):
+        return get_async_engine(ROLE_API)
 
     def get_user_teams(self, user_id: str, active_only: bool = False) -> List[Team]:
         """Get all teams for a user"""
         with self.engine.connect() as conn:
-            if active_only:
-                result = conn.execute(text("""
-                    SELECT * FROM teams
-                    WHERE user_id = :user_id AND status = 'active'
-                    ORDER BY created_at DESC
-                """), {"user_id": user_id})
-            else:
-                result = conn.execute(text("""
-                    SELECT * FROM teams
-                    WHERE user_id = :user_id
-                    ORDER BY created_at DESC
-                """), {"user_id": user_id})
+            result = conn.execute(text(_user_teams_query(active_only)), {"user_id": user_id})
+            return [_row_to_team(row) for row in result]
 
-            teams = []
-            for row in result:
-                teams.append(Team(
-                    id=row.id,
-                    user_id=row.user_id,
-                    name=row.name,
-                    betfair_id=row.betfair_id,
-                    sport=Sport(row.sport),
-                    league=row.league,
-                    country=row.country,
-                    cumulative_loss=row.cumulative_loss,
-                    last_stake=row.last_stake,
-                    progression_step=row.progression_step,
-                    initial_stake=float(row.initial_stake) if hasattr(row, 'initial_stake') else 100.0,
-                    status=TeamStatus(row.status),
-                    total_matches=0,
-                    matches_won=0,
-                    matches_lost=0,
-                    total_profit=0.0,
-                    created_at=row.created_at,
-                    updated_at=row.updated_at
-                ))
+    async def get_user_teams_async(self, user_id: str, active_only: bool = False) -> List[Team]:
+        """get_user_teams fără să blocheze event loop-ul"""
+        async with self.async_engine.connect() as conn:
+            result = await conn.execute(text(_user_teams_query(active_only)), {"user_id": user_id})
+            return [_row_to_team(row) for row in result]
 
+    async def get_active_teams_for_users_async(self, user_ids: List[str]) -> Dict[str, List[Team]]:
+        """Echipele active ale mai multor useri, într-un singur query: user_id -> echipe."""
+        teams: Dict[str, List[Team]] = {user_id: [] for user_id in user_ids}
+        if not user_ids:
             return teams
 
+        async with self.async_engine.connect() as conn:
+            result = await conn.execute(text("""
+                SELECT * FROM teams
+                WHERE user_id IN :user_ids AND status = 'active'
+                ORDER BY created_at DESC
+            """).bindparams(bindparam("user_ids", expanding=True)), {"user_ids": list(user_ids)})
+            for row in result:
+                teams.setdefault(row.user_id, []).append(_row_to_team(row))
+        return teams
+
     def get_team(self, team_id: str, user_id: str) -> Optional[Team]:
         """Get a specific team (verify ownership)"""
         with self.engine.connect() as conn:
@@ -73,26 +151,17 @@ class TeamsRepository:
             if not row:
                 return None
 
-            return Team(
-                id=row.id,
-                user_id=row.user_id,
-                name=row.name,
-                betfair_id=row.betfair_id,
-                sport=Sport(row.sport),
-                league=row.league,
-                country=row.country,
-                cumulative_loss=row.cumulative_loss,
-                last_stake=row.last_stake,
-                progression_step=row.progression_step,
-                initial_stake=float(row.initial_stake) if hasattr(row, 'initial_stake') else 100.0,
-                status=TeamStatus(row.status),
-                total_matches=0,
-                matches_won=0,
-                matches_lost=0,
-                total_profit=0.0,
-                created_at=row.created_at,
-                updated_at=row.updated_at
-            )
+            return _row_to_team(row)
+
+    async def get_team_async(self, team_id: str, user_id: str) -> Optional[Team]:
+        """get_team fără să blocheze event loop-ul"""
+        async with self.async_engine.connect() as conn:
+            result = await conn.execute(text("""
+                SELECT * FROM teams
+                WHERE id = :team_id AND user_id = :user_id
+            """), {"team_id": team_id, "user_id": user_id})
+            row = result.fetchone()
+            return _row_to_team(row) if row else None
 
     def count_user_teams(self, user_id: str, active_only: bool = True) -> int:
         """Count teams for a user"""
@@ -110,6 +179,15 @@ class TeamsRepository:
 
             return result.scalar()
 
+    def get_tracked_team_names(self) -> List[str]:
+        """Numele distincte ale echipelor active (toți userii)"""
+        with self.engine.connect() as conn:
+            result = conn.execute(text("""
+                SELECT DISTINCT name FROM teams
+                WHERE status = 'active'
+            """))
+            return [row.name for row in result]
+
     def create_team(self, team: Team) -> Team:
         """Create a new team"""
         with self.engine.connect() as conn:
@@ -146,54 +224,26 @@ class TeamsRepository:
 
     def update_team(self, team_id: str, user_id: str, update: TeamUpdate) -> Optional[Team]:
         """Update a team (verify ownership)"""
-        with self.engine.connect() as conn:
-            # Build dynamic update query
-            updates = []
-            params = {"team_id": team_id, "user_id": user_id, "updated_at": datetime.utcnow()}
-
-            if update.name is not None:
-                updates.append("name = :name")
-                params["name"] = update.name
-            if update.betfair_id is not None:
-                updates.append("betfair_id = :betfair_id")
-                params["betfair_id"] = update.betfair_id
-            if update.sport is not None:
-                updates.append("sport = :sport")
-                params["sport"] = update.sport.value
-            if update.league is not None:
-                updates.append("league = :league")
-                params["league"] = update.league
-            if update.country is not None:
-                updates.append("country = :country")
-                params["country"] = update.country
-            if update.status is not None:
-                updates.append("status = :status")
-                params["status"] = update.status.value
-            if update.cumulative_loss is not None:
-                updates.append("cumulative_loss = :cumulative_loss")
-                params["cumulative_loss"] = update.cumulative_loss
-            if update.progression_step is not None:
-                updates.append("progression_step = :progression_step")
-                params["progression_step"] = update.progression_step
-            if update.initial_stake is not None:
-                updates.append("initial_stake = :initial_stake")
-                params["initial_stake"] = update.initial_stake
-
-            if not updates:
-                return self.get_team(team_id, user_id)
-
-            updates.append("updated_at = :updated_at")
-            query = f"""
-                UPDATE teams
-                SET {', '.join(updates)}
-                WHERE id = :team_id AND user_id = :user_id
-            """
+        statement = _update_statement(team_id, user_id, update)
+        if statement is None:
+            return self.get_team(team_id, user_id)
 
-            conn.execute(text(query), params)
+        with self.engine.connect() as conn:
+            conn.execute(text(statement[0]), statement[1])
             conn.commit()
 
+        logger.info(f"Updated team {team_id} for user {user_id}")
+        return self.get_team(team_id, user_id)
+
+    async def update_team_async(self, team_id: str, user_id: str, update: TeamUpdate) -> Optional[Team]:
+        """update_team fără să blocheze event loop-ul"""
+        statement = _update_statement(team_id, user_id, update)
+        if statement is not None:
+            async with self.async_engine.begin() as conn:
+                await conn.execute(text(statement[0]), statement[1])
             logger.info(f"Updated team {team_id} for user {user_id}")
-            return self.get_team(team_id, user_id)
+
+        return await self.get_team_async(team_id, user_id)
 
     def get_team_by_name(self, team_name: str, user_id: str) -> Optional[Team]:
         """Get a team by name (verify ownership)"""
@@ -207,26 +257,17 @@ class TeamsRepository:
             if not row:
                 return None
 
-            return Team(
-                id=row.id,
-                user_id=row.user_id,
-                name=row.name,
-                betfair_id=row.betfair_id,
-                sport=Sport(row.sport),
-                league=row.league,
-                country=row.country,
-                cumulative_loss=row.cumulative_loss,
-                last_stake=row.last_stake,
-                progression_step=row.progression_step,
-                initial_stake=float(row.initial_stake) if hasattr(row, 'initial_stake') else 100.0,
-                status=TeamStatus(row.status),
-                total_matches=0,
-                matches_won=0,
-                matches_lost=0,
-                total_profit=0.0,
-                created_at=row.created_at,
-                updated_at=row.updated_at
-            )
+            return _row_to_team(row)
+
+    async def get_team_by_name_async(self, team_name: str, user_id: str) -> Optional[Team]:
+        """get_team_by_name fără să blocheze event loop-ul"""
+        async with self.async_engine.connect() as conn:
+            result = await conn.execute(text("""
+                SELECT * FROM teams
+                WHERE name = :team_name AND user_id = :user_id
+            """), {"team_name": team_name, "user_id": user_id})
+            row = result.fetchone()
+            return _row_to_team(row) if row else None
 
     def delete_team(self, team_id: str, user_id: str) -> bool:
         """Delete a team (verify ownership)"""
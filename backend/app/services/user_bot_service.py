@@ -2,22 +2,106 @@
 User Bot Service - Bot engine per user
 Gestionează bot-ul pentru un singur user
 """
+import asyncio
 import logging
-from typing import List, Optional
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
 from datetime import datetime
 
 from app.models.schemas import Team, TeamStatus, TeamUpdate
 from app.models.user import User
 from app.services.teams_repository import teams_repository
 from app.services.betfair_client import BetfairClient
-from app.services.google_sheets_multi import google_sheets_multi_service
+from app.services.betfair_session_store import betfair_session_store
+from app.services.event_catalogue import event_catalogue, team_search_terms
+from app.services.fixture_resolutions import fixture_resolutions
+from app.services.market_data import market_data_service
+from app.services.settlement_checkpoints import settlement_checkpoints, parse_settled_date
+from app.services.google_sheets_async import AsyncSheetsService, google_sheets_async_service
+from app.services.sheets_write_queue import sheets_write_queue
+from app.services.bets_repository import bets_repository
 from app.services.encryption import encryption_service
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from app.config import get_settings
+from app.database import get_async_engine, ROLE_SCHEDULER
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Lock per user: verificarea periodică și evenimentele din order stream nu aplică
+# același rezultat de două ori
+_settlement_locks: Dict[str, asyncio.Lock] = {}
+
+# Betfair poate raporta ordinul în listClearedOrders la câteva minute după închiderea pieței
+STREAM_SETTLEMENT_RETRY_SECONDS = (0, 30, 120, 300)
+
+# Pariul plasat pe Betfair trebuie salvat în database (altfel meciul rămâne PROGRAMAT
+# și următoarea rulare pariază din nou): reîncercări înainte de marcajul de rezervă
+RECORD_BET_RETRY_SECONDS = (0, 1, 5)
+
+
+def _settlement_lock(user_id: str) -> asyncio.Lock:
+    lock = _settlement_locks.get(user_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _settlement_locks[user_id] = lock
+    return lock
+
+
+# Lock per echipă: o echipă e procesată de o singură rulare odată (run_bot programat,
+# "run now" sau pariul imediat la adăugare)
+_team_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+
+def _team_lock(user_id: str, team_name: str) -> asyncio.Lock:
+    key = (user_id, team_name)
+    lock = _team_locks.get(key)
+    if lock is None:
+        lock = asyncio.Lock()
+        _team_locks[key] = lock
+    return lock
+
+
+async def _run_to_completion(coro):
+    """
+    Rulează coro până la capăt chiar dacă apelantul e anulat (timeout, oprirea aplicației).
+
+    Folosit pentru plasare + salvare: un ordin acceptat de Betfair trebuie salvat în
+    database înainte ca anularea să continue (și lock-ul echipei să fie eliberat).
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        try:
+            await task
+        except Exception:
+            pass
+        raise
+
+
+# Userii ale căror meciuri / pariuri au fost verificate (și importate din Sheets la nevoie)
+_imported_users: Set[str] = set()
+
+
+class UserWorkItem:
+    """
+    Userul și datele lui încărcate în bulk de scheduler (planul de lucru al rulării):
+    credențialele criptate și echipele active. Mai vechi de scheduler_work_plan_max_age_seconds,
+    sunt recitite din database (între timp echipele pot fi modificate de settlement / API).
+    Echipele din plan decid doar ce echipe sunt vizitate: progresia (cumulative_loss,
+    progression_step) e recitită sub lock-ul echipei, înainte de calculul mizei.
+    """
+
+    def __init__(self, user: User, credentials: Optional[Any], teams: List[Team]):
+        self.user = user
+        self.credentials = credentials
+        self.teams = teams
+        self.loaded_at = time.monotonic()
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() - self.loaded_at <= settings.scheduler_work_plan_max_age_seconds
+
 
 class UserBotService:
     """
@@ -25,74 +109,32 @@ class UserBotService:
     Izolează complet operațiile per user.
     """
 
-    def __init__(self, user: User):
+    def __init__(self, user: User, work_item: Optional[UserWorkItem] = None):
         self.user = user
         self.user_id = user.id
         self.betfair_client: Optional[BetfairClient] = None
-        self.sheets_client: Optional[GoogleSheetsMultiService] = None
-        self.engine = create_engine(settings.database_url)
+        self.sheets_client: Optional[AsyncSheetsService] = None
+        self.work_item = work_item
 
     async def initialize(self) -> bool:
         """
         Inițializează serviciile pentru acest user:
-        - Betfair credentials
+        - Betfair session (refolosită din betfair_session_store)
         - Google Sheets
         """
         try:
-            # 1. Load și decrypt Betfair credentials
-            credentials = self._load_betfair_credentials()
-            if not credentials:
-                logger.warning(f"User {self.user.email} nu are Betfair credentials")
-                return False
-
-            # 2. Initialize Betfair client
-            self.betfair_client = BetfairClient()
-
-            # Prepare certificate paths if user has SSL certificate
-            cert_path = None
-            key_path = None
-
-            if credentials.get('cert_content') and credentials.get('key_content'):
-                # User has SSL certificate - create temporary files
-                import tempfile
-                try:
-                    # Create temp files for certificate
-                    cert_file = tempfile.NamedTemporaryFile(mode='w', suffix='.crt', delete=False)
-                    cert_file.write(credentials['cert_content'])
-                    cert_file.close()
-                    cert_path = cert_file.name
-
-                    key_file = tempfile.NamedTemporaryFile(mode='w', suffix='.key', delete=False)
-                    key_file.write(credentials['key_content'])
-                    key_file.close()
-                    key_path = key_file.name
-
-                    logger.info(f"Created temporary certificate files for user {self.user.email}")
-                except Exception as e:
-                    logger.error(f"Failed to create temp certificate files: {e}")
-                    cert_path = None
-                    key_path = None
-
-            # Configure Betfair client with or without certificate
-            # IMPORTANT: use_env_fallback=False to prevent master certificate from being used
-            self.betfair_client.configure(
-                app_key=credentials['app_key'],
-                username=credentials['username'],
-                password=credentials['password'],
-                cert_path=cert_path,
-                key_path=key_path,
-                use_env_fallback=False  # Never use env vars for user-specific auth
+            # 1. Betfair client autentificat (sesiune refolosită din store)
+            self.betfair_client = await betfair_session_store.get_client(
+                self.user_id,
+                self._load_betfair_credentials
             )
-
-            # 3. Connect to Betfair
-            await self.betfair_client.connect()
-            if not self.betfair_client.is_connected():
+            if not self.betfair_client or not self.betfair_client.is_connected():
                 logger.error(f"Failed to connect to Betfair for user {self.user.email}")
                 return False
 
-            # 4. Initialize Google Sheets (use singleton to preserve cache)
+            # 2. Initialize Google Sheets (async facade over the cached singleton)
             if self.user.google_sheets_id:
-                self.sheets_client = google_sheets_multi_service
+                self.sheets_client = google_sheets_async_service
                 self.spreadsheet_id = self.user.google_sheets_id
             else:
                 logger.warning(f"User {self.user.email} nu are Google Sheets ID")
@@ -105,81 +147,117 @@ class UserBotService:
             logger.error(f"Failed to initialize bot for user {self.user.email}: {e}")
             return False
 
-    def _load_betfair_credentials(self) -> Optional[dict]:
-        """Load și decrypt Betfair credentials pentru acest user"""
-        with self.engine.connect() as conn:
-            result = conn.execute(text("""
-                SELECT username_encrypted, password_encrypted, app_key_encrypted,
-                       cert_encrypted, key_encrypted
-                FROM betfair_credentials
-                WHERE user_id = :user_id
-            """), {"user_id": self.user_id})
+    async def _load_betfair_credentials(self) -> Optional[dict]:
+        """Load și decrypt Betfair credentials pentru acest user (din planul de lucru, dacă e recent)"""
+        if self.work_item and self.work_item.is_fresh():
+            row = self.work_item.credentials
+        else:
+            async with get_async_engine(ROLE_SCHEDULER).connect() as conn:
+                result = await conn.execute(text("""
+                    SELECT username_encrypted, password_encrypted, app_key_encrypted,
+                           cert_encrypted, key_encrypted
+                    FROM betfair_credentials
+                    WHERE user_id = :user_id
+                """), {"user_id": self.user_id})
+                row = result.fetchone()
+
+        if not row:
+            logger.warning(f"User {self.user.email} nu are Betfair credentials")
+            return None
 
-            row = result.fetchone()
-            if not row:
-                return None
+        try:
+            credentials = {
+                'username': encryption_service.decrypt(row.username_encrypted),
+                'password': encryption_service.decrypt(row.password_encrypted),
+                'app_key': encryption_service.decrypt(row.app_key_encrypted),
+                'cert_content': None,
+                'key_content': None
+            }
+
+            # Load certificate if exists
+            if row.cert_encrypted and row.key_encrypted:
+                try:
+                    credentials['cert_content'] = encryption_service.decrypt(row.cert_encrypted)
+                    credentials['key_content'] = encryption_service.decrypt(row.key_encrypted)
+                    logger.info(f"Loaded SSL certificate for user {self.user.email}")
+                except Exception as cert_error:
+                    logger.warning(f"Could not decrypt certificate for user {self.user.email}: {cert_error}")
 
-            try:
-                credentials = {
-                    'username': encryption_service.decrypt(row.username_encrypted),
-                    'password': encryption_service.decrypt(row.password_encrypted),
-                    'app_key': encryption_service.decrypt(row.app_key_encrypted),
-                    'cert_content': None,
-                    'key_content': None
-                }
-
-                # Load certificate if exists
-                if row.cert_encrypted and row.key_encrypted:
-                    try:
-                        credentials['cert_content'] = encryption_service.decrypt(row.cert_encrypted)
-                        credentials['key_content'] = encryption_service.decrypt(row.key_encrypted)
-                        logger.info(f"Loaded SSL certificate for user {self.user.email}")
-                    except Exception as cert_error:
-                        logger.warning(f"Could not decrypt certificate for user {self.user.email}: {cert_error}")
-
-                return credentials
-            except Exception as e:
-                logger.error(f"Failed to decrypt credentials for user {self.user.email}: {e}")
-                return None
+            return credentials
+        except Exception as e:
+            logger.error(f"Failed to decrypt credentials for user {self.user.email}: {e}")
+            return None
 
-    def get_active_teams(self) -> List[Team]:
-        """Get active teams pentru acest user din DATABASE"""
-        return teams_repository.get_user_teams(self.user_id, active_only=True)
+    async def get_active_teams(self) -> List[Team]:
+        """Get active teams pentru acest user din DATABASE (din planul de lucru, dacă e recent)"""
+        if self.work_item and self.work_item.is_fresh():
+            return list(self.work_item.teams)
+        return await teams_repository.get_user_teams_async(self.user_id, active_only=True)
 
-    async def run_bot(self) -> dict:
+    async def run_bot(self, deadline: Optional[float] = None) -> dict:
         """
         Rulează bot-ul pentru acest user.
 
+        Args:
+            deadline: time.monotonic() după care nu mai e pornită nicio echipă
+                      (echipele în lucru se termină - o plasare nu e întreruptă)
+
         Returns:
-            dict cu statistici: teams_processed, bets_placed, errors
+            dict cu statistici: teams_processed, bets_placed, teams_skipped, errors
         """
         stats = {
             'user_email': self.user.email,
             'teams_processed': 0,
             'bets_placed': 0,
+            'teams_skipped': 0,
             'errors': []
         }
 
         try:
-            # 1. Get active teams
-            teams = self.get_active_teams()
+            # 1. Get active teams (o echipă o singură dată per rulare)
+            teams = list({team.name: team for team in await self.get_active_teams()}.values())
             if not teams:
                 logger.info(f"User {self.user.email} nu are echipe active")
                 return stats
 
             logger.info(f"Processing {len(teams)} teams for user {self.user.email}")
 
-            # 2. Process fiecare echipă
-            for team in teams:
-                try:
-                    process_result = await self._process_team(team)
-                    stats['teams_processed'] += 1
-                    if process_result.get('bet_placed'):
-                        stats['bets_placed'] += 1
-                except Exception as e:
-                    error_msg = f"Error processing team {team.name}: {e}"
+            # 2. Importul din Sheets (o singură dată per user), înainte de echipele concurente
+            await self._ensure_imported()
+
+            # 3. Process echipele concurent (limitat), fiecare sub lock-ul ei.
+            # Pariul e salvat în database înainte ca lock-ul să fie eliberat, iar pariurile
+            # PENDING sunt citite după ce lock-ul e obținut - un pariu plasat între timp de
+            # altă rulare ("run now", echipă nouă) e văzut (Sheets primește copia prin coada write-behind).
+            semaphore = asyncio.Semaphore(settings.bot_team_concurrency)
+
+            async def run_team(team: Team) -> dict:
+                lock = _team_lock(self.user_id, team.name)
+                if lock.locked():
+                    logger.info(f"Skip {team.name} - echipa e deja în procesare")
+                    return {'bet_placed': False, 'team_name': team.name, 'reason': 'already_processing'}
+                async with lock, semaphore:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        return {'bet_placed': False, 'team_name': team.name, 'reason': 'deadline_exceeded'}
+                    return await self._process_team(team)
+
+            results = await asyncio.gather(*(run_team(team) for team in teams), return_exceptions=True)
+
+            for team, process_result in zip(teams, results):
+                if isinstance(process_result, Exception):
+                    error_msg = f"Error processing team {team.name}: {process_result}"
                     logger.error(error_msg)
                     stats['errors'].append(error_msg)
+                    continue
+                if process_result.get('reason') == 'deadline_exceeded':
+                    stats['teams_skipped'] += 1
+                    continue
+                stats['teams_processed'] += 1
+                if process_result.get('bet_placed'):
+                    stats['bets_placed'] += 1
+
+            if stats['teams_skipped']:
+                logger.warning(f"⏱️ Timp depășit pentru {self.user.email}: {stats['teams_skipped']} echipe amânate")
 
             logger.info(f"✅ Bot completed for user {self.user.email}: {stats}")
             return stats
@@ -190,16 +268,47 @@ class UserBotService:
             stats['errors'].append(error_msg)
             return stats
 
+    async def _ensure_imported(self) -> None:
+        """
+        Import unic din Google Sheets pentru userii care au meciuri doar acolo
+        (create înainte de tabelele scheduled_matches / bets).
+        """
+        if self.user_id in _imported_users:
+            return
+        imported = await bets_repository.get_teams_with_matches_async(self.user_id)
+        teams = [team for team in await teams_repository.get_user_teams_async(self.user_id) if team.name not in imported]
+        if teams:
+            snapshot = await self.sheets_client.get_snapshot(self.spreadsheet_id)
+            await bets_repository.import_from_snapshot_async(self.user_id, teams, snapshot)
+        _imported_users.add(self.user_id)
+
+    async def _get_pending_bets(self, team_name: str = None) -> List[dict]:
+        """Pariurile PENDING din DATABASE (source of truth)."""
+        await self._ensure_imported()
+        return await bets_repository.get_pending_bets_async(self.user_id, team_name)
+
+    async def _get_scheduled_matches(self, team_name: str) -> List[dict]:
+        """Meciurile echipei fără pariu, din DATABASE."""
+        await self._ensure_imported()
+        return await bets_repository.get_scheduled_matches_async(self.user_id, team_name)
+
     async def _process_team(self, team: Team) -> dict:
         """
         Procesează o echipă - LOGICA DIN VPS ADAPTATĂ PER USER:
         1. Verifică dacă are pariu PENDING (skip dacă da)
-        2. Citește meciuri programate din Google Sheets
+        2. Citește meciurile programate din database
         3. Ia primul meci fără status
         4. Calculează miză Martingale
         5. Găsește meciul pe Betfair (by date + name)
         6. Plasează pariu
-        7. Update Google Sheets cu status PENDING
+        7. Salvează pariul în database, apoi status PENDING în Google Sheets
+
+        Apelat cu lock-ul echipei deținut. Rândul echipei e recitit aici: echipa primită
+        poate veni din planul de lucru, iar între timp un settlement (order stream /
+        verificarea rezultatelor) îi poate fi schimbat progresia.
+
+        Args:
+            team: Echipa
 
         Returns:
             dict cu 'bet_placed': True/False și alte detalii
@@ -212,14 +321,22 @@ class UserBotService:
 
         try:
             # 1. Verifică dacă echipa are deja un pariu PENDING
-            pending_bets = self.sheets_client.get_pending_bets(self.spreadsheet_id, team.name)
+            pending_bets = await self._get_pending_bets(team.name)
             if pending_bets:
                 logger.info(f"Skip {team.name} - are deja {len(pending_bets)} pariu(ri) PENDING")
                 result['reason'] = 'has_pending_bet'
                 return result
 
-            # 2. Get scheduled matches from team's sheet
-            scheduled_matches = self.sheets_client.get_scheduled_matches(self.spreadsheet_id, team.name)
+            # Progresia curentă din DATABASE (nu cea din planul de lucru)
+            current = await teams_repository.get_team_async(team.id, self.user_id)
+            if not current or current.status != TeamStatus.ACTIVE:
+                logger.info(f"Skip {team.name} - echipa nu mai e activă")
+                result['reason'] = 'team_inactive'
+                return result
+            team = current
+
+            # 2. Get scheduled matches (database)
+            scheduled_matches = await self._get_scheduled_matches(team.name)
 
             if not scheduled_matches:
                 logger.info(f"Nu există meciuri programate pentru {team.name}")
@@ -267,8 +384,7 @@ class UserBotService:
             if stop_loss:
                 logger.warning(f"Stop loss atins pentru {team.name}")
                 # Pause team în DATABASE
-                from app.services.teams_repository import teams_repository
-                teams_repository.update_team(
+                await teams_repository.update_team_async(
                     team.id,
                     self.user_id,
                     TeamUpdate(status=TeamStatus.PAUSED)
@@ -276,7 +392,7 @@ class UserBotService:
 
                 # Sync status în Google Sheets
                 try:
-                    self.sheets_client.update_team_in_index(
+                    await self.sheets_client.update_team_in_index(
                         self.spreadsheet_id,
                         team.id,
                         {'id': team.id, 'name': team.name, 'status': 'paused'}
@@ -290,116 +406,31 @@ class UserBotService:
 
             logger.info(f"Plasare pariu: {team.name} - {event_name} - Miză: {stake} @ {odds}")
 
-            # 5. Find market on Betfair and place bet
-            # Extract main team name (remove FC, United, etc for better matching)
-            search_terms = [team.name]
-            for suffix in [" FC", " United FC", " United"]:
-                if team.name.endswith(suffix):
-                    search_terms.append(team.name[:-len(suffix)])
-
-            events = None
-            for search_term in search_terms:
-                events = await self.betfair_client.list_events(
-                    event_type_id="1",
-                    text_query=search_term
-                )
-                if events:
-                    logger.info(f"Găsit evenimente cu search term: {search_term}")
-                    break
-
-            if not events:
-                logger.warning(f"Nu s-a găsit evenimentul pe Betfair: {event_name}")
-                result['reason'] = 'event_not_found_betfair'
-                return result
-
-            # 6. Find matching event BY DATE
-            match_date_only = match_date_str[:10] if match_date_str else ""  # "2025-11-29"
-
-            event_id = None
-            matched_event_name = None
-            for ev in events:
-                ev_data = ev.get("event", {})
-                ev_name = ev_data.get("name", "")
-                ev_open_date = ev_data.get("openDate", "")
-                ev_date_only = ev_open_date[:10] if ev_open_date else ""
-
-                # Verificăm dacă numele se potrivește ȘI data e aceeași
-                name_matches = False
-                for search_term in search_terms:
-                    if search_term.lower() in ev_name.lower():
-                        name_matches = True
-                        break
-
-                if name_matches and ev_date_only == match_date_only:
-                    event_id = ev_data.get("id")
-                    matched_event_name = ev_name
-                    logger.info(f"Match găsit cu data corectă: {ev_name} (event_id: {event_id}, data: {ev_date_only})")
-                    break
-
-            if not event_id:
-                logger.warning(f"Nu s-a găsit event_id pentru {team.name} cu data {match_date_only}")
-                result['reason'] = 'event_id_not_found'
+            # 5. Find match on Betfair (catalog global, lookup în memorie)
+            fixture, reason = await self._resolve_fixture(team.name, match_date_str, team.betfair_id)
+            if not fixture:
+                logger.warning(f"Nu s-a găsit meciul pe Betfair pentru {team.name}: {event_name} ({reason})")
+                result['reason'] = reason
                 return result
+            await self._remember_selection_id(team, fixture)
 
-            # 7. Get market
-            markets = await self.betfair_client.list_market_catalogue(
-                event_ids=[event_id],
-                market_type_codes=["MATCH_ODDS"]
+            market_id = fixture['market_id']
+            selection_id = fixture['selection_id']
+            logger.info(
+                f"Selectat runner: {fixture['runner_name']} (ID: {selection_id}) pentru {team.name} "
+                f"- {fixture['event_name']} (event_id: {fixture['event_id']})"
             )
 
-            if not markets:
-                logger.warning(f"Nu s-a găsit piața pentru {event_name}")
-                result['reason'] = 'market_not_found'
-                return result
-
-            market = markets[0]
-            market_id = market.get("marketId", "")
-
-            # 8. Get selection ID - găsim runner-ul care conține numele echipei noastre
-            runners = market.get("runners", [])
-            if not runners:
-                logger.warning(f"Nu s-au găsit runners pentru {event_name}")
-                result['reason'] = 'no_runners'
-                return result
-
-            # IMPORTANT: Folosim match EXACT pentru a evita meciuri greșite (ex: Arsenal vs Arsenal Wolves)
-            selection_id = None
-            selected_runner_name = None
-            for runner in runners:
-                runner_name = runner.get("runnerName", "")
-                for search_term in search_terms:
-                    if search_term.lower() == runner_name.lower():
-                        selection_id = str(runner.get("selectionId", ""))
-                        selected_runner_name = runner_name
-                        break
-                if selection_id:
-                    break
-
-            if not selection_id:
-                logger.warning(f"Nu s-a găsit runner pentru echipa {team.name} în meciul {event_name}")
-                logger.warning(f"  Runners disponibili: {[r.get('runnerName') for r in runners]}")
-                result['reason'] = 'runner_not_found'
-                return result
-
-            logger.info(f"Selectat runner: {selected_runner_name} (ID: {selection_id}) pentru {team.name}")
-
-            # 9. Place bet
-            place_result = await self.betfair_client.place_bet(
-                market_id=market_id,
-                selection_id=selection_id,
-                stake=stake,
-                odds=odds
-            )
+            # 6-7. Place bet, save DATABASE (source of truth), apoi Google Sheets (write-behind)
+            place_result, recorded = await _run_to_completion(self._place_and_record(
+                team, event_name, match_date_str, market_id, selection_id, stake, odds
+            ))
 
             if place_result.success:
-                # 10. Update Google Sheets - match status
-                self.sheets_client.update_match_status(
-                    self.spreadsheet_id, team.name, event_name, "PENDING",
-                    stake=stake, bet_id=place_result.bet_id
-                )
-
-                # Update last_stake în Index
-                self.sheets_client.update_last_stake(self.spreadsheet_id, team.name, stake)
+                if not recorded:
+                    result['bet_id'] = place_result.bet_id
+                    result['reason'] = 'bet_not_recorded'
+                    return result
 
                 logger.info(
                     f"✅ Pariu plasat: {team.name} - {event_name} - "
@@ -413,8 +444,10 @@ class UserBotService:
                 result['event_name'] = event_name
             else:
                 logger.error(f"Eroare plasare pariu {team.name}: {place_result.error_message}")
-                self.sheets_client.update_match_status(
-                    self.spreadsheet_id, team.name, event_name, "ERROR"
+                await self._forget_fixture(selection_id, match_date_str)
+                await bets_repository.mark_match_status_async(self.user_id, team.name, event_name, match_date_str, "ERROR")
+                sheets_write_queue.update_match(
+                    self.spreadsheet_id, team.name, event_name, "ERROR", match_date=match_date_str
                 )
                 result['reason'] = f'bet_placement_error: {place_result.error_message}'
 
@@ -425,17 +458,308 @@ class UserBotService:
             result['reason'] = f'exception: {str(e)}'
             raise
 
+    async def _place_and_record(
+        self,
+        team: Team,
+        event_name: str,
+        match_date_str: str,
+        market_id: str,
+        selection_id: str,
+        stake: float,
+        odds: float
+    ) -> Tuple[Any, bool]:
+        """
+        Plasează pariul și, dacă Betfair îl acceptă, îl salvează în database și în coada Sheets.
+        Se rulează cu _run_to_completion (nu e întrerupt între plasare și salvare).
+
+        Returns:
+            (rezultatul place_bet, True dacă pariul e salvat în database)
+        """
+        place_result = await self.betfair_client.place_bet(
+            market_id=market_id,
+            selection_id=selection_id,
+            stake=stake,
+            odds=odds
+        )
+        if not place_result.success:
+            return place_result, False
+
+        recorded = await self._record_placed_bet(
+            team, event_name, match_date_str, place_result.bet_id,
+            stake, odds, market_id, selection_id
+        )
+        sheets_write_queue.update_match(
+            self.spreadsheet_id, team.name, event_name, "PENDING",
+            stake=stake, bet_id=place_result.bet_id, match_date=match_date_str
+        )
+        sheets_write_queue.update_last_stake(self.spreadsheet_id, team.name, stake)
+        return place_result, recorded
+
+    async def _record_placed_bet(
+        self,
+        team: Team,
+        event_name: str,
+        match_date_str: str,
+        bet_id: str,
+        stake: float,
+        odds: float,
+        market_id: str,
+        selection_id: str
+    ) -> bool:
+        """
+        Salvează pariul plasat pe Betfair (reîncercat după RECORD_BET_RETRY_SECONDS).
+
+        Dacă nu poate fi salvat, meciul e marcat PENDING (nu mai e ales de rulările
+        următoare) și bet_id-ul e logat pentru reconciliere.
+
+        Returns:
+            True dacă pariul e în database
+        """
+        for delay in RECORD_BET_RETRY_SECONDS:
+            if delay:
+                await asyncio.sleep(delay)
+            if await bets_repository.record_bet_async(
+                self.user_id, team, event_name, match_date_str, bet_id,
+                stake, odds, market_id=market_id, selection_id=selection_id
+            ):
+                return True
+
+        logger.error(
+            f"Pariul {bet_id} a fost plasat pe Betfair dar NU a putut fi salvat în database: "
+            f"{self.user.email} - {team.name} - {event_name} ({match_date_str}) - Miză: {stake} @ {odds}"
+        )
+        for delay in RECORD_BET_RETRY_SECONDS:
+            if delay:
+                await asyncio.sleep(delay)
+            if await bets_repository.mark_match_status_async(
+                self.user_id, team.name, event_name, match_date_str, "PENDING"
+            ):
+                return False
+
+        logger.error(f"Nici meciul pariului {bet_id} ({team.name} - {event_name}) nu a putut fi marcat PENDING")
+        return False
+
+    async def _resolve_fixture(
+        self,
+        team_name: str,
+        match_date_str: str,
+        selection_id: Optional[str] = None
+    ) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Găsește event_id / market_id / selection_id pentru meciul unei echipe.
+
+        Întâi în fixture_resolutions (dacă echipa are selectionId salvat), apoi în
+        catalogul global de evenimente (lookup în memorie), încărcat prin planul de
+        date master. Doar dacă catalogul nu a putut fi încărcat se revine la căutarea
+        textQuery per echipă cu clientul userului. Meciul găsit e salvat pentru
+        următoarele rulări (ale oricărui user care urmărește echipa).
+
+        Returns:
+            (fixture, None) dacă a fost găsit, altfel (None, motiv)
+        """
+        search_terms = team_search_terms(team_name)
+        match_date_only = match_date_str[:10] if match_date_str else ""  # "2025-11-29"
+
+        if selection_id and match_date_only:
+            try:
+                fixture = await fixture_resolutions.get(selection_id, match_date_only)
+                if fixture:
+                    return fixture, None
+            except Exception as e:
+                logger.warning(f"Eroare la citirea fixture_resolutions pentru {team_name}: {e}")
+
+        if await market_data_service.ensure_catalogue(fallback_client=self.betfair_client):
+            fixture = event_catalogue.find_fixture(search_terms, match_date_only)
+            reason = None if fixture else 'event_id_not_found'
+        else:
+            logger.warning("Catalog evenimente indisponibil - fallback la căutare textQuery")
+            fixture, reason = await self._resolve_fixture_via_search(search_terms, match_date_only)
+
+        if fixture and match_date_only:
+            try:
+                await fixture_resolutions.save(match_date_only, fixture)
+            except Exception as e:
+                logger.warning(f"Eroare la salvarea în fixture_resolutions pentru {team_name}: {e}")
+
+        return fixture, reason
+
+    async def _remember_selection_id(self, team: Optional[Team], fixture: dict) -> None:
+        """Salvează selectionId-ul găsit pe echipa care nu îl avea (următoarele rulări folosesc fixture_resolutions)."""
+        if not team or team.betfair_id or not fixture.get('selection_id'):
+            return
+        try:
+            await teams_repository.update_team_async(
+                team.id,
+                self.user_id,
+                TeamUpdate(betfair_id=fixture['selection_id'])
+            )
+            team.betfair_id = fixture['selection_id']
+        except Exception as e:
+            logger.warning(f"Nu s-a putut salva selectionId pentru {team.name}: {e}")
+
+    async def _forget_fixture(self, selection_id: str, match_date_str: str) -> None:
+        """Plasarea a eșuat: meciul e rezolvat din nou la următoarea rulare."""
+        if not selection_id or not match_date_str:
+            return
+        try:
+            await fixture_resolutions.invalidate(selection_id, match_date_str[:10])
+        except Exception as e:
+            logger.warning(f"Eroare la ștergerea din fixture_resolutions: {e}")
+
+    async def _resolve_fixture_via_search(
+        self,
+        search_terms: List[str],
+        match_date_only: str
+    ) -> Tuple[Optional[dict], Optional[str]]:
+        """Căutare clasică: listEvents(textQuery) + listMarketCatalogue pentru un eveniment."""
+        events = None
+        for search_term in search_terms:
+            events = await self.betfair_client.list_events(
+                event_type_id="1",
+                text_query=search_term
+            )
+            if events:
+                break
+
+        if not events:
+            return None, 'event_not_found_betfair'
+
+        # Find matching event BY DATE
+        event_id = None
+        matched_event_name = None
+        for ev in events:
+            ev_data = ev.get("event", {})
+            ev_name = ev_data.get("name", "")
+            ev_open_date = ev_data.get("openDate", "")
+            ev_date_only = ev_open_date[:10] if ev_open_date else ""
+
+            name_matches = any(st.lower() in ev_name.lower() for st in search_terms)
+            if name_matches and ev_date_only == match_date_only:
+                event_id = ev_data.get("id")
+                matched_event_name = ev_name
+                break
+
+        if not event_id:
+            return None, 'event_id_not_found'
+
+        markets = await self.betfair_client.list_market_catalogue(
+            event_ids=[event_id],
+            market_type_codes=["MATCH_ODDS"]
+        )
+        if not markets:
+            return None, 'market_not_found'
+
+        market = markets[0]
+        runners = market.get("runners", [])
+        if not runners:
+            return None, 'no_runners'
+
+        # IMPORTANT: Folosim match EXACT pentru a evita meciuri greșite (ex: Arsenal vs Arsenal Wolves)
+        for runner in runners:
+            runner_name = runner.get("runnerName", "")
+            if any(st.lower() == runner_name.lower() for st in search_terms):
+                return {
+                    "event_id": event_id,
+                    "event_name": matched_event_name,
+                    "market_id": market.get("marketId", ""),
+                    "selection_id": str(runner.get("selectionId", "")),
+                    "runner_name": runner_name,
+                    "market": market
+                }, None
+
+        logger.warning(f"  Runners disponibili: {[r.get('runnerName') for r in runners]}")
+        return None, 'runner_not_found'
+
     async def check_bet_results(self) -> dict:
         """
         Verifică rezultatele pariurilor PENDING - LOGICA DIN VPS:
-        1. Citește pariurile PENDING din Google Sheets
+        1. Citește pariurile PENDING din database
         2. Verifică pe Betfair dacă sunt settled
-        3. Actualizează status (WON/LOST) în Google Sheets
+        3. Actualizează status (WON/LOST) în database și Google Sheets
         4. Actualizează progresia echipei (cumulative_loss, progression_step)
         """
-        from app.services.staking import staking_service
+        results = self._empty_results()
+
+        try:
+            async with _settlement_lock(self.user_id):
+                # Get pending bets from DATABASE
+                pending_bets = await self._get_pending_bets()
+                results['pending_checked'] = len(pending_bets)
+
+                if not pending_bets:
+                    logger.info(f"Nu există pariuri PENDING pentru user {self.user.email}")
+                    return results
+
+                logger.info(f"Verificare {len(pending_bets)} pariuri PENDING pentru {self.user.email}")
+
+                # Get settled orders from Betfair - doar cele finalizate de la checkpoint-ul anterior
+                checkpoint = await settlement_checkpoints.get_async(self.user_id)
+                settled_orders = await self.betfair_client.get_cleared_orders_since(
+                    settlement_checkpoints.window_start(checkpoint)
+                )
+                if settled_orders is None:
+                    results['errors'].append("Nu s-au putut citi ordinele finalizate de pe Betfair")
+                    return results
+
+                failed_settled_dates = await self._apply_settled_orders(pending_bets, settled_orders, results)
+
+                # Checkpoint avansat doar după procesarea ordinelor
+                new_checkpoint = settlement_checkpoints.next_checkpoint(
+                    checkpoint, settled_orders, failed_settled_dates
+                )
+                if new_checkpoint:
+                    await settlement_checkpoints.save_async(self.user_id, new_checkpoint)
+
+            logger.info(f"✅ Check results completed for {self.user.email}: {results}")
+            return results
+
+        except Exception as e:
+            error_msg = f"Check results failed for {self.user.email}: {e}"
+            logger.error(error_msg, exc_info=True)
+            results['errors'].append(error_msg)
+            return results
 
-        results = {
+    async def process_settled_bets(self, bet_ids: List[str]) -> dict:
+        """
+        Procesează pariurile unei piețe închise (eveniment din order stream).
+
+        Cere listClearedOrders doar pentru aceste pariuri și aplică aceeași
+        logică de progresie ca check_bet_results.
+        """
+        results = self._empty_results()
+        wanted = {str(b) for b in bet_ids}
+
+        try:
+            async with _settlement_lock(self.user_id):
+                pending_bets = [
+                    bet for bet in await self._get_pending_bets()
+                    if str(bet.get("Bet ID", "")) in wanted
+                ]
+                results['pending_checked'] = len(pending_bets)
+                if not pending_bets:
+                    return results
+
+                settled_orders = await self.betfair_client.get_cleared_orders_for_bets(
+                    [str(bet.get("Bet ID")) for bet in pending_bets]
+                )
+                if settled_orders is None:
+                    results['errors'].append("Nu s-au putut citi ordinele finalizate de pe Betfair")
+                    results['still_pending'] = len(pending_bets)
+                    return results
+
+                await self._apply_settled_orders(pending_bets, settled_orders, results)
+
+            logger.info(f"✅ Stream settlement pentru {self.user.email}: {results}")
+            return results
+
+        except Exception as e:
+            error_msg = f"Stream settlement failed for {self.user.email}: {e}"
+            logger.error(error_msg, exc_info=True)
+            results['errors'].append(error_msg)
+            return results
+
+    def _empty_results(self) -> dict:
+        return {
             'user_email': self.user.email,
             'pending_checked': 0,
             'settled_found': 0,
@@ -445,149 +769,108 @@ class UserBotService:
             'errors': []
         }
 
-        try:
-            # Get pending bets from Google Sheets
-            pending_bets = self.sheets_client.get_pending_bets(self.spreadsheet_id)
-            results['pending_checked'] = len(pending_bets)
-
-            if not pending_bets:
-                logger.info(f"Nu există pariuri PENDING pentru user {self.user.email}")
-                return results
-
-            logger.info(f"Verificare {len(pending_bets)} pariuri PENDING pentru {self.user.email}")
+    async def _apply_settled_orders(self, pending_bets: List[dict], settled_orders: List[dict], results: dict) -> List[datetime]:
+        """
+        Aplică rezultatele (WON/LOST) pentru pariurile PENDING găsite în settled_orders.
 
-            # Get settled orders from Betfair (ultimele 3 zile)
-            settled_orders = await self.betfair_client.get_settled_orders(days=3)
+        Echipa e citită din DB indiferent de status (un pariu al unei echipe puse pe pauză
+        se settle-uiește normal); dacă echipa a fost ștearsă se marchează doar pariul.
 
-            # Create a map of bet_id -> settled order
-            settled_map = {}
-            for order in settled_orders:
-                bet_id = str(order.get("betId", ""))
-                if bet_id:
-                    settled_map[bet_id] = order
+        Returns:
+            settledDate-urile ordinelor care nu au putut fi procesate (erori tranzitorii)
+        """
+        from app.services.staking import staking_service
 
-            logger.info(f"Găsite {len(settled_map)} ordine settled pe Betfair pentru {self.user.email}")
+        # Create a map of bet_id -> settled order
+        settled_map = {}
+        for order in settled_orders:
+            bet_id = str(order.get("betId", ""))
+            if bet_id:
+                settled_map[bet_id] = order
 
-            # Load all teams from DATABASE (source of truth)
-            teams = self.get_active_teams()
+        logger.info(f"Găsite {len(settled_map)} ordine settled pe Betfair pentru {self.user.email}")
 
-            # Check each pending bet
-            for bet in pending_bets:
-                bet_id = str(bet.get("Bet ID", ""))
-                team_name = bet.get("team_name", "")
-                event_name = bet.get("Meci", "")
-                stake = float(bet.get("Miză", 0))
+        failed_settled_dates = []
 
-                if not bet_id or bet_id not in settled_map:
-                    results['still_pending'] += 1
-                    continue
+        # Check each pending bet
+        for bet in pending_bets:
+            bet_id = str(bet.get("Bet ID", ""))
+            team_name = bet.get("team_name", "")
+            event_name = bet.get("Meci", "")
+            match_date = bet.get("Data", "")
+            stake = float(bet.get("Miză", 0))
 
-                # Bet is settled!
-                settled_order = settled_map[bet_id]
-                profit = float(settled_order.get("profit", 0))
+            if not bet_id or bet_id not in settled_map:
+                results['still_pending'] += 1
+                continue
 
-                results['settled_found'] += 1
+            # Bet is settled!
+            settled_order = settled_map[bet_id]
+            profit = float(settled_order.get("profit", 0))
 
-                # Find team in loaded teams
-                from app.services.teams_repository import teams_repository
-                team_obj = None
-                for t in teams:
-                    if t.name == team_name:
-                        team_obj = t
-                        break
+            results['settled_found'] += 1
+            won = profit > 0
 
+            try:
+                # Progresia curentă din DATABASE (source of truth), citită la fiecare pariu
+                team_obj = await teams_repository.get_team_by_name_async(team_name, self.user_id)
                 if not team_obj:
-                    logger.warning(f"Nu s-a găsit echipa {team_name} în database")
-                    continue
-
-                cumulative_loss = team_obj.cumulative_loss
-                progression_step = team_obj.progression_step
+                    logger.warning(f"Echipa {team_name} nu mai există - pariul {bet_id} e marcat fără progresie")
 
-                if profit > 0:
-                    # WON
-                    results['won'] += 1
+                if won:
                     profit_amount, new_cumulative_loss, new_progression_step = staking_service.process_win(
                         stake, float(bet.get("Cotă", 0))
                     )
-
-                    logger.info(f"✅ WON: {team_name} - {event_name} - Profit: {profit_amount} RON")
-
-                    # Update DATABASE (source of truth)
-                    teams_repository.update_team(
-                        team_obj.id,
-                        self.user_id,
-                        TeamUpdate(
-                            cumulative_loss=new_cumulative_loss,
-                            progression_step=new_progression_step
-                        )
-                    )
-
-                    # Sync Google Sheets (vizualizare)
-                    try:
-                        self.sheets_client.update_match_status(
-                            self.spreadsheet_id, team_name, event_name, "WON",
-                            profit_loss=profit_amount
-                        )
-                        self.sheets_client.update_team_progression(
-                            self.spreadsheet_id, team_name,
-                            cumulative_loss=new_cumulative_loss,
-                            progression_step=new_progression_step,
-                            won=True,
-                            profit=profit_amount
-                        )
-                        logger.info(f"Sheets sincronizat: {team_name} WON")
-                    except Exception as sheets_err:
-                        logger.warning(f"Nu s-a putut sincroniza Sheets pentru {team_name} WON: {sheets_err}")
-
-                else:
-                    # LOST
-                    results['lost'] += 1
+                elif team_obj:
                     loss_amount, new_cumulative_loss, new_progression_step = staking_service.process_loss(
-                        stake, cumulative_loss, progression_step
-                    )
-
-                    logger.info(f"❌ LOST: {team_name} - {event_name} - Loss: {loss_amount} RON")
-
-                    # Update DATABASE (source of truth)
-                    teams_repository.update_team(
-                        team_obj.id,
-                        self.user_id,
-                        TeamUpdate(
-                            cumulative_loss=new_cumulative_loss,
-                            progression_step=new_progression_step
-                        )
+                        stake, team_obj.cumulative_loss, team_obj.progression_step
                     )
+                else:
+                    loss_amount, new_cumulative_loss, new_progression_step = stake, 0.0, 0
+
+                # Pariul settled și progresia echipei în aceeași tranzacție;
+                # False = deja aplicat de altă verificare
+                if not await bets_repository.settle_bet_and_progress_async(
+                    self.user_id, bet_id, "WON" if won else "LOST", profit,
+                    team_obj.id if team_obj else None, new_cumulative_loss, new_progression_step
+                ):
+                    logger.info(f"Pariul {bet_id} ({team_name}) e deja settled - skip")
+                    continue
+            except Exception as e:
+                # Eroare tranzitorie (DB) - checkpoint-ul rămâne în urmă, pariul e reîncercat
+                logger.error(f"Eroare la settlement pentru pariul {bet_id} ({team_name}): {e}")
+                results['errors'].append(f"Settlement {bet_id}: {e}")
+                failed_settled_dates.append(parse_settled_date(settled_order.get("settledDate")))
+                continue
+
+            if won:
+                results['won'] += 1
+                logger.info(f"✅ WON: {team_name} - {event_name} - Profit: {profit_amount} RON")
+                sheets_result, sheets_profit = "WON", profit_amount
+            else:
+                results['lost'] += 1
+                logger.info(f"❌ LOST: {team_name} - {event_name} - Loss: {loss_amount} RON")
+                sheets_result, sheets_profit = "LOST", loss_amount
+
+            # Sync Google Sheets (vizualizare, write-behind)
+            sheets_write_queue.update_match(
+                self.spreadsheet_id, team_name, event_name, sheets_result,
+                profit_loss=sheets_profit, match_date=match_date
+            )
+            if team_obj:
+                sheets_write_queue.update_team_progression(
+                    self.spreadsheet_id, team_name,
+                    cumulative_loss=new_cumulative_loss,
+                    progression_step=new_progression_step,
+                    won=won,
+                    profit=profit_amount if won else -loss_amount
+                )
 
-                    # Sync Google Sheets (vizualizare)
-                    try:
-                        self.sheets_client.update_match_status(
-                            self.spreadsheet_id, team_name, event_name, "LOST",
-                            profit_loss=loss_amount
-                        )
-                        self.sheets_client.update_team_progression(
-                            self.spreadsheet_id, team_name,
-                            cumulative_loss=new_cumulative_loss,
-                            progression_step=new_progression_step,
-                            won=False,
-                            profit=-loss_amount
-                        )
-                        logger.info(f"Sheets sincronizat: {team_name} LOST")
-                    except Exception as sheets_err:
-                        logger.warning(f"Nu s-a putut sincroniza Sheets pentru {team_name} LOST: {sheets_err}")
-
-            logger.info(f"✅ Check results completed for {self.user.email}: {results}")
-            return results
-
-        except Exception as e:
-            error_msg = f"Check results failed for {self.user.email}: {e}"
-            logger.error(error_msg, exc_info=True)
-            results['errors'].append(error_msg)
-            return results
+        return failed_settled_dates
 
     async def cleanup(self):
-        """Cleanup resources"""
-        if self.betfair_client and self.betfair_client.is_connected():
-            await self.betfair_client.disconnect()
+        """Cleanup resources (sesiunea Betfair rămâne în store pentru rulările următoare)"""
+        self.betfair_client = None
 
         logger.info(f"Cleaned up bot for user {self.user.email}")
 
@@ -602,6 +885,16 @@ class UserBotService:
         Returns:
             True dacă pariul a fost plasat cu succes
         """
+        lock = _team_lock(self.user_id, team_name)
+        if lock.locked():
+            logger.info(f"Skip pariu imediat pentru {team_name} - echipa e deja în procesare")
+            return False
+
+        async with lock:
+            return await self._place_bet_for_team(team_name, initial_stake)
+
+    async def _place_bet_for_team(self, team_name: str, initial_stake: float) -> bool:
+        """Plasarea efectivă, apelată cu lock-ul echipei deținut."""
         from app.services.staking import staking_service
 
         try:
@@ -612,10 +905,8 @@ class UserBotService:
                     logger.warning(f"Nu s-a putut inițializa bot-ul pentru {self.user.email}")
                     return False
 
-            # Get scheduled matches from Google Sheets
-            scheduled_matches = self.sheets_client.get_scheduled_matches(
-                self.spreadsheet_id, team_name
-            )
+            # Get scheduled matches (database)
+            scheduled_matches = await self._get_scheduled_matches(team_name)
             if not scheduled_matches:
                 logger.info(f"Nu există meciuri programate pentru {team_name}")
                 return False
@@ -648,97 +939,82 @@ class UserBotService:
 
             logger.info(f"Plasare pariu imediat: {team_name} - {event_name} - Miză: {stake} @ {odds}")
 
-            # Find event on Betfair
-            search_terms = [team_name]
-            for suffix in [" FC", " United FC", " United"]:
-                if team_name.endswith(suffix):
-                    search_terms.append(team_name[:-len(suffix)])
-
-            events = None
-            for search_term in search_terms:
-                events = await self.betfair_client.list_events(event_type_id="1", text_query=search_term)
-                if events:
-                    break
-
-            if not events:
-                logger.warning(f"Nu s-a găsit evenimentul pe Betfair: {event_name}")
-                return False
-
-            # Find matching event by date
-            match_date_str = match.get("Data", "")
-            match_date_only = match_date_str[:10] if match_date_str else ""
-            event_id = None
-            for ev in events:
-                ev_data = ev.get("event", {})
-                ev_name = ev_data.get("name", "")
-                ev_open_date = ev_data.get("openDate", "")
-                ev_date_only = ev_open_date[:10] if ev_open_date else ""
-
-                name_matches = any(st.lower() in ev_name.lower() for st in search_terms)
-                if name_matches and ev_date_only == match_date_only:
-                    event_id = ev_data.get("id")
-                    break
-
-            if not event_id:
-                logger.warning(f"Nu s-a găsit event_id pentru {team_name} cu data {match_date_only}")
+            team_obj = await teams_repository.get_team_by_name_async(team_name, self.user_id)
+            if not team_obj:
+                # Fără rândul echipei pariul nu ar putea fi salvat
+                logger.warning(f"Echipa {team_name} nu există în database - pariul nu e plasat")
                 return False
 
-            # Get market
-            markets = await self.betfair_client.list_market_catalogue(event_ids=[event_id], market_type_codes=["MATCH_ODDS"])
-            if not markets:
-                logger.warning(f"Nu s-a găsit piața pentru {event_name}")
+            # Find match on Betfair (rezolvare salvată sau catalog global, lookup în memorie)
+            fixture, reason = await self._resolve_fixture(team_name, match.get("Data", ""), team_obj.betfair_id)
+            if not fixture:
+                logger.warning(f"Nu s-a găsit meciul pe Betfair pentru {team_name}: {event_name} ({reason})")
                 return False
+            await self._remember_selection_id(team_obj, fixture)
 
-            market = markets[0]
-            market_id = market.get("marketId", "")
-            runners = market.get("runners", [])
-
-            # Find runner (match EXACT)
-            selection_id = None
-            for runner in runners:
-                runner_name = runner.get("runnerName", "")
-                if any(st.lower() == runner_name.lower() for st in search_terms):
-                    selection_id = str(runner.get("selectionId", ""))
-                    break
+            market_id = fixture['market_id']
+            selection_id = fixture['selection_id']
 
-            if not selection_id:
-                logger.warning(f"Nu s-a găsit runner pentru {team_name}")
-                return False
-
-            # Place bet
-            place_result = await self.betfair_client.place_bet(
-                market_id=market_id,
-                selection_id=selection_id,
-                stake=stake,
-                odds=odds
-            )
+            # Place bet, save DATABASE, apoi Google Sheets (write-behind)
+            place_result, recorded = await _run_to_completion(self._place_and_record(
+                team_obj, event_name, match.get("Data", ""), market_id, selection_id, stake, odds
+            ))
 
             if place_result.success:
-                # Update Google Sheets
-                self.sheets_client.update_match_status(
-                    self.spreadsheet_id, team_name, event_name, "PENDING",
-                    stake=stake, bet_id=place_result.bet_id
+                if not recorded:
+                    return False
+
+                await teams_repository.update_team_async(
+                    team_obj.id,
+                    self.user_id,
+                    TeamUpdate(cumulative_loss=0, progression_step=0)
                 )
-                self.sheets_client.update_last_stake(self.spreadsheet_id, team_name, stake)
-
-                # Update database
-                team_obj = teams_repository.get_team_by_name(team_name, self.user_id)
-                if team_obj:
-                    teams_repository.update_team(
-                        team_obj.id,
-                        self.user_id,
-                        TeamUpdate(cumulative_loss=0, progression_step=0)
-                    )
 
                 logger.info(f"Pariu plasat cu succes: {team_name} - {event_name} - Miză: {stake} RON @ {odds}")
                 return True
             else:
                 logger.error(f"Eroare plasare pariu {team_name}: {place_result.error_message}")
-                self.sheets_client.update_match_status(
-                    self.spreadsheet_id, team_name, event_name, "ERROR"
+                await self._forget_fixture(selection_id, match.get("Data", ""))
+                await bets_repository.mark_match_status_async(self.user_id, team_name, event_name, match.get("Data", ""), "ERROR")
+                sheets_write_queue.update_match(
+                    self.spreadsheet_id, team_name, event_name, "ERROR", match_date=match.get("Data", "")
                 )
                 return False
 
         except Exception as e:
             logger.error(f"Eroare la plasarea pariului pentru {team_name}: {e}")
             return False
+
+
+async def handle_stream_settlement(user_id: str, market_id: str, bet_ids: List[str]) -> None:
+    """
+    Handler pentru order stream: piața unor pariuri s-a închis.
+
+    Reîncearcă de câteva ori până când Betfair raportează ordinele ca settled;
+    ce rămâne nerezolvat e preluat de verificarea periodică.
+    """
+    from sqlalchemy import select
+    from app.database import get_async_session
+
+    async with get_async_session(ROLE_SCHEDULER) as db:
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalars().first()
+
+    if not user or not user.is_active or not user.google_sheets_id:
+        return
+
+    bot_service = UserBotService(user)
+    try:
+        if not await bot_service.initialize():
+            return
+
+        for delay in STREAM_SETTLEMENT_RETRY_SECONDS:
+            if delay:
+                await asyncio.sleep(delay)
+            result = await bot_service.process_settled_bets(bet_ids)
+            if not result['still_pending']:
+                return
+
+        logger.info(f"Piața {market_id}: pariuri încă nesettled pentru {user.email}, rămân pentru verificarea periodică")
+    finally:
+        await bot_service.cleanup()
@@ -0,0 +1,195 @@
+"""
+User Stats Repository - Statisticile de pariere materializate per user și per echipă
+Contoarele sunt actualizate în aceeași tranzacție cu pariul plasat / settled
+(bets_repository), deci dashboard-ul citește un singur rând. Rebuild-ul periodic
+le recalculează din tabela bets, pentru orice diferență apărută.
+"""
+from sqlalchemy import text
+from typing import Dict, Optional
+import logging
+
+from app.config import get_settings
+from app.database import get_engine, get_async_engine, ROLE_API
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+STAT_COLUMNS = ("total_bets", "won_bets", "lost_bets", "pending_bets", "total_staked", "total_profit")
+
+EMPTY_STATS = {
+    'total_bets': 0,
+    'won_bets': 0,
+    'lost_bets': 0,
+    'pending_bets': 0,
+    'total_profit': 0.0,
+    'total_staked': 0.0
+}
+
+
+def apply_stats_delta(conn, user_id: str, team_name: str, **delta) -> None:
+    """
+    Adună delta la contoarele userului și ale echipei (în tranzacția apelantului).
+
+    Args:
+        conn: Conexiunea tranzacției care modifică tabela bets
+        delta: total_bets=1, pending_bets=-1, total_profit=12.5 ...
+    """
+    values = {column: delta.get(column, 0) for column in STAT_COLUMNS}
+    columns = ", ".join(STAT_COLUMNS)
+    params = ", ".join(f":{column}" for column in STAT_COLUMNS)
+    increments = ", ".join(f"{column} = {{table}}.{column} + EXCLUDED.{column}" for column in STAT_COLUMNS)
+
+    conn.execute(text(f"""
+        INSERT INTO user_team_stats (user_id, team_name, {columns}, updated_at)
+        VALUES (:user_id, :team_name, {params}, CURRENT_TIMESTAMP)
+        ON CONFLICT (user_id, team_name) DO UPDATE
+        SET {increments.format(table='user_team_stats')}, updated_at = CURRENT_TIMESTAMP
+    """), {"user_id": user_id, "team_name": team_name, **values})
+
+    conn.execute(text(f"""
+        INSERT INTO user_stats (user_id, {columns}, updated_at)
+        VALUES (:user_id, {params}, CURRENT_TIMESTAMP)
+        ON CONFLICT (user_id) DO UPDATE
+        SET {increments.format(table='user_stats')}, updated_at = CURRENT_TIMESTAMP
+    """), {"user_id": user_id, **values})
+
+
+def rebuild_stats(conn, user_id: Optional[str] = None) -> int:
+    """
+    Recalculează statisticile din tabela bets (în tranzacția apelantului).
+
+    Rândurile sunt suprascrise prin upsert (nu DELETE + INSERT): un apply_stats_delta
+    concurent care creează rândul unei echipe noi nu mai produce un unique violation.
+    Se șterg doar rândurile echipelor / userilor care nu mai au pariuri.
+
+    Returns:
+        Numărul de useri recalculați
+    """
+    user_filter = "AND user_id = :user_id" if user_id else ""
+    params = {"user_id": user_id} if user_id else {}
+    columns = ", ".join(STAT_COLUMNS)
+    overwrite = ", ".join(f"{column} = EXCLUDED.{column}" for column in STAT_COLUMNS)
+
+    conn.execute(text(f"""
+        INSERT INTO user_team_stats (user_id, team_name, {columns}, updated_at)
+        SELECT user_id, team_name,
+               COUNT(*),
+               SUM(CASE WHEN status = 'WON' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN status = 'LOST' THEN 1 ELSE 0 END),
+               SUM(CASE WHEN status = 'PENDING' THEN 1 ELSE 0 END),
+               COALESCE(SUM(stake), 0),
+               COALESCE(SUM(CASE WHEN status IN ('WON', 'LOST') THEN profit ELSE 0 END), 0),
+               CURRENT_TIMESTAMP
+        FROM bets
+        WHERE status IN ('PENDING', 'WON', 'LOST') {user_filter}
+        GROUP BY user_id, team_name
+        ON CONFLICT (user_id, team_name) DO UPDATE
+        SET {overwrite}, updated_at = CURRENT_TIMESTAMP
+    """), params)
+
+    conn.execute(text(f"""
+        DELETE FROM user_team_stats
+        WHERE NOT EXISTS (
+            SELECT 1 FROM bets
+            WHERE bets.user_id = user_team_stats.user_id
+              AND bets.team_name = user_team_stats.team_name
+              AND bets.status IN ('PENDING', 'WON', 'LOST')
+        ) {user_filter}
+    """), params)
+
+    result = conn.execute(text(f"""
+        INSERT INTO user_stats (user_id, {columns}, updated_at)
+        SELECT user_id, SUM(total_bets), SUM(won_bets), SUM(lost_bets),
+               SUM(pending_bets), SUM(total_staked), SUM(total_profit), CURRENT_TIMESTAMP
+        FROM user_team_stats
+        WHERE true {user_filter}
+        GROUP BY user_id
+        ON CONFLICT (user_id) DO UPDATE
+        SET {overwrite}, updated_at = CURRENT_TIMESTAMP
+    """), params)
+
+    conn.execute(text(f"""
+        DELETE FROM user_stats
+        WHERE NOT EXISTS (
+            SELECT 1 FROM user_team_stats WHERE user_team_stats.user_id = user_stats.user_id
+        ) {user_filter}
+    """), params)
+    return result.rowcount
+
+
+def _stats_dict(row) -> dict:
+    return {
+        'total_bets': int(row.total_bets),
+        'won_bets': int(row.won_bets),
+        'lost_bets': int(row.lost_bets),
+        'pending_bets': int(row.pending_bets),
+        'total_profit': round(float(row.total_profit), 2),
+        'total_staked': round(float(row.total_staked), 2)
+    }
+
+
+_USER_STATS_QUERY = """
+    SELECT total_bets, won_bets, lost_bets, pending_bets, total_staked, total_profit
+    FROM user_stats
+    WHERE user_id = :user_id
+"""
+
+
+class UserStatsRepository:
+    """Repository pentru tabelele user_stats și user_team_stats"""
+
+    def __init__(self):
+        self.engine = get_engine(ROLE_API)
+
+    @property
+    def async_engine(self):
+        return get_async_engine(ROLE_API)
+
+    def get_user_stats(self, user_id: str) -> dict:
+        """Statisticile userului (total_bets, won_bets, lost_bets, pending_bets, total_profit, total_staked)."""
+        with self.engine.connect() as conn:
+            result = conn.execute(text(_USER_STATS_QUERY), {"user_id": user_id})
+            row = result.fetchone()
+            return _stats_dict(row) if row else dict(EMPTY_STATS)
+
+    async def get_user_stats_async(self, user_id: str) -> dict:
+        """get_user_stats fără să blocheze event loop-ul"""
+        async with self.async_engine.connect() as conn:
+            result = await conn.execute(text(_USER_STATS_QUERY), {"user_id": user_id})
+            row = result.fetchone()
+            return _stats_dict(row) if row else dict(EMPTY_STATS)
+
+    def get_team_stats(self, user_id: str) -> Dict[str, dict]:
+        """Statisticile per echipă: team_name -> același format ca get_user_stats."""
+        with self.engine.connect() as conn:
+            result = conn.execute(text("""
+                SELECT team_name, total_bets, won_bets, lost_bets, pending_bets, total_staked, total_profit
+                FROM user_team_stats
+                WHERE user_id = :user_id
+            """), {"user_id": user_id})
+            return {row.team_name: _stats_dict(row) for row in result}
+
+    def rebuild(self, user_id: Optional[str] = None) -> int:
+        """
+        Recalculează statisticile din tabela bets (un user sau toți).
+
+        Returns:
+            Numărul de useri recalculați
+        """
+        with self.engine.begin() as conn:
+            rebuilt = rebuild_stats(conn, user_id)
+
+        logger.info(f"Statistici recalculate pentru {rebuilt} user(i)")
+        return rebuilt
+
+    async def rebuild_async(self, user_id: Optional[str] = None) -> int:
+        """rebuild fără să blocheze event loop-ul"""
+        async with self.async_engine.begin() as conn:
+            rebuilt = await conn.run_sync(rebuild_stats, user_id)
+
+        logger.info(f"Statistici recalculate pentru {rebuilt} user(i)")
+        return rebuilt
+
+
+# Singleton instance
+user_stats_repository = UserStatsRepository()
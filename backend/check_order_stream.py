@@ -0,0 +1,149 @@
+"""
+Check Betfair order stream against a local fake Exchange Stream server (python check_order_stream.py)
+Serverul fals (asyncio, fără TLS) redă cadrele connection / authentication /
+orderSubscription / ocm / heartbeat, închide prima conexiune și verifică că
+OrderStream anunță settlement-ul și se resubscrie cu initialClk/clk după reconectare.
+"""
+import asyncio
+import json
+import sys
+
+from app.services.betfair_stream import OrderStream
+
+MARKET_ID = "1.234567"
+BET_ID = "31415926"
+
+
+class FakeStreamServer:
+    """Exchange Stream API minimal: un script de cadre ocm pentru fiecare conexiune."""
+
+    def __init__(self, scripts):
+        self.scripts = list(scripts)
+        self.subscriptions = []
+        self.auths = []
+        self.port = None
+        self._server = None
+        self._connections = 0
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        index = self._connections
+        self._connections += 1
+        script = self.scripts[index] if index < len(self.scripts) else []
+
+        async def send(message):
+            writer.write((json.dumps(message) + "\r\n").encode("utf-8"))
+            await writer.drain()
+
+        async def receive():
+            return json.loads(await reader.readline())
+
+        try:
+            await send({"op": "connection", "connectionId": f"fake-{index}"})
+
+            auth = await receive()
+            self.auths.append(auth)
+            await send({"op": "status", "id": auth["id"], "statusCode": "SUCCESS"})
+
+            subscription = await receive()
+            self.subscriptions.append(subscription)
+            await send({"op": "status", "id": subscription["id"], "statusCode": "SUCCESS"})
+
+            for frame in script:
+                await asyncio.sleep(0.05)
+                await send({"op": "ocm", "id": subscription["id"], **frame})
+
+            if index + 1 >= len(self.scripts):
+                # Ultima conexiune rămâne deschisă (heartbeat-uri) până la oprirea testului
+                while True:
+                    await asyncio.sleep(0.2)
+                    await send({"op": "ocm", "id": subscription["id"], "ct": "HEARTBEAT", "clk": "hb"})
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+class FakeClient:
+    def get_stream_auth(self):
+        return {"appKey": "fake-app-key", "session": "fake-session-token"}
+
+
+async def check_order_stream():
+    """Test order stream settlement and resubscribe"""
+    print("🔍 Testing order stream against fake stream server...")
+    print("")
+
+    # Conexiunea 1: imaginea inițială cu un pariu matched, un heartbeat, apoi serverul închide
+    first_connection = [
+        {
+            "ct": "SUB_IMAGE",
+            "initialClk": "initial-1",
+            "clk": "clk-1",
+            "oc": [{"id": MARKET_ID, "fullImage": True, "orc": [
+                {"id": 47972, "uo": [{"id": BET_ID, "p": 2.0, "s": 10, "side": "B", "status": "E", "sm": 10}]}
+            ]}]
+        },
+        {"ct": "HEARTBEAT", "clk": "clk-2"}
+    ]
+    # Conexiunea 2: piața se închide
+    second_connection = [
+        {"clk": "clk-3", "oc": [{"id": MARKET_ID, "closed": True, "orc": [
+            {"id": 47972, "uo": [{"id": BET_ID, "status": "EC", "sm": 10}]}
+        ]}]}
+    ]
+
+    server = FakeStreamServer([first_connection, second_connection])
+    await server.start()
+
+    settlements = []
+    settled = asyncio.Event()
+
+    async def on_settlement(user_id, market_id, bet_ids):
+        settlements.append((user_id, market_id, bet_ids))
+        settled.set()
+
+    stream = OrderStream("test-user", FakeClient(), on_settlement, host="127.0.0.1", port=server.port,
+                         use_ssl=False, heartbeat_ms=500)
+    stream.RECONNECT_MIN_SECONDS = 0.1
+    stream.start()
+
+    success = True
+    try:
+        await asyncio.wait_for(settled.wait(), timeout=10)
+        print(f"   ✅ Settlement emis: {settlements}")
+    except asyncio.TimeoutError:
+        print(f"   ❌ Niciun settlement în 10s (subscripții: {server.subscriptions})")
+        success = False
+    finally:
+        await stream.stop()
+        await server.stop()
+
+    if success:
+        checks = [
+            ("auth cu sesiunea clientului", server.auths[0].get("session") == "fake-session-token"),
+            ("2 subscripții (reconectare)", len(server.subscriptions) == 2),
+            ("prima subscripție fără clk", "clk" not in server.subscriptions[0]),
+            ("resubscribe cu initialClk", server.subscriptions[1].get("initialClk") == "initial-1"),
+            ("resubscribe cu ultimul clk", server.subscriptions[1].get("clk") == "clk-2"),
+            ("settlement pentru pariul matched", settlements == [("test-user", MARKET_ID, [BET_ID])]),
+            ("o deconectare numărată", stream.get_stats()["disconnects"] >= 1)
+        ]
+        for name, passed in checks:
+            print(f"   {'✅' if passed else '❌'} {name}")
+            success = success and passed
+
+    print("")
+    print("✅ Order stream is working correctly!" if success else "❌ Order stream test failed")
+    return success
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(check_order_stream()) else 1)
@@ -0,0 +1,48 @@
+-- Migration: Add scheduled_matches and bets tables
+-- Date: 2026-10-16
+-- Description: Scheduled matches and placed bets move from the per-team worksheets to the
+-- database, which the bot reads and writes directly; Google Sheets becomes a mirror
+
+CREATE TABLE IF NOT EXISTS scheduled_matches (
+    id BIGSERIAL PRIMARY KEY,
+    user_id VARCHAR(36) NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    team_id VARCHAR(36) NOT NULL REFERENCES teams(id) ON DELETE CASCADE,
+    team_name VARCHAR(255) NOT NULL,
+    event_name VARCHAR(255) NOT NULL,
+    match_date VARCHAR(40) NOT NULL DEFAULT '',
+    competition VARCHAR(255),
+    odds FLOAT,
+    status VARCHAR(20) NOT NULL DEFAULT 'PROGRAMAT',
+    stake FLOAT,
+    profit FLOAT,
+    bet_id VARCHAR(64),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (user_id, team_name, event_name, match_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_scheduled_matches_user_team_status ON scheduled_matches(user_id, team_name, status);
+
+CREATE TABLE IF NOT EXISTS bets (
+    id BIGSERIAL PRIMARY KEY,
+    user_id VARCHAR(36) NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    team_id VARCHAR(36) NOT NULL REFERENCES teams(id) ON DELETE CASCADE,
+    team_name VARCHAR(255) NOT NULL,
+    event_name VARCHAR(255) NOT NULL,
+    match_date VARCHAR(40) NOT NULL DEFAULT '',
+    bet_id VARCHAR(64) NOT NULL UNIQUE,
+    market_id VARCHAR(32),
+    selection_id BIGINT,
+    stake FLOAT NOT NULL,
+    odds FLOAT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+    profit FLOAT,
+    placed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    settled_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_bets_user_status ON bets(user_id, status);
+
+-- Add comment
+COMMENT ON COLUMN scheduled_matches.status IS 'PROGRAMAT, PENDING, WON, LOST or ERROR (same values as the team worksheet Status column)';
+COMMENT ON COLUMN bets.status IS 'PENDING until settled, then WON or LOST';
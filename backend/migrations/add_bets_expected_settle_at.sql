@@ -0,0 +1,18 @@
+-- Migration: Add bets.expected_settle_at
+-- Date: 2026-10-16
+-- Description: Pending-bet index by expected settlement time (kickoff + settle delay), so the
+-- results check only wakes users whose PENDING bets could already be settled
+
+ALTER TABLE bets ADD COLUMN IF NOT EXISTS expected_settle_at TIMESTAMP;
+
+-- Backfill: match_date is Europe/Bucharest local time ("YYYY-MM-DDTHH:MM"), settle delay 120 minutes
+UPDATE bets
+SET expected_settle_at = (to_timestamp(substr(match_date, 1, 16), 'YYYY-MM-DD"T"HH24:MI')::timestamp
+                          AT TIME ZONE 'Europe/Bucharest' AT TIME ZONE 'UTC') + INTERVAL '120 minutes'
+WHERE expected_settle_at IS NULL
+  AND match_date ~ '^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}';
+
+CREATE INDEX IF NOT EXISTS idx_bets_pending_settle ON bets(expected_settle_at, user_id) WHERE status = 'PENDING';
+
+-- Add comment
+COMMENT ON COLUMN bets.expected_settle_at IS 'UTC kickoff + results_settle_delay_minutes; NULL when match_date could not be parsed (always checked)';
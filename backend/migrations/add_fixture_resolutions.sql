@@ -0,0 +1,21 @@
+-- Migration: Add fixture_resolutions table
+-- Date: 2026-10-16
+-- Description: Event / market resolved for a team's fixture, keyed by the team's Betfair
+-- selection id and the fixture date; shared by all users tracking the same team
+
+CREATE TABLE IF NOT EXISTS fixture_resolutions (
+    selection_id VARCHAR(32) NOT NULL,
+    fixture_date VARCHAR(10) NOT NULL,
+    event_id VARCHAR(32) NOT NULL,
+    event_name VARCHAR(255),
+    market_id VARCHAR(32) NOT NULL,
+    runner_name VARCHAR(255),
+    resolved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (selection_id, fixture_date)
+);
+
+CREATE INDEX IF NOT EXISTS idx_fixture_resolutions_date ON fixture_resolutions(fixture_date);
+
+-- Add comment
+COMMENT ON TABLE fixture_resolutions IS 'Filled by the first run that resolves the fixture; purged daily after the fixture date';
+COMMENT ON COLUMN fixture_resolutions.fixture_date IS 'Fixture date as YYYY-MM-DD (same prefix as scheduled_matches.match_date)';
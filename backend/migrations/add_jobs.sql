@@ -0,0 +1,26 @@
+-- Migration: Add jobs table
+-- Date: 2026-10-16
+-- Description: Background jobs started from the API (manual bot run, new team setup).
+-- The endpoints return the job id at once; progress is pushed over the user's WebSocket
+-- and can be polled at GET /api/jobs/{job_id}
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id VARCHAR(36) PRIMARY KEY,
+    user_id VARCHAR(36) NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    kind VARCHAR(32) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    progress INTEGER NOT NULL DEFAULT 0,
+    message TEXT,
+    result JSONB,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_user_created ON jobs(user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status) WHERE status IN ('queued', 'running');
+
+-- Add comment
+COMMENT ON COLUMN jobs.status IS 'queued, running, succeeded or failed (jobs interrupted by a restart are marked failed)';
+COMMENT ON COLUMN jobs.progress IS 'Percent complete, 0-100';
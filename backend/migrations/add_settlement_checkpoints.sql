@@ -0,0 +1,14 @@
+-- Migration: Add settlement_checkpoints table
+-- Date: 2026-10-16
+-- Description: Per-account watermark (last settledDate processed) so the results check
+-- only asks listClearedOrders for orders settled since the previous check
+
+CREATE TABLE IF NOT EXISTS settlement_checkpoints (
+    account_id VARCHAR(64) PRIMARY KEY,
+    last_settled_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Add comment
+COMMENT ON COLUMN settlement_checkpoints.account_id IS 'User ID (multi-user bot) or ''legacy'' for the single-account bot';
+COMMENT ON COLUMN settlement_checkpoints.last_settled_at IS 'Latest Betfair settledDate (UTC) fully processed for this account';
@@ -0,0 +1,16 @@
+-- Migration: Add sheets_write_queue table
+-- Date: 2026-10-16
+-- Description: Write-behind queue for Google Sheets updates (match status, last_stake,
+-- progression). Rows are deleted once written to Sheets and reloaded on startup
+
+CREATE TABLE IF NOT EXISTS sheets_write_queue (
+    id BIGSERIAL PRIMARY KEY,
+    spreadsheet_id VARCHAR(128) NOT NULL,
+    operation JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_sheets_write_queue_spreadsheet ON sheets_write_queue(spreadsheet_id);
+
+-- Add comment
+COMMENT ON COLUMN sheets_write_queue.operation IS 'Queued write: {"kind": "match"|"team", "team_name", "event_name", "fields", ...}';
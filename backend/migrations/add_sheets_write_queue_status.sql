@@ -0,0 +1,13 @@
+-- Migration: Add status and error to sheets_write_queue
+-- Date: 2026-10-16
+-- Description: Writes that fail permanently are kept as 'failed' (with the error)
+-- instead of being deleted; only 'pending' rows are reloaded on startup
+
+ALTER TABLE sheets_write_queue ADD COLUMN IF NOT EXISTS status VARCHAR(16) NOT NULL DEFAULT 'pending';
+ALTER TABLE sheets_write_queue ADD COLUMN IF NOT EXISTS error TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_sheets_write_queue_status ON sheets_write_queue(status);
+
+-- Add comment
+COMMENT ON COLUMN sheets_write_queue.status IS 'pending = waiting for flush, failed = permanent Sheets error (kept for inspection)';
+COMMENT ON COLUMN sheets_write_queue.error IS 'Error of the permanent failure (status = failed)';
@@ -0,0 +1,52 @@
+-- Migration: Add user_stats and user_team_stats tables
+-- Date: 2026-10-16
+-- Description: Betting statistics per user and per team, updated in the same transaction
+-- as each placed / settled bet, so the dashboard reads one row instead of every team sheet
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id VARCHAR(36) PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    total_bets INTEGER NOT NULL DEFAULT 0,
+    won_bets INTEGER NOT NULL DEFAULT 0,
+    lost_bets INTEGER NOT NULL DEFAULT 0,
+    pending_bets INTEGER NOT NULL DEFAULT 0,
+    total_staked FLOAT NOT NULL DEFAULT 0,
+    total_profit FLOAT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS user_team_stats (
+    user_id VARCHAR(36) NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    team_name VARCHAR(255) NOT NULL,
+    total_bets INTEGER NOT NULL DEFAULT 0,
+    won_bets INTEGER NOT NULL DEFAULT 0,
+    lost_bets INTEGER NOT NULL DEFAULT 0,
+    pending_bets INTEGER NOT NULL DEFAULT 0,
+    total_staked FLOAT NOT NULL DEFAULT 0,
+    total_profit FLOAT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, team_name)
+);
+
+-- Initial fill from existing bets
+INSERT INTO user_team_stats (user_id, team_name, total_bets, won_bets, lost_bets, pending_bets, total_staked, total_profit)
+SELECT user_id, team_name,
+       COUNT(*),
+       COUNT(*) FILTER (WHERE status = 'WON'),
+       COUNT(*) FILTER (WHERE status = 'LOST'),
+       COUNT(*) FILTER (WHERE status = 'PENDING'),
+       COALESCE(SUM(stake), 0),
+       COALESCE(SUM(profit) FILTER (WHERE status IN ('WON', 'LOST')), 0)
+FROM bets
+WHERE status IN ('PENDING', 'WON', 'LOST')
+GROUP BY user_id, team_name
+ON CONFLICT (user_id, team_name) DO NOTHING;
+
+INSERT INTO user_stats (user_id, total_bets, won_bets, lost_bets, pending_bets, total_staked, total_profit)
+SELECT user_id, SUM(total_bets), SUM(won_bets), SUM(lost_bets), SUM(pending_bets), SUM(total_staked), SUM(total_profit)
+FROM user_team_stats
+GROUP BY user_id
+ON CONFLICT (user_id) DO NOTHING;
+
+-- Add comment
+COMMENT ON TABLE user_stats IS 'Materialized from bets; rebuilt nightly by the user_stats_rebuild job';
+COMMENT ON COLUMN user_stats.total_staked IS 'Stakes of PENDING, WON and LOST bets';